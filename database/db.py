@@ -1,12 +1,18 @@
 import sqlite3
 import json
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterator
 import os
 
 class DatabaseManager:
+    # Schema version, stored in PRAGMA user_version
+    SCHEMA_VERSION = 4
+    STOCK_TRANSACTION_TYPES = ('sale', 'purchase', 'adjustment', 'return', 'opening')
+    
     def __init__(self, db_path: str = "invoice_database.db"):
         self.db_path = db_path
+        self._low_stock_listeners = []
+        self._low_stock_count = None
         self.init_database()
     
     def init_database(self):
@@ -17,11 +23,66 @@ class DatabaseManager:
                 schema_script = f.read()
             
             conn = sqlite3.connect(self.db_path)
+            # WAL lets readers (including online backups) run alongside writers
+            conn.execute("PRAGMA journal_mode=WAL")
             cursor = conn.cursor()
             cursor.executescript(schema_script)
             conn.commit()
+            self._migrate(conn, schema_script)
             conn.close()
     
+    def _migrate(self, conn, schema_script: str):
+        """Run one-off data migrations for databases created by older versions"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # Stock became ledger-derived: record an opening balance for stock
+            # that was set directly on products without a transaction. It is
+            # dated a second before the product's first ledger entry (or its
+            # creation), so historical stock levels include it.
+            conn.execute("""
+                INSERT INTO stock_transactions (product_id, transaction_type, quantity, notes, created_at)
+                SELECT p.id, 'opening', p.stock_quantity - COALESCE(t.total, 0), 'Opening balance',
+                       COALESCE(DATETIME(MIN(COALESCE(p.created_at, t.first_at), COALESCE(t.first_at, p.created_at)),
+                                         '-1 second'), CURRENT_TIMESTAMP)
+                FROM products p
+                LEFT JOIN (SELECT product_id, SUM(quantity) AS total, MIN(created_at) AS first_at
+                           FROM stock_transactions GROUP BY product_id) t ON t.product_id = p.id
+                WHERE p.stock_quantity != COALESCE(t.total, 0)
+            """)
+        if version < 2:
+            # HSN codes for the GST return HSN summary
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+            if 'hsn_code' not in columns:
+                conn.execute("ALTER TABLE products ADD COLUMN hsn_code TEXT")
+        if version < 3:
+            # Change logging became opt-in: recreate the triggers with their
+            # change_log_state check. Keep logging on only where a replicator
+            # has been pruning the log; otherwise nothing reads it.
+            triggers = conn.execute("""
+                SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg!_%!_log!_%' ESCAPE '!'
+            """).fetchall()
+            for (name,) in triggers:
+                conn.execute(f"DROP TRIGGER {name}")
+            pruned = conn.execute("""
+                SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0)
+                       > (SELECT COUNT(*) FROM change_log)
+            """).fetchone()[0]
+            if pruned:
+                conn.execute("UPDATE change_log_state SET enabled = 1 WHERE id = 1")
+            else:
+                conn.execute("DELETE FROM change_log")
+            conn.commit()
+            conn.executescript(schema_script)
+        if version < 4:
+            # Retention settings for generated PDFs and QR codes
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(shop_settings)")]
+            if 'artifact_retention_days' not in columns:
+                conn.execute("ALTER TABLE shop_settings ADD COLUMN artifact_retention_days INTEGER DEFAULT 30")
+            if 'artifact_quota_mb' not in columns:
+                conn.execute("ALTER TABLE shop_settings ADD COLUMN artifact_quota_mb INTEGER DEFAULT 500")
+        conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        conn.commit()
+    
     def get_connection(self):
         """Get database connection"""
         conn = sqlite3.connect(self.db_path)
@@ -45,7 +106,8 @@ class DatabaseManager:
             cursor = conn.cursor()
             
             fields = ['shop_name', 'address', 'phone', 'email', 'gstin', 'logo_path', 
-                     'invoice_prefix', 'default_gst', 'default_template', 'upi_id']
+                     'invoice_prefix', 'default_gst', 'default_template', 'upi_id',
+                     'artifact_retention_days', 'artifact_quota_mb']
             
             update_fields = []
             values = []
@@ -85,22 +147,82 @@ class DatabaseManager:
     
     def get_customers(self, search: str = "") -> List[Dict]:
         """Get all customers or search customers"""
+        conditions, params = self._customer_filter(search)
+        query = "SELECT * FROM customers"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY name"
+        
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute(query, params)
+        customers = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return customers
+    
+    @staticmethod
+    def _prefix_pattern(search: str) -> str:
+        """LIKE pattern matching values that start with `search`"""
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return escaped + "%"
+    
+    def _customer_filter(self, search: str, prefix: bool = False) -> Tuple[List[str], List]:
+        """
+        WHERE conditions and params for a customer search
         
-        if search:
-            cursor.execute("""
-                SELECT * FROM customers 
-                WHERE name LIKE ? OR phone LIKE ? OR email LIKE ?
-                ORDER BY name
-            """, (f"%{search}%", f"%{search}%", f"%{search}%"))
-        else:
-            cursor.execute("SELECT * FROM customers ORDER BY name")
+        Substring search scans the table; prefix search is served by the
+        name/email NOCASE indexes and a range on the phone index.
+        """
+        if not search:
+            return [], []
+        if prefix:
+            pattern = self._prefix_pattern(search)
+            return (["(name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\' OR (phone >= ? AND phone < ?))"],
+                    [pattern, pattern, search, search + "\uffff"])
+        return ["(name LIKE ? OR phone LIKE ? OR email LIKE ?)"], [f"%{search}%"] * 3
+    
+    def get_customers_page(self, search: str = "", after: Optional[Tuple[str, int]] = None,
+                           limit: int = 200, prefix: bool = False) -> List[Dict]:
+        """
+        Get one page of customers ordered by name
         
+        Args:
+            search: Search text (name, phone or email)
+            after: (name, id) of the last row of the previous page
+            limit: Page size
+            prefix: Match values starting with `search` (indexed) instead of containing it
+        """
+        conditions, params = self._customer_filter(search, prefix)
+        if after:
+            # Keyset paging: seeks on the name index instead of skipping OFFSET rows
+            conditions.append("(name, id) > (?, ?)")
+            params.extend(after)
+        
+        query = "SELECT * FROM customers"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY name, id LIMIT ?"
+        params.append(limit)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
         customers = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return customers
     
+    def count_customers(self, search: str = "", prefix: bool = False) -> int:
+        """Count customers matching a search"""
+        conditions, params = self._customer_filter(search, prefix)
+        query = "SELECT COUNT(*) FROM customers"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        conn = self.get_connection()
+        count = conn.execute(query, params).fetchone()[0]
+        conn.close()
+        return count
+    
     def get_customer(self, customer_id: int) -> Optional[Dict]:
         """Get customer by ID"""
         conn = self.get_connection()
@@ -136,15 +258,21 @@ class DatabaseManager:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO products (name, description, price, gst_percent, barcode, 
-                                category, stock_quantity, min_stock_alert)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                                category, stock_quantity, min_stock_alert, hsn_code)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (product['name'], product.get('description'), product['price'],
               product.get('gst_percent', 18.0), product.get('barcode'),
               product.get('category'), product.get('stock_quantity', 0),
-              product.get('min_stock_alert', 5)))
+              product.get('min_stock_alert', 5), product.get('hsn_code')))
         product_id = cursor.lastrowid
+        if product.get('stock_quantity'):
+            cursor.execute("""
+                INSERT INTO stock_transactions (product_id, transaction_type, quantity, notes)
+                VALUES (?, 'opening', ?, 'Opening balance')
+            """, (product_id, product['stock_quantity']))
         conn.commit()
         conn.close()
+        self._notify_low_stock()
         return product_id
     
     def get_products(self, search: str = "", category: str = "") -> List[Dict]:
@@ -153,22 +281,93 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         query = "SELECT * FROM products"
-        params = []
+        conditions, params = self._product_filter(search, category)
         
-        conditions = []
-        if search:
-            conditions.append("(name LIKE ? OR barcode LIKE ?)")
-            params.extend([f"%{search}%", f"%{search}%"])
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
         
+        query += " ORDER BY name"
+        
+        cursor.execute(query, params)
+        products = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return products
+    
+    def _product_filter(self, search: str, category: str,
+                        prefix: bool = False) -> Tuple[List[str], List]:
+        """WHERE conditions and params for a product search (see _customer_filter)"""
+        conditions, params = [], []
+        if search and prefix:
+            conditions.append("(name LIKE ? ESCAPE '\\' OR (barcode >= ? AND barcode < ?))")
+            params.extend([self._prefix_pattern(search), search, search + "\uffff"])
+        elif search:
+            conditions.append("(name LIKE ? OR category LIKE ? OR barcode LIKE ?)")
+            params.extend([f"%{search}%"] * 3)
         if category:
             conditions.append("category = ?")
             params.append(category)
+        return conditions, params
+    
+    def get_products_page(self, search: str = "", category: str = "",
+                          after: Optional[Tuple[str, int]] = None, limit: int = 200,
+                          prefix: bool = False) -> List[Dict]:
+        """
+        Get one page of products ordered by name
+        
+        Args:
+            search: Search text (name, category or barcode; a prefix search skips category)
+            category: Category filter
+            after: (name, id) of the last row of the previous page
+            limit: Page size
+            prefix: Match values starting with `search` (indexed) instead of containing it
+        """
+        conditions, params = self._product_filter(search, category, prefix)
+        if after:
+            conditions.append("(name, id) > (?, ?)")
+            params.extend(after)
         
+        query = "SELECT * FROM products"
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY name, id LIMIT ?"
+        params.append(limit)
         
-        query += " ORDER BY name"
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        products = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return products
+    
+    def count_products(self, search: str = "", category: str = "", prefix: bool = False) -> int:
+        """Count products matching a search"""
+        conditions, params = self._product_filter(search, category, prefix)
+        query = "SELECT COUNT(*) FROM products"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        conn = self.get_connection()
+        count = conn.execute(query, params).fetchone()[0]
+        conn.close()
+        return count
+    
+    def get_products_changed_since(self, since: Optional[str] = None) -> List[Dict]:
+        """
+        Get picker fields of products added or updated at or after `since`
         
+        Args:
+            since: updated_at value from a previous call (None for all products)
+        """
+        query = "SELECT id, name, price, gst_percent, updated_at FROM products"
+        params = []
+        if since:
+            # updated_at has one-second resolution, so re-read the boundary second
+            query += " WHERE updated_at >= ?"
+            params.append(since)
+        query += " ORDER BY name, id"
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
         cursor.execute(query, params)
         products = [dict(row) for row in cursor.fetchall()]
         conn.close()
@@ -188,18 +387,31 @@ class DatabaseManager:
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
+            
+            # A changed stock level is recorded as an adjustment in the ledger
+            row = cursor.execute("SELECT stock_quantity FROM products WHERE id = ?",
+                                 (product_id,)).fetchone()
+            if row and product.get('stock_quantity') is not None:
+                difference = product['stock_quantity'] - (row['stock_quantity'] or 0)
+                if difference:
+                    cursor.execute("""
+                        INSERT INTO stock_transactions (product_id, transaction_type, quantity, notes)
+                        VALUES (?, 'adjustment', ?, 'Stock edited')
+                    """, (product_id, difference))
+            
             cursor.execute("""
                 UPDATE products 
                 SET name = ?, description = ?, price = ?, gst_percent = ?, 
                     barcode = ?, category = ?, stock_quantity = ?, min_stock_alert = ?,
-                    updated_at = CURRENT_TIMESTAMP
+                    hsn_code = ?, updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
             """, (product['name'], product.get('description'), product['price'],
                   product.get('gst_percent', 18.0), product.get('barcode'),
                   product.get('category'), product.get('stock_quantity'),
-                  product.get('min_stock_alert', 5), product_id))
+                  product.get('min_stock_alert', 5), product.get('hsn_code'), product_id))
             conn.commit()
             conn.close()
+            self._notify_low_stock()
             return True
         except Exception as e:
             print(f"Error updating product: {e}")
@@ -208,44 +420,353 @@ class DatabaseManager:
     def update_stock(self, product_id: int, quantity_change: int, transaction_type: str, 
                     reference_id: Optional[int] = None, notes: str = "") -> bool:
         """Update product stock"""
+        result = self.apply_stock_movements([{
+            'product_id': product_id, 'quantity': quantity_change,
+            'transaction_type': transaction_type, 'reference_id': reference_id, 'notes': notes
+        }])
+        if result['errors']:
+            print(f"Error updating stock: {result['errors'][0]['error']}")
+        return not result['errors']
+    
+    def apply_stock_movements(self, movements: List[Dict]) -> Dict:
+        """
+        Apply many stock movements in one transaction
+        
+        Each movement has 'quantity' (signed change) and a product given as
+        'product_id', 'barcode' or 'name', plus optional 'transaction_type'
+        (default 'purchase'), 'reference_id', 'notes' and 'line' (reported
+        back in errors, e.g. a CSV line number). Nothing is written unless
+        every movement is valid.
+        
+        Returns:
+            Dict with 'applied' (movement count) and 'errors' (list of
+            {'index', 'line', 'error'})
+        """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
+            resolved, errors = self._resolve_stock_movements(cursor, movements)
+            if errors:
+                return {'applied': 0, 'errors': errors}
             
-            # Update product stock
-            cursor.execute("""
-                UPDATE products 
-                SET stock_quantity = stock_quantity + ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (quantity_change, product_id))
-            
-            # Add stock transaction record
-            cursor.execute("""
-                INSERT INTO stock_transactions (product_id, transaction_type, quantity, 
-                                             reference_id, notes)
-                VALUES (?, ?, ?, ?, ?)
-            """, (product_id, transaction_type, quantity_change, reference_id, notes))
-            
+            self._apply_stock_movements(cursor, resolved)
             conn.commit()
-            conn.close()
-            return True
+            self._notify_low_stock()
+            return {'applied': len(resolved), 'errors': []}
         except Exception as e:
-            print(f"Error updating stock: {e}")
-            return False
+            conn.rollback()
+            return {'applied': 0, 'errors': [{'index': None, 'line': None, 'error': str(e)}]}
+        finally:
+            conn.close()
+    
+    def _resolve_stock_movements(self, cursor, movements: List[Dict]) -> Tuple[List[Tuple], List[Dict]]:
+        """
+        Validate movements and resolve their products
+        
+        Returns:
+            (product_id, type, quantity, reference_id, notes) rows, and errors
+        """
+        # Look products up in bulk rather than once per movement
+        lookups = {'id': set(), 'barcode': set(), 'name': set()}
+        for movement in movements:
+            if movement.get('product_id') is not None:
+                lookups['id'].add(movement['product_id'])
+            elif movement.get('barcode'):
+                lookups['barcode'].add(str(movement['barcode']))
+            elif movement.get('name'):
+                lookups['name'].add(str(movement['name']))
+        
+        found = {'id': {}, 'barcode': {}, 'name': {}}
+        for column, values in lookups.items():
+            values = list(values)
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                cursor.execute(f"SELECT id, {column} FROM products WHERE {column} IN ({', '.join('?' * len(chunk))})",
+                               chunk)
+                found[column].update((str(key) if column != 'id' else key, product_id)
+                                     for product_id, key in cursor.fetchall())
+        
+        resolved, errors = [], []
+        for index, movement in enumerate(movements):
+            def error(message):
+                errors.append({'index': index, 'line': movement.get('line'), 'error': message})
+            
+            if movement.get('product_id') is not None:
+                product_id = found['id'].get(movement['product_id'])
+            elif movement.get('barcode'):
+                product_id = found['barcode'].get(str(movement['barcode']))
+            elif movement.get('name'):
+                product_id = found['name'].get(str(movement['name']))
+            else:
+                error("No product given")
+                continue
+            if product_id is None:
+                error("Unknown product")
+                continue
+            
+            try:
+                quantity = float(movement['quantity'])
+            except (KeyError, TypeError, ValueError):
+                error(f"Invalid quantity: {movement.get('quantity')!r}")
+                continue
+            if not quantity:
+                error("Quantity is zero")
+                continue
+            # stock_quantity is INTEGER, as update_stock() is
+            if not quantity.is_integer():
+                error(f"Quantity must be a whole number: {movement['quantity']!r}")
+                continue
+            quantity = int(quantity)
+            
+            transaction_type = str(movement.get('transaction_type') or 'purchase').strip().lower() or 'purchase'
+            if transaction_type not in self.STOCK_TRANSACTION_TYPES:
+                error(f"Invalid transaction type: {transaction_type}")
+                continue
+            
+            resolved.append((product_id, transaction_type, quantity,
+                             movement.get('reference_id'), movement.get('notes') or ""))
+        return resolved, errors
+    
+    @staticmethod
+    def _apply_stock_movements(cursor, movements: List[Tuple]):
+        """
+        Write resolved movements on an open cursor (the caller commits)
+        
+        Args:
+            movements: (product_id, type, quantity, reference_id, notes) rows
+        """
+        cursor.executemany("""
+            INSERT INTO stock_transactions (product_id, transaction_type, quantity, 
+                                         reference_id, notes)
+            VALUES (?, ?, ?, ?, ?)
+        """, movements)
+        
+        # One update per product, however many movements it has
+        changes = {}
+        for product_id, _, quantity, _, _ in movements:
+            changes[product_id] = changes.get(product_id, 0) + quantity
+        cursor.executemany("""
+            UPDATE products 
+            SET stock_quantity = stock_quantity + ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, [(change, product_id) for product_id, change in changes.items()])
+    
+    # Stock Ledger Methods
+    #
+    # stock_transactions is the ledger; products.stock_quantity is kept in step
+    # with it as the current level. stock_snapshots holds per-product levels at
+    # past times, so a level as of any time is the latest snapshot before it
+    # plus the transactions in between.
+    
+    # Stock level of product `{product}` as of :as_of
+    _STOCK_AS_OF_SQL = """
+        COALESCE((SELECT s.quantity FROM stock_snapshots s
+                  WHERE s.product_id = {product} AND s.as_of <= :as_of
+                  ORDER BY s.as_of DESC LIMIT 1), 0)
+        + COALESCE((SELECT SUM(t.quantity) FROM stock_transactions t
+                    WHERE t.product_id = {product} AND t.created_at <= :as_of
+                      AND t.created_at > COALESCE((SELECT MAX(s.as_of) FROM stock_snapshots s
+                                                   WHERE s.product_id = {product}
+                                                     AND s.as_of <= :as_of), '')), 0)
+    """
+    
+    @staticmethod
+    def _as_of_timestamp(as_of=None) -> str:
+        """
+        Normalise an as-of time to a timestamp comparable with created_at
+        
+        None means now; a date (or 'YYYY-MM-DD') means the end of that day.
+        """
+        if as_of is None:
+            return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(as_of, datetime):
+            return as_of.strftime("%Y-%m-%d %H:%M:%S")
+        as_of = str(as_of)
+        return as_of + " 23:59:59" if len(as_of) == 10 else as_of
+    
+    def get_stock_as_of(self, product_id: int, as_of=None) -> float:
+        """Stock level of a product at a past time (see _as_of_timestamp)"""
+        conn = self.get_connection()
+        quantity = conn.execute(
+            "SELECT " + self._STOCK_AS_OF_SQL.format(product=":product_id"),
+            {'product_id': product_id, 'as_of': self._as_of_timestamp(as_of)}
+        ).fetchone()[0]
+        conn.close()
+        return quantity
+    
+    def get_stock_valuation(self, as_of=None) -> Dict:
+        """
+        Stock levels and value of every product at a time
+        
+        Products are valued at their current price.
+        
+        Returns:
+            Dict with 'as_of', 'total_quantity', 'total_value' and 'products'
+            (id, name, category, price, quantity, value per product)
+        """
+        as_of = self._as_of_timestamp(as_of)
+        conn = self.get_connection()
+        cursor = conn.execute(f"""
+            SELECT id, name, category, price, {self._STOCK_AS_OF_SQL.format(product="p.id")} AS quantity
+            FROM products p
+            ORDER BY name, id
+        """, {'as_of': as_of})
+        
+        products = []
+        total_quantity = total_value = 0
+        for row in cursor:
+            product = dict(row)
+            product['value'] = product['quantity'] * (product['price'] or 0)
+            total_quantity += product['quantity']
+            total_value += product['value']
+            products.append(product)
+        conn.close()
+        
+        return {'as_of': as_of, 'total_quantity': total_quantity,
+                'total_value': total_value, 'products': products}
+    
+    def take_stock_snapshots(self, as_of=None) -> int:
+        """
+        Snapshot the stock level, as of a time, of every product that moved
+        since the previous snapshot
+        
+        Returns:
+            Number of snapshots written
+        """
+        as_of = self._as_of_timestamp(as_of)
+        conn = self.get_connection()
+        cursor = conn.execute(f"""
+            INSERT OR REPLACE INTO stock_snapshots (product_id, as_of, quantity)
+            SELECT moved.product_id, :as_of, {self._STOCK_AS_OF_SQL.format(product="moved.product_id")}
+            FROM (SELECT DISTINCT product_id FROM stock_transactions
+                  WHERE created_at > COALESCE((SELECT MAX(as_of) FROM stock_snapshots
+                                               WHERE as_of <= :as_of), '')
+                    AND created_at <= :as_of) moved
+        """, {'as_of': as_of})
+        written = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return written
+    
+    def take_stock_snapshots_if_due(self, interval_hours: int = 24) -> int:
+        """Take stock snapshots if the latest is older than `interval_hours`"""
+        conn = self.get_connection()
+        due = conn.execute("""
+            SELECT COALESCE(MAX(as_of), '') < datetime('now', ?) FROM stock_snapshots
+        """, (f"-{interval_hours} hours",)).fetchone()[0]
+        conn.close()
+        return self.take_stock_snapshots() if due else 0
+    
+    def check_stock_consistency(self) -> List[Dict]:
+        """
+        Products whose current stock disagrees with the ledger
+        
+        Compares products.stock_quantity with the full transaction sum and
+        with the snapshot-based level.
+        
+        Returns:
+            Rows with id, name, stock_quantity, ledger_quantity and snapshot_quantity
+        """
+        conn = self.get_connection()
+        cursor = conn.execute(f"""
+            SELECT * FROM (
+                SELECT p.id, p.name, p.stock_quantity,
+                       COALESCE((SELECT SUM(t.quantity) FROM stock_transactions t
+                                 WHERE t.product_id = p.id), 0) AS ledger_quantity,
+                       {self._STOCK_AS_OF_SQL.format(product="p.id")} AS snapshot_quantity
+                FROM products p
+            )
+            WHERE stock_quantity != ledger_quantity OR ledger_quantity != snapshot_quantity
+        """, {'as_of': "9999-12-31 23:59:59"})
+        mismatches = [dict(row) for row in cursor]
+        conn.close()
+        return mismatches
+    
+    def rebuild_stock_quantities(self) -> int:
+        """
+        Reset products.stock_quantity from the ledger
+        
+        Returns:
+            Number of products corrected
+        """
+        conn = self.get_connection()
+        cursor = conn.execute("""
+            UPDATE products
+            SET stock_quantity = (SELECT COALESCE(SUM(t.quantity), 0) FROM stock_transactions t
+                                  WHERE t.product_id = products.id),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE stock_quantity != (SELECT COALESCE(SUM(t.quantity), 0) FROM stock_transactions t
+                                     WHERE t.product_id = products.id)
+        """)
+        corrected = cursor.rowcount
+        conn.commit()
+        conn.close()
+        self._notify_low_stock()
+        return corrected
     
     def get_low_stock_products(self) -> List[Dict]:
         """Get products with low stock"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        # Matches the idx_products_low_stock partial index, so only low-stock rows are read
         cursor.execute("""
             SELECT * FROM products 
             WHERE stock_quantity <= min_stock_alert 
-            ORDER BY stock_quantity ASC
+            ORDER BY stock_quantity ASC, id ASC
         """)
         products = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return products
     
+    def count_low_stock_products(self) -> int:
+        """Count products with low stock (kept up to date by triggers)"""
+        conn = self.get_connection()
+        row = conn.execute("SELECT low_stock_count FROM stock_alert_state WHERE id = 1").fetchone()
+        conn.close()
+        return row[0] if row else 0
+    
+    def add_low_stock_listener(self, callback):
+        """
+        Call callback(count) whenever the number of low-stock products changes
+        
+        Listeners run on the thread that changed the stock, right after its commit.
+        """
+        self._low_stock_listeners.append(callback)
+    
+    def _notify_low_stock(self):
+        """Tell listeners about a changed low-stock count"""
+        if not self._low_stock_listeners:
+            return
+        count = self.count_low_stock_products()
+        if count == self._low_stock_count:
+            return
+        self._low_stock_count = count
+        for callback in self._low_stock_listeners:
+            try:
+                callback(count)
+            except Exception as e:
+                print(f"Error in low stock listener: {e}")
+    
+    def get_reorder_suggestions(self, only_reorder: bool = True) -> List[Dict]:
+        """
+        Reorder suggestions from the last forecast run (see logic/forecast.py)
+        
+        Args:
+            only_reorder: Only products with a suggested order quantity
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT r.*, p.name
+            FROM reorder_suggestions r
+            JOIN products p ON p.id = r.product_id
+            {"WHERE r.reorder_quantity > 0" if only_reorder else ""}
+            ORDER BY r.days_of_cover ASC, p.name ASC
+        """)
+        suggestions = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return suggestions
+    
     # Invoice Methods
     def create_invoice(self, invoice: Dict) -> int:
         """Create new invoice"""
@@ -279,14 +800,17 @@ class DatabaseManager:
                 """, (invoice_id, item.get('product_id'), item['name'],
                       item['quantity'], item['price'], item.get('discount_percent', 0),
                       item.get('gst_percent', 18.0), item['total']))
-                
-                # Update stock
-                if item.get('product_id'):
-                    self.update_stock(item['product_id'], -int(item['quantity']), 'sale', 
-                                    invoice_id, f"Invoice {invoice['invoice_number']}")
+            
+            # Update stock in the same transaction as the invoice
+            self._apply_stock_movements(cursor, [
+                (item['product_id'], 'sale', -int(item['quantity']), invoice_id,
+                 f"Invoice {invoice['invoice_number']}")
+                for item in invoice['items'] if item.get('product_id')
+            ])
             
             conn.commit()
             conn.close()
+            self._notify_low_stock()
             return invoice_id
             
         except Exception as e:
@@ -324,6 +848,78 @@ class DatabaseManager:
         conn.close()
         return invoices
     
+    def get_invoices_page(self, after: Optional[Tuple[str, int]] = None, limit: int = 200,
+                          customer_id: Optional[int] = None) -> List[Dict]:
+        """
+        Get one page of invoices, newest first
+        
+        Args:
+            after: (created_at, id) of the last row of the previous page
+            limit: Page size
+            customer_id: Only invoices of this customer
+        """
+        query = """
+            SELECT i.id, i.invoice_number, i.customer_id, i.total_amount, i.payment_status,
+                   i.created_at, c.name as customer_name, c.phone as customer_phone
+            FROM invoices i
+            LEFT JOIN customers c ON i.customer_id = c.id
+        """
+        params = []
+        
+        conditions = []
+        if customer_id:
+            conditions.append("i.customer_id = ?")
+            params.append(customer_id)
+        if after:
+            conditions.append("(i.created_at, i.id) < (?, ?)")
+            params.extend(after)
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY i.created_at DESC, i.id DESC LIMIT ?"
+        params.append(limit)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        invoices = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return invoices
+    
+    def iter_invoices(self, customer_id: Optional[int] = None, start_date: str = None,
+                      end_date: str = None) -> Iterator[Dict]:
+        """Stream invoices oldest first without loading the whole result set"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM invoices"
+            params = []
+            
+            conditions = []
+            if customer_id:
+                conditions.append("customer_id = ?")
+                params.append(customer_id)
+            if start_date:
+                conditions.append("created_at >= ?")
+                params.append(start_date)
+            if end_date:
+                conditions.append("created_at < DATE(?, '+1 day')")
+                params.append(end_date)
+            
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            
+            query += " ORDER BY created_at, id"
+            
+            cursor.execute(query, params)
+            for row in cursor:
+                invoice = dict(row)
+                invoice['items'] = json.loads(invoice['items_json']) if invoice.get('items_json') else []
+                yield invoice
+        finally:
+            conn.close()
+    
     def get_invoice(self, invoice_id: int) -> Optional[Dict]:
         """Get invoice by ID"""
         conn = self.get_connection()
@@ -445,6 +1041,12 @@ class DatabaseManager:
         else:
             next_num = 1
         
+        # Never reuse a number taken by imported invoices
+        cursor.execute("SELECT last_number FROM invoice_sequence WHERE prefix = ?", (prefix,))
+        result = cursor.fetchone()
+        if result:
+            next_num = max(next_num, result['last_number'] + 1)
+        
         conn.close()
         return f"{prefix}{next_num:06d}"
     
@@ -14,6 +14,8 @@ CREATE TABLE IF NOT EXISTS shop_settings (
     default_gst REAL DEFAULT 18.0,
     default_template TEXT DEFAULT 'template1',
     upi_id TEXT,
+    artifact_retention_days INTEGER DEFAULT 30, -- generated PDFs/QR codes older than this are removed
+    artifact_quota_mb INTEGER DEFAULT 500, -- oldest generated files are removed beyond this size
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -44,6 +46,7 @@ CREATE TABLE IF NOT EXISTS products (
     min_stock_alert INTEGER DEFAULT 5,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    hsn_code TEXT,
     UNIQUE(name)
 );
 
@@ -97,6 +100,91 @@ CREATE TABLE IF NOT EXISTS stock_transactions (
     FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
 );
 
+-- Stock Snapshots Table (stock level per product as of a time, derived from stock_transactions)
+CREATE TABLE IF NOT EXISTS stock_snapshots (
+    product_id INTEGER NOT NULL,
+    as_of TIMESTAMP NOT NULL, -- includes transactions with created_at <= as_of
+    quantity REAL NOT NULL,
+    PRIMARY KEY (product_id, as_of),
+    FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
+);
+
+-- A back-dated, edited or removed stock transaction invalidates later snapshots
+CREATE TRIGGER IF NOT EXISTS trg_stock_snapshots_insert AFTER INSERT ON stock_transactions
+BEGIN
+    DELETE FROM stock_snapshots WHERE product_id = NEW.product_id AND as_of >= NEW.created_at;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stock_snapshots_update AFTER UPDATE ON stock_transactions
+BEGIN
+    DELETE FROM stock_snapshots WHERE product_id IN (OLD.product_id, NEW.product_id)
+        AND as_of >= MIN(OLD.created_at, NEW.created_at);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stock_snapshots_delete AFTER DELETE ON stock_transactions
+BEGIN
+    DELETE FROM stock_snapshots WHERE product_id = OLD.product_id AND as_of >= OLD.created_at;
+END;
+
+-- Low Stock Counter (products with stock_quantity <= min_stock_alert, kept by triggers)
+CREATE TABLE IF NOT EXISTS stock_alert_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    low_stock_count INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO stock_alert_state (id, low_stock_count)
+SELECT 1, COUNT(*) FROM products WHERE stock_quantity <= min_stock_alert;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_low_stock_insert AFTER INSERT ON products
+WHEN NEW.stock_quantity <= NEW.min_stock_alert
+BEGIN
+    UPDATE stock_alert_state SET low_stock_count = low_stock_count + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_products_low_stock_update AFTER UPDATE OF stock_quantity, min_stock_alert ON products
+WHEN IFNULL(NEW.stock_quantity <= NEW.min_stock_alert, 0) != IFNULL(OLD.stock_quantity <= OLD.min_stock_alert, 0)
+BEGIN
+    UPDATE stock_alert_state
+    SET low_stock_count = low_stock_count + IFNULL(NEW.stock_quantity <= NEW.min_stock_alert, 0)
+                                          - IFNULL(OLD.stock_quantity <= OLD.min_stock_alert, 0)
+    WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_products_low_stock_delete AFTER DELETE ON products
+WHEN OLD.stock_quantity <= OLD.min_stock_alert
+BEGIN
+    UPDATE stock_alert_state SET low_stock_count = low_stock_count - 1 WHERE id = 1;
+END;
+
+-- Daily Sales Table (units sold per product per day, aggregated from invoice_items by logic/forecast.py)
+CREATE TABLE IF NOT EXISTS sales_daily (
+    product_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    quantity REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, day)
+);
+
+-- Reorder Suggestions Table (rewritten by each forecast run)
+CREATE TABLE IF NOT EXISTS reorder_suggestions (
+    product_id INTEGER PRIMARY KEY,
+    daily_velocity REAL NOT NULL, -- exponentially smoothed units per day
+    moving_average REAL NOT NULL, -- units per day over the last 28 days
+    stock_quantity REAL NOT NULL,
+    days_of_cover REAL,
+    stockout_date DATE,
+    reorder_quantity INTEGER NOT NULL DEFAULT 0,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
+);
+
+-- Forecast State (last invoice folded into sales_daily)
+CREATE TABLE IF NOT EXISTS forecast_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_invoice_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP
+);
+
+-- Invoice Number Sequence (highest number per prefix used outside the app, e.g. imported history)
+CREATE TABLE IF NOT EXISTS invoice_sequence (
+    prefix TEXT PRIMARY KEY,
+    last_number INTEGER NOT NULL
+);
+
 -- Users Table (for multi-user support)
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -109,10 +197,148 @@ CREATE TABLE IF NOT EXISTS users (
     last_login TIMESTAMP
 );
 
+-- Change Log Table (append-only, read by the standby replicator)
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    op TEXT NOT NULL, -- 'I', 'U', 'D'
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Changes are only logged once a standby has been set up (Replicator.init_standby)
+CREATE TABLE IF NOT EXISTS change_log_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    enabled INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO change_log_state (id, enabled) VALUES (1, 0);
+
+-- Change log triggers
+CREATE TRIGGER IF NOT EXISTS trg_customers_log_insert AFTER INSERT ON customers
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('customers', NEW.id, 'I');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_customers_log_update AFTER UPDATE ON customers
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('customers', NEW.id, 'U');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_customers_log_delete AFTER DELETE ON customers
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('customers', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_log_insert AFTER INSERT ON products
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('products', NEW.id, 'I');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_products_log_update AFTER UPDATE ON products
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('products', NEW.id, 'U');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_products_log_delete AFTER DELETE ON products
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('products', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_invoices_log_insert AFTER INSERT ON invoices
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoices', NEW.id, 'I');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoices_log_update AFTER UPDATE ON invoices
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoices', NEW.id, 'U');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoices_log_delete AFTER DELETE ON invoices
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoices', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_invoice_items_log_insert AFTER INSERT ON invoice_items
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoice_items', NEW.id, 'I');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoice_items_log_update AFTER UPDATE ON invoice_items
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoice_items', NEW.id, 'U');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoice_items_log_delete AFTER DELETE ON invoice_items
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoice_items', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stock_transactions_log_insert AFTER INSERT ON stock_transactions
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('stock_transactions', NEW.id, 'I');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stock_transactions_log_update AFTER UPDATE ON stock_transactions
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('stock_transactions', NEW.id, 'U');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stock_transactions_log_delete AFTER DELETE ON stock_transactions
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('stock_transactions', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_shop_settings_log_insert AFTER INSERT ON shop_settings
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('shop_settings', NEW.id, 'I');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_shop_settings_log_update AFTER UPDATE ON shop_settings
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('shop_settings', NEW.id, 'U');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_shop_settings_log_delete AFTER DELETE ON shop_settings
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('shop_settings', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_invoice_sequence_log_insert AFTER INSERT ON invoice_sequence
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoice_sequence', NEW.rowid, 'I');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoice_sequence_log_update AFTER UPDATE ON invoice_sequence
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoice_sequence', NEW.rowid, 'U');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoice_sequence_log_delete AFTER DELETE ON invoice_sequence
+    WHEN (SELECT enabled FROM change_log_state WHERE id = 1)
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('invoice_sequence', OLD.rowid, 'D');
+END;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_customers_phone ON customers(phone);
+CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name);
+-- NOCASE indexes serve case-insensitive prefix searches (LIKE 'abc%')
+CREATE INDEX IF NOT EXISTS idx_customers_name_nocase ON customers(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_customers_email_nocase ON customers(email COLLATE NOCASE);
 CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode);
+CREATE INDEX IF NOT EXISTS idx_products_name_nocase ON products(name COLLATE NOCASE);
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+CREATE INDEX IF NOT EXISTS idx_products_updated ON products(updated_at);
+-- Only low-stock products are indexed, so listing them never scans the table
+CREATE INDEX IF NOT EXISTS idx_products_low_stock ON products(stock_quantity, id)
+    WHERE stock_quantity <= min_stock_alert;
 CREATE INDEX IF NOT EXISTS idx_invoices_number ON invoices(invoice_number);
 CREATE INDEX IF NOT EXISTS idx_invoices_customer ON invoices(customer_id);
 CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices(created_at);
@@ -120,6 +346,9 @@ CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items(invoice_id
 CREATE INDEX IF NOT EXISTS idx_invoice_items_product ON invoice_items(product_id);
 CREATE INDEX IF NOT EXISTS idx_stock_product ON stock_transactions(product_id);
 CREATE INDEX IF NOT EXISTS idx_stock_date ON stock_transactions(created_at);
+CREATE INDEX IF NOT EXISTS idx_stock_product_date ON stock_transactions(product_id, created_at, quantity);
+CREATE INDEX IF NOT EXISTS idx_stock_snapshots_as_of ON stock_snapshots(as_of);
+CREATE INDEX IF NOT EXISTS idx_sales_daily_day ON sales_daily(day, product_id, quantity);
 
 -- Insert default shop settings
 INSERT OR IGNORE INTO shop_settings (
@@ -56,10 +56,16 @@ class DatabaseManager:
                     category TEXT,
                     barcode TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    min_stock_alert INTEGER DEFAULT 10
                 )
             ''')
             
+            # Databases created before the per-product alert level used a fixed 10
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(products)')]
+            if 'min_stock_alert' not in columns:
+                cursor.execute('ALTER TABLE products ADD COLUMN min_stock_alert INTEGER DEFAULT 10')
+            
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS invoices (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -79,6 +85,52 @@ class DatabaseManager:
                 )
             ''')
             
+            # Indexes for prefix search and name-ordered paging
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_name_nocase ON customers(name COLLATE NOCASE)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_email_nocase ON customers(email COLLATE NOCASE)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_phone ON customers(phone)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_name_nocase ON products(name COLLATE NOCASE)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode)')
+            
+            # Low-stock count kept by triggers, and an index holding only low-stock products
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS stock_alert_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    low_stock_count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('''
+                INSERT OR IGNORE INTO stock_alert_state (id, low_stock_count)
+                SELECT 1, COUNT(*) FROM products WHERE stock_quantity <= min_stock_alert
+            ''')
+            cursor.executescript('''
+                CREATE TRIGGER IF NOT EXISTS trg_products_low_stock_insert AFTER INSERT ON products
+                WHEN NEW.stock_quantity <= NEW.min_stock_alert
+                BEGIN
+                    UPDATE stock_alert_state SET low_stock_count = low_stock_count + 1 WHERE id = 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_products_low_stock_update
+                AFTER UPDATE OF stock_quantity, min_stock_alert ON products
+                WHEN IFNULL(NEW.stock_quantity <= NEW.min_stock_alert, 0) != IFNULL(OLD.stock_quantity <= OLD.min_stock_alert, 0)
+                BEGIN
+                    UPDATE stock_alert_state
+                    SET low_stock_count = low_stock_count + IFNULL(NEW.stock_quantity <= NEW.min_stock_alert, 0)
+                                                          - IFNULL(OLD.stock_quantity <= OLD.min_stock_alert, 0)
+                    WHERE id = 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_products_low_stock_delete AFTER DELETE ON products
+                WHEN OLD.stock_quantity <= OLD.min_stock_alert
+                BEGIN
+                    UPDATE stock_alert_state SET low_stock_count = low_stock_count - 1 WHERE id = 1;
+                END;
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_products_low_stock ON products(stock_quantity, id)
+                WHERE stock_quantity <= min_stock_alert
+            ''')
+            
             conn.commit()
             conn.close()
             
@@ -201,6 +253,70 @@ class DatabaseManager:
             print(f"Error getting customers: {e}")
             return []
     
+    @staticmethod
+    def _prefix_pattern(search):
+        """LIKE pattern matching values that start with `search`"""
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return escaped + "%"
+    
+    def _customer_filter(self, search, prefix=False):
+        """WHERE conditions and params for a customer search"""
+        if not search:
+            return [], []
+        if prefix:
+            # Served by the NOCASE name/email indexes and a range on the phone index
+            pattern = self._prefix_pattern(search)
+            return (["(name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\' OR (phone >= ? AND phone < ?))"],
+                    [pattern, pattern, search, search + "\uffff"])
+        return ["(name LIKE ? OR phone LIKE ? OR email LIKE ?)"], [f'%{search}%'] * 3
+    
+    def get_customers_page(self, search='', after=None, limit=200, prefix=False):
+        """
+        Get one page of customers ordered by name
+        
+        Args:
+            search: Search text (name, phone or email)
+            after: (name, id) of the last row of the previous page
+            limit: Page size
+            prefix: Match values starting with `search` (indexed) instead of containing it
+        """
+        try:
+            conditions, params = self._customer_filter(search, prefix)
+            if after:
+                conditions.append('(name, id) > (?, ?)')
+                params.extend(after)
+            
+            query = 'SELECT * FROM customers'
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            query += ' ORDER BY name, id LIMIT ?'
+            params.append(limit)
+            
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            customers = [dict(row) for row in conn.execute(query, params)]
+            conn.close()
+            return customers
+        except Exception as e:
+            print(f"Error getting customers: {e}")
+            return []
+    
+    def count_customers(self, search='', prefix=False):
+        """Count customers matching a search"""
+        try:
+            conditions, params = self._customer_filter(search, prefix)
+            query = 'SELECT COUNT(*) FROM customers'
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            
+            conn = sqlite3.connect(self.db_path)
+            count = conn.execute(query, params).fetchone()[0]
+            conn.close()
+            return count
+        except Exception as e:
+            print(f"Error counting customers: {e}")
+            return 0
+    
     def get_customer(self, customer_id):
         """Get a specific customer"""
         try:
@@ -237,8 +353,9 @@ class DatabaseManager:
             cursor = conn.cursor()
             
             cursor.execute('''
-                INSERT INTO products (name, description, price, gst_percent, stock_quantity, category, barcode)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO products (name, description, price, gst_percent, stock_quantity, category, barcode,
+                                      min_stock_alert)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 product_data['name'],
                 product_data.get('description', ''),
@@ -246,7 +363,8 @@ class DatabaseManager:
                 product_data.get('gst_percent', 18),
                 product_data.get('stock_quantity', 0),
                 product_data.get('category', ''),
-                product_data.get('barcode', '')
+                product_data.get('barcode', ''),
+                product_data.get('min_stock_alert', 10)
             ))
             
             product_id = cursor.lastrowid
@@ -294,6 +412,68 @@ class DatabaseManager:
             print(f"Error getting products: {e}")
             return []
     
+    def _product_filter(self, search, category='', prefix=False):
+        """WHERE conditions and params for a product search (see _customer_filter)"""
+        conditions, params = [], []
+        if search and prefix:
+            conditions.append("(name LIKE ? ESCAPE '\\' OR (barcode >= ? AND barcode < ?))")
+            params.extend([self._prefix_pattern(search), search, search + "\uffff"])
+        elif search:
+            conditions.append('(name LIKE ? OR category LIKE ? OR barcode LIKE ?)')
+            params.extend([f'%{search}%'] * 3)
+        if category:
+            conditions.append('category = ?')
+            params.append(category)
+        return conditions, params
+    
+    def get_products_page(self, search='', category='', after=None, limit=200, prefix=False):
+        """
+        Get one page of products ordered by name
+        
+        Args:
+            search: Search text (name or barcode)
+            category: Category filter
+            after: (name, id) of the last row of the previous page
+            limit: Page size
+            prefix: Match values starting with `search` (indexed) instead of containing it
+        """
+        try:
+            conditions, params = self._product_filter(search, category, prefix)
+            if after:
+                conditions.append('(name, id) > (?, ?)')
+                params.extend(after)
+            
+            query = 'SELECT * FROM products'
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            query += ' ORDER BY name, id LIMIT ?'
+            params.append(limit)
+            
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            products = [dict(row) for row in conn.execute(query, params)]
+            conn.close()
+            return products
+        except Exception as e:
+            print(f"Error getting products: {e}")
+            return []
+    
+    def count_products(self, search='', category='', prefix=False):
+        """Count products matching a search"""
+        try:
+            conditions, params = self._product_filter(search, category, prefix)
+            query = 'SELECT COUNT(*) FROM products'
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            
+            conn = sqlite3.connect(self.db_path)
+            count = conn.execute(query, params).fetchone()[0]
+            conn.close()
+            return count
+        except Exception as e:
+            print(f"Error counting products: {e}")
+            return 0
+    
     def get_product(self, product_id):
         """Get a specific product"""
         try:
@@ -492,10 +672,11 @@ class DatabaseManager:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # Served from the idx_products_low_stock partial index
             cursor.execute('''
                 SELECT * FROM products 
-                WHERE stock_quantity <= 10 
-                ORDER BY stock_quantity ASC
+                WHERE stock_quantity <= min_stock_alert 
+                ORDER BY stock_quantity ASC, id ASC
             ''')
             
             products = []
@@ -510,7 +691,8 @@ class DatabaseManager:
                     'category': row[6],
                     'barcode': row[7],
                     'created_at': row[8],
-                    'updated_at': row[9]
+                    'updated_at': row[9],
+                    'min_stock_alert': row[10]
                 })
             
             conn.close()
@@ -518,3 +700,14 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error getting low stock products: {e}")
             return []
+    
+    def count_low_stock_products(self):
+        """Count products with low stock (kept up to date by triggers)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute('SELECT low_stock_count FROM stock_alert_state WHERE id = 1').fetchone()
+            conn.close()
+            return row[0] if row else 0
+        except Exception as e:
+            print(f"Error counting low stock products: {e}")
+            return 0
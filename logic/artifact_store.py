@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Defaults for the shop's artifact_retention_days / artifact_quota_mb settings
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_QUOTA_MB = 500
+
+class ArtifactStore:
+    """Date-sharded store for generated QR codes and PDFs with a SQLite index"""
+    
+    _default = None
+    _default_lock = threading.Lock()
+    
+    def __init__(self, base_dir: str = "assets/artifacts"):
+        self.base_dir = base_dir
+        self.index_path = os.path.join(base_dir, "index.db")
+        os.makedirs(base_dir, exist_ok=True)
+        self.init_index()
+    
+    @classmethod
+    def default(cls) -> 'ArtifactStore':
+        """Shared store used when generators are not given one explicitly"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+    
+    def init_index(self):
+        """Create index table if needed"""
+        conn = sqlite3.connect(self.index_path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                invoice_ref TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_artifacts_created ON artifacts(created_at);
+            CREATE INDEX IF NOT EXISTS idx_artifacts_invoice ON artifacts(invoice_ref);
+        """)
+        conn.commit()
+        conn.close()
+    
+    def get_connection(self):
+        """Get index connection"""
+        conn = sqlite3.connect(self.index_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def new_path(self, kind: str, suffix: str, invoice_ref: Optional[str] = None) -> str:
+        """
+        Allocate a unique path in today's shard
+        
+        Args:
+            kind: Artifact kind, used as file name prefix (e.g. 'qr_payment', 'invoice')
+            suffix: File extension including the dot
+            invoice_ref: Invoice number the artifact belongs to
+        
+        Returns:
+            Path to write the artifact to (call register() once written)
+        """
+        now = datetime.now()
+        shard = os.path.join(self.base_dir, now.strftime("%Y"), now.strftime("%m"), now.strftime("%d"))
+        os.makedirs(shard, exist_ok=True)
+        
+        name_parts = [kind]
+        if invoice_ref:
+            name_parts.append("".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in str(invoice_ref)))
+        name_parts.append(now.strftime("%H%M%S"))
+        name_parts.append(uuid.uuid4().hex[:8])
+        return os.path.join(shard, "_".join(name_parts) + suffix)
+    
+    def register(self, path: str, kind: str, invoice_ref: Optional[str] = None) -> str:
+        """Record a written artifact in the index"""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT OR REPLACE INTO artifacts (path, kind, size, invoice_ref, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (path, kind, os.path.getsize(path), invoice_ref, time.time()))
+        conn.commit()
+        conn.close()
+        return path
+    
+    def save_bytes(self, data: bytes, kind: str, suffix: str,
+                   invoice_ref: Optional[str] = None) -> str:
+        """Write bytes as a new artifact and index it"""
+        path = self.new_path(kind, suffix, invoice_ref)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return self.register(path, kind, invoice_ref)
+    
+    def find_by_invoice(self, invoice_ref: str, kind: Optional[str] = None) -> List[Dict]:
+        """Get artifacts generated for an invoice, newest first"""
+        conn = self.get_connection()
+        query = "SELECT * FROM artifacts WHERE invoice_ref = ?"
+        params = [invoice_ref]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY created_at DESC"
+        
+        artifacts = [dict(row) for row in conn.execute(query, params)]
+        conn.close()
+        return artifacts
+    
+    def total_size(self) -> int:
+        """Total bytes of indexed artifacts"""
+        conn = self.get_connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        conn.close()
+        return total
+    
+    def cleanup(self, days_old: int = 30) -> int:
+        """
+        Remove artifacts older than `days_old` days
+        
+        Only expired rows are visited (range scan on the created_at index),
+        so the cost does not grow with the number of retained files.
+        
+        Returns:
+            Number of artifacts removed
+        """
+        cutoff = time.time() - days_old * 24 * 60 * 60
+        conn = self.get_connection()
+        rows = conn.execute("SELECT id, path FROM artifacts WHERE created_at < ?", (cutoff,)).fetchall()
+        removed = self._remove(conn, rows)
+        conn.close()
+        return removed
+    
+    def enforce_quota(self, max_bytes: int) -> int:
+        """
+        Evict oldest artifacts until the store fits in `max_bytes`
+        
+        Returns:
+            Number of artifacts removed
+        """
+        conn = self.get_connection()
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0] - max_bytes
+        
+        victims = []
+        if excess > 0:
+            for row in conn.execute("SELECT id, path, size FROM artifacts ORDER BY created_at"):
+                victims.append(row)
+                excess -= row['size']
+                if excess <= 0:
+                    break
+        
+        removed = self._remove(conn, victims)
+        conn.close()
+        return removed
+    
+    def expire(self, days_old: int, max_bytes: int) -> int:
+        """Apply the retention period, then the size quota; returns artifacts removed"""
+        return self.cleanup(days_old) + self.enforce_quota(max_bytes)
+    
+    def _remove(self, conn, rows) -> int:
+        """Delete artifact files and their index rows, pruning emptied shards"""
+        shards = set()
+        removed = 0
+        for row in rows:
+            try:
+                os.remove(row['path'])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing {row['path']}: {e}")
+                continue
+            shards.add(os.path.dirname(row['path']))
+            conn.execute("DELETE FROM artifacts WHERE id = ?", (row['id'],))
+            removed += 1
+        conn.commit()
+        
+        base = os.path.abspath(self.base_dir)
+        for shard in shards:
+            # Walk up day/month/year directories while they are empty
+            directory = os.path.abspath(shard)
+            while directory != base and directory.startswith(base):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+        
+        return removed
+
+def expire_artifacts(settings: Dict) -> int:
+    """
+    Expire the shared store's artifacts per the shop settings
+    
+    Args:
+        settings: Shop settings with artifact_retention_days and artifact_quota_mb
+            (defaults used when missing)
+    
+    Returns:
+        Number of artifacts removed
+    """
+    days_old = int(float(settings.get('artifact_retention_days') or DEFAULT_RETENTION_DAYS))
+    quota_mb = int(float(settings.get('artifact_quota_mb') or DEFAULT_QUOTA_MB))
+    return ArtifactStore.default().expire(days_old, quota_mb * 1024 * 1024)
@@ -0,0 +1,104 @@
+import os
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+class LogoCache:
+    """In-memory cache of decoded, pre-resized shop logos"""
+    
+    # Named variants: (width, height) in pixels, keep aspect ratio
+    VARIANTS = {
+        'header': ((600, 300), False),   # 2 x 1 inch invoice header at 300 dpi
+        'receipt': ((384, 192), True),   # 48 mm printable width at 203 dpi
+    }
+    
+    def __init__(self, max_logos: int = 8):
+        self.max_logos = max_logos
+        # abspath -> ((mtime_ns, size), variant dict), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _variants_for(self, logo_path: str) -> Optional[Dict]:
+        """Variant dict for the current version of a logo file (replacing a stale version)"""
+        try:
+            stat = os.stat(logo_path)
+        except OSError:
+            return None
+        
+        path = os.path.abspath(logo_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(path)
+                return cached[1]
+            
+            variants = {}
+            self._entries[path] = (version, variants)
+            self._entries.move_to_end(path)
+            if len(self._entries) > self.max_logos:
+                self._entries.popitem(last=False)
+            return variants
+    
+    def _get_entry(self, logo_path: str, size: Tuple[int, int], keep_aspect: bool) -> Optional[list]:
+        """[image, png_bytes] cache slot for a variant, decoding the logo on first use"""
+        variants = self._variants_for(logo_path)
+        if variants is None:
+            return None
+        
+        variant_key = (tuple(size), keep_aspect)
+        entry = variants.get(variant_key)
+        if entry is None:
+            from PIL import Image
+            
+            with Image.open(logo_path) as source:
+                source.load()
+                if keep_aspect:
+                    image = source.copy()
+                    image.thumbnail(size, Image.Resampling.LANCZOS)
+                else:
+                    image = source.resize(tuple(size), Image.Resampling.LANCZOS)
+            entry = [image, None]
+            variants[variant_key] = entry
+        return entry
+    
+    def get_image(self, logo_path: str, size: Tuple[int, int], keep_aspect: bool = False):
+        """
+        Get logo resized to `size` as a PIL image
+        
+        Args:
+            logo_path: Path to logo image
+            size: Target (width, height) in pixels
+            keep_aspect: Fit within `size` instead of stretching to it
+        
+        Returns:
+            Shared PIL image (treat as read-only), or None if the logo can't be loaded
+        """
+        entry = self._get_entry(logo_path, size, keep_aspect)
+        return entry[0] if entry else None
+    
+    def get_png(self, logo_path: str, size: Tuple[int, int], keep_aspect: bool = False) -> Optional[bytes]:
+        """Get logo resized to `size` as PNG bytes (encoded once per variant)"""
+        entry = self._get_entry(logo_path, size, keep_aspect)
+        if entry is None:
+            return None
+        
+        if entry[1] is None:
+            buffer = BytesIO()
+            entry[0].save(buffer, format="PNG")
+            entry[1] = buffer.getvalue()
+        return entry[1]
+    
+    def get_variant_png(self, logo_path: str, variant: str) -> Optional[bytes]:
+        """Get a named variant ('header' or 'receipt') as PNG bytes"""
+        size, keep_aspect = self.VARIANTS[variant]
+        return self.get_png(logo_path, size, keep_aspect)
+    
+    def clear(self):
+        """Drop all cached logos"""
+        with self._lock:
+            self._entries.clear()
+
+# Shared cache used by the PDF, receipt and QR generators
+logo_cache = LogoCache()
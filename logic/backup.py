@@ -0,0 +1,151 @@
+import gzip
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+class BackupManager:
+    """
+    Online database backups using the SQLite backup API
+    
+    The live database is copied a few pages at a time, releasing its lock
+    between steps, so invoices can still be saved while a backup runs and
+    the copy is always a consistent snapshot (unlike copying the file).
+    """
+    
+    def __init__(self, db_path: str, backup_dir: str = "backups",
+                 pages_per_step: int = 1024, keep_last: int = 10,
+                 keep_days: Optional[int] = None):
+        """
+        Args:
+            db_path: Database to back up
+            backup_dir: Directory for managed backups (see apply_retention)
+            pages_per_step: Database pages copied per step
+            keep_last: Number of newest managed backups kept by apply_retention
+            keep_days: Managed backups older than this are removed too (None keeps them)
+        """
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.pages_per_step = pages_per_step
+        self.keep_last = keep_last
+        self.keep_days = keep_days
+    
+    def new_backup_path(self, compress: bool = False) -> str:
+        """Timestamped path in the backup directory"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        return os.path.join(self.backup_dir, name + (".gz" if compress else ""))
+    
+    def create_backup(self, backup_path: Optional[str] = None, compress: Optional[bool] = None,
+                      progress: Optional[Callable[[int], None]] = None) -> str:
+        """
+        Back up the database
+        
+        Args:
+            backup_path: Destination (default: new file in the backup directory)
+            compress: Gzip the backup (default: when backup_path ends in .gz)
+            progress: Called with a percentage after each step; raising from
+                it aborts the backup
+        
+        Returns:
+            Path of the finished backup
+        """
+        if compress is None:
+            compress = bool(backup_path) and backup_path.endswith(".gz")
+        if not backup_path:
+            backup_path = self.new_backup_path(compress)
+        
+        # Written under a temporary name and renamed once complete, so an
+        # interrupted backup never looks like a valid one
+        snapshot_path = backup_path + ".part"
+        compressed_path = backup_path + ".gz.part"
+        # With compression the snapshot is the first half of the progress range
+        scale = 2 if compress else 1
+        try:
+            self._snapshot(snapshot_path, progress and (lambda percent: progress(percent // scale)))
+            if compress:
+                self._compress(snapshot_path, compressed_path,
+                               progress and (lambda percent: progress(50 + percent // 2)))
+                os.remove(snapshot_path)
+                os.replace(compressed_path, backup_path)
+            else:
+                os.replace(snapshot_path, backup_path)
+        except BaseException:
+            for path in (snapshot_path, compressed_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        
+        return backup_path
+    
+    def _snapshot(self, snapshot_path: str, progress: Optional[Callable[[int], None]]):
+        """Copy the live database to snapshot_path in page-sized steps"""
+        def on_step(status, remaining, total):
+            if progress:
+                progress((total - remaining) * 100 // max(total, 1))
+        
+        source = sqlite3.connect(self.db_path, isolation_level=None)
+        target = sqlite3.connect(snapshot_path)
+        try:
+            # A write from another connection restarts a stepped backup. In WAL
+            # mode an open read transaction pins the snapshot instead, without
+            # blocking writers; in rollback-journal mode it would lock them out.
+            if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal':
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=self.pages_per_step, progress=on_step)
+        finally:
+            target.close()
+            source.close()
+    
+    @staticmethod
+    def _compress(source_path: str, target_path: str, progress: Optional[Callable[[int], None]],
+                  chunk_size: int = 1024 * 1024):
+        """Gzip a file in chunks"""
+        total = max(os.path.getsize(source_path), 1)
+        done = 0
+        with open(source_path, 'rb') as src, gzip.open(target_path, 'wb', compresslevel=6) as dst:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done * 100 // total)
+    
+    def list_backups(self) -> List[Dict]:
+        """Managed backups, newest first"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        
+        backups = []
+        with os.scandir(self.backup_dir) as entries:
+            for entry in entries:
+                if (entry.is_file() and entry.name.startswith("backup_")
+                        and entry.name.endswith((".db", ".db.gz"))):
+                    stat = entry.stat()
+                    backups.append({'path': entry.path, 'name': entry.name,
+                                    'size': stat.st_size, 'modified': stat.st_mtime})
+        backups.sort(key=lambda backup: backup['modified'], reverse=True)
+        return backups
+    
+    def apply_retention(self) -> int:
+        """
+        Remove managed backups beyond keep_last, and those older than keep_days
+        
+        Returns:
+            Number of backups removed
+        """
+        cutoff = time.time() - self.keep_days * 24 * 60 * 60 if self.keep_days else None
+        removed = 0
+        for position, backup in enumerate(self.list_backups()):
+            if position < self.keep_last and (cutoff is None or backup['modified'] >= cutoff):
+                continue
+            try:
+                os.remove(backup['path'])
+                removed += 1
+            except OSError as e:
+                print(f"Error removing {backup['path']}: {e}")
+        return removed
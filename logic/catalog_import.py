@@ -0,0 +1,379 @@
+import csv
+import re
+import sqlite3
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .gst_calculator import GSTCalculator
+
+# Accepted header spellings for each field
+CUSTOMER_COLUMNS = {
+    'name': ('name', 'customer', 'customer name', 'customer_name'),
+    'phone': ('phone', 'mobile', 'phone number', 'contact'),
+    'email': ('email', 'e-mail'),
+    'address': ('address',),
+    'gstin': ('gstin', 'gst number', 'gst no'),
+}
+PRODUCT_COLUMNS = {
+    'name': ('name', 'product', 'product name', 'product_name', 'item'),
+    'description': ('description',),
+    'price': ('price', 'rate', 'mrp', 'unit price', 'unit_price'),
+    'gst_percent': ('gst_percent', 'gst', 'gst %', 'gst rate'),
+    'barcode': ('barcode', 'sku'),
+    'category': ('category',),
+    'stock_quantity': ('stock_quantity', 'stock', 'quantity', 'qty'),
+    'min_stock_alert': ('min_stock_alert', 'min stock', 'reorder level'),
+    'hsn_code': ('hsn_code', 'hsn', 'hsn code'),
+}
+
+PHONE_PATTERN = re.compile(r'\+?\d{7,15}')
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+GSTIN_PATTERN = re.compile(r'\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]')
+
+def iter_table(path: str) -> Iterator[Tuple[int, List[str]]]:
+    """
+    (line number, cells) for each row of a CSV or XLSX file, header included
+    
+    XLSX cells come from the first sheet; whole numbers are written without
+    a decimal point so phone numbers and barcodes survive Excel.
+    """
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for line, row in enumerate(workbook.worksheets[0].iter_rows(values_only=True), 1):
+                yield line, ["" if cell is None
+                             else str(int(cell)) if isinstance(cell, float) and cell.is_integer()
+                             else str(cell) for cell in row]
+        finally:
+            workbook.close()
+        return
+    
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+def count_table_rows(path: str) -> int:
+    """Data rows in a CSV or XLSX file (approximate; used to scale progress)"""
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return max((workbook.worksheets[0].max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    
+    with open(path, 'rb') as f:
+        return max(sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1, 0)
+
+def map_columns(header: List[str], aliases: Dict[str, Tuple[str, ...]]) -> Dict[str, int]:
+    """Position of each field's first matching header (case and spacing ignored)"""
+    normalized = [column.strip().lower() for column in header]
+    columns = {}
+    for field, names in aliases.items():
+        for name in names:
+            if name in normalized:
+                columns[field] = normalized.index(name)
+                break
+    return columns
+
+def parse_number(value: Optional[str], field: str, integer: bool = False):
+    """Non-negative number from a cell ("1,250", "18%"), or None for an empty one"""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            number = float(value.replace(',', '').rstrip('%').strip())
+        except ValueError:
+            raise ValueError(f"Invalid {field}: {value!r}")
+    if number < 0:
+        raise ValueError(f"{field.capitalize()} is negative: {value!r}")
+    if integer or number.is_integer():
+        if not number.is_integer():
+            raise ValueError(f"{field.capitalize()} must be a whole number: {value!r}")
+        return int(number)
+    return number
+
+class CatalogImporter:
+    """
+    Bulk import of customers and products from CSV or XLSX
+    
+    Rows are validated as they are read and written in chunks: each chunk is
+    loaded into a temp table with executemany and applied with a few
+    set-based statements (an ON CONFLICT upsert for customers), so the
+    per-row triggers (change log, low-stock count) run inside one statement
+    rather than one statement per row. Customers are matched
+    on phone and products on barcode, then name, so importing the same file
+    again updates rather than duplicates. Empty cells leave the existing
+    value alone. Invalid rows are skipped and reported with their line
+    number; everything else is written in one transaction.
+    """
+    
+    def __init__(self, db_path: str, chunk_size: int = 5000):
+        """
+        Args:
+            db_path: Database to import into
+            chunk_size: Rows validated and written per statement
+        """
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+    
+    def import_customers(self, path: str, progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Add or update customers from a file with a name column
+        
+        Phone numbers are stored without spaces, dashes or brackets. Rows
+        without a phone can't be matched and are always added.
+        
+        Returns:
+            Dict with rows, inserted, updated, errors ([{'line', 'error'}]) and seconds
+        """
+        return self._import(path, CUSTOMER_COLUMNS, self._write_customers, progress)
+    
+    def import_products(self, path: str, progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Add or update products from a file with a name column
+        
+        A row whose barcode belongs to a product updates (and may rename)
+        that product; otherwise it is matched on name. New products need a
+        price. A stock level differing from the current one is recorded in
+        the stock ledger as an opening balance or adjustment.
+        
+        Returns:
+            Dict with rows, inserted, updated, errors ([{'line', 'error'}]) and seconds
+        """
+        return self._import(path, PRODUCT_COLUMNS, self._write_products, progress)
+    
+    def _import(self, path: str, aliases: Dict, write: Callable, progress) -> Dict:
+        started = time.perf_counter()
+        total = count_table_rows(path) if progress else 0
+        result = {'rows': 0, 'inserted': 0, 'updated': 0, 'errors': []}
+        
+        rows = iter_table(path)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            header = next(rows, None)
+            if header is None:
+                raise ValueError("The file is empty")
+            columns = map_columns(header[1], aliases)
+            if 'name' not in columns:
+                raise ValueError("The file has no name column")
+            
+            fields = list(columns.items())
+            width = max(columns.values()) + 1
+            conn.execute("BEGIN IMMEDIATE")
+            chunk = []
+            for line, cells in rows:
+                if not "".join(cells).strip():
+                    continue
+                if len(cells) < width:
+                    cells = cells + [""] * (width - len(cells))
+                record = {field: cells[position].strip() or None for field, position in fields}
+                record['line'] = line
+                chunk.append(record)
+                if len(chunk) >= self.chunk_size:
+                    write(conn, chunk, result)
+                    chunk = []
+                    if progress:
+                        progress(min(result['rows'] * 100 // max(total, 1), 99))
+            if chunk:
+                write(conn, chunk, result)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+            rows.close()
+        
+        if progress:
+            progress(100)
+        result['errors'].sort(key=lambda error: error['line'])
+        result['seconds'] = time.perf_counter() - started
+        return result
+    
+    @staticmethod
+    def _lookup(conn, query: str, keys: List) -> List[tuple]:
+        """Rows for `query` (with a {placeholders} list) over keys, 500 at a time"""
+        found = []
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            found.extend(conn.execute(query.format(placeholders=', '.join('?' * len(part))), part))
+        return found
+    
+    def _write_customers(self, conn, chunk: List[Dict], result: Dict):
+        valid = {}
+        for record in chunk:
+            result['rows'] += 1
+            try:
+                if not record['name']:
+                    raise ValueError("Name is empty")
+                phone = record.get('phone')
+                if phone is not None:
+                    phone = re.sub(r'[\s\-().]', '', phone)
+                    if not PHONE_PATTERN.fullmatch(phone):
+                        raise ValueError(f"Invalid phone: {record['phone']!r}")
+                email = record.get('email')
+                if email is not None and not EMAIL_PATTERN.fullmatch(email):
+                    raise ValueError(f"Invalid email: {email!r}")
+                gstin = record.get('gstin')
+                if gstin is not None:
+                    gstin = gstin.upper()
+                    if not GSTIN_PATTERN.fullmatch(gstin):
+                        raise ValueError(f"Invalid GSTIN: {record['gstin']!r}")
+            except ValueError as e:
+                result['errors'].append({'line': record['line'], 'error': str(e)})
+                continue
+            
+            # A phone repeated in the file keeps its last row
+            key = phone if phone is not None else ('line', record['line'])
+            valid[key] = (record['name'], phone, record.get('address'), email, gstin)
+        
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS import_customers (
+                name TEXT, phone TEXT, address TEXT, email TEXT, gstin TEXT
+            )
+        """)
+        conn.execute("DELETE FROM temp.import_customers")
+        conn.executemany("INSERT INTO temp.import_customers VALUES (?, ?, ?, ?, ?)", list(valid.values()))
+        existing = conn.execute("""
+            SELECT COUNT(*) FROM temp.import_customers s JOIN customers c ON c.phone = s.phone
+        """).fetchone()[0]
+        conn.execute("""
+            INSERT INTO customers (name, phone, address, email, gstin)
+            SELECT name, phone, address, email, gstin FROM temp.import_customers WHERE true
+            ON CONFLICT (phone) DO UPDATE SET
+                name = excluded.name,
+                address = COALESCE(excluded.address, address),
+                email = COALESCE(excluded.email, email),
+                gstin = COALESCE(excluded.gstin, gstin),
+                updated_at = CURRENT_TIMESTAMP
+        """)
+        result['updated'] += existing
+        result['inserted'] += len(valid) - existing
+    
+    def _write_products(self, conn, chunk: List[Dict], result: Dict):
+        parsed = []
+        for record in chunk:
+            result['rows'] += 1
+            try:
+                if not record['name']:
+                    raise ValueError("Name is empty")
+                gst_percent = parse_number(record.get('gst_percent'), 'GST rate')
+                if gst_percent is not None and not GSTCalculator.validate_gst_rate(gst_percent):
+                    raise ValueError(f"GST rate must be one of {GSTCalculator.GST_RATES}: {record['gst_percent']!r}")
+                parsed.append((record['line'], (
+                    record['name'], record.get('description'), parse_number(record.get('price'), 'price'),
+                    gst_percent, record.get('barcode'), record.get('category'),
+                    parse_number(record.get('stock_quantity'), 'stock', integer=True),
+                    parse_number(record.get('min_stock_alert'), 'minimum stock', integer=True),
+                    record.get('hsn_code'),
+                )))
+            except ValueError as e:
+                result['errors'].append({'line': record['line'], 'error': str(e)})
+        
+        # Current id and stock for every barcode and name in the chunk
+        by_barcode = {barcode: (product_id, stock) for product_id, barcode, stock in self._lookup(
+            conn, "SELECT id, barcode, stock_quantity FROM products WHERE barcode IN ({placeholders})",
+            list({values[4] for _, values in parsed if values[4]}))}
+        by_name = {name: (product_id, stock) for product_id, name, stock in self._lookup(
+            conn, "SELECT id, name, stock_quantity FROM products WHERE name IN ({placeholders})",
+            list({values[0] for _, values in parsed}))}
+        
+        # Resolve each row to an existing product id or a new name; a product
+        # repeated in the file keeps its last row
+        updates, inserts, new_barcodes = {}, {}, {}
+        for line, values in parsed:
+            name, price, barcode = values[0], values[2], values[4]
+            barcode_match = by_barcode.get(barcode) if barcode else None
+            name_match = by_name.get(name)
+            if barcode_match and name_match and barcode_match[0] != name_match[0]:
+                result['errors'].append({'line': line, 'error': f"Barcode {barcode} belongs to a different product"})
+            elif barcode_match or name_match:
+                product_id, stock = barcode_match or name_match
+                updates[product_id] = (line, values, stock)
+            elif price is None:
+                result['errors'].append({'line': line, 'error': "Price is required for a new product"})
+            elif barcode and new_barcodes.setdefault(barcode, name) != name:
+                result['errors'].append({'line': line, 'error': f"Barcode {barcode} is repeated in the file"})
+            else:
+                inserts[name] = (line, values)
+        # A new row can't take the name another row renames a product to
+        for product_id, (line, values, _) in updates.items():
+            if values[0] in inserts:
+                result['errors'].append({'line': inserts.pop(values[0])[0],
+                                         'error': f"Name is taken by the product renamed on line {line}"})
+        
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS import_products (
+                product_id INTEGER, old_stock INTEGER, name TEXT, description TEXT, price REAL,
+                gst_percent REAL, barcode TEXT, category TEXT, stock_quantity INTEGER,
+                min_stock_alert INTEGER, hsn_code TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS temp.import_products_id ON import_products(product_id)")
+        conn.execute("DELETE FROM temp.import_products")
+        conn.executemany("INSERT INTO temp.import_products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         [(product_id, stock) + values for product_id, (_, values, stock) in updates.items()]
+                         + [(None, None) + values for _, values in inserts.values()])
+        
+        conn.execute("""
+            UPDATE products
+            SET (name, description, price, gst_percent, barcode, category, stock_quantity,
+                 min_stock_alert, hsn_code, updated_at) = (
+                SELECT s.name, COALESCE(s.description, products.description), COALESCE(s.price, products.price),
+                       COALESCE(s.gst_percent, products.gst_percent), COALESCE(s.barcode, products.barcode),
+                       COALESCE(s.category, products.category),
+                       COALESCE(s.stock_quantity, products.stock_quantity),
+                       COALESCE(s.min_stock_alert, products.min_stock_alert),
+                       COALESCE(s.hsn_code, products.hsn_code), CURRENT_TIMESTAMP
+                FROM temp.import_products s WHERE s.product_id = products.id
+            )
+            WHERE id IN (SELECT product_id FROM temp.import_products WHERE product_id IS NOT NULL)
+        """)
+        conn.execute("""
+            INSERT INTO products (name, description, price, gst_percent, barcode, category,
+                                  stock_quantity, min_stock_alert, hsn_code)
+            SELECT name, description, price, COALESCE(gst_percent, 18.0), barcode, category,
+                   COALESCE(stock_quantity, 0), COALESCE(min_stock_alert, 5), hsn_code
+            FROM temp.import_products WHERE product_id IS NULL
+        """)
+        
+        # Keep the stock ledger in step with the imported levels
+        conn.execute("""
+            INSERT INTO stock_transactions (product_id, transaction_type, quantity, notes)
+            SELECT product_id, 'adjustment', stock_quantity - IFNULL(old_stock, 0), 'Catalog import'
+            FROM temp.import_products
+            WHERE product_id IS NOT NULL AND stock_quantity != IFNULL(old_stock, 0)
+        """)
+        conn.execute("""
+            INSERT INTO stock_transactions (product_id, transaction_type, quantity, notes)
+            SELECT p.id, 'opening', p.stock_quantity, 'Catalog import'
+            FROM temp.import_products s JOIN products p ON p.name = s.name
+            WHERE s.product_id IS NULL AND s.stock_quantity != 0
+        """)
+        
+        result['updated'] += len(updates)
+        result['inserted'] += len(inserts)
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Import customers or products from CSV or Excel")
+    parser.add_argument("table", choices=("customers", "products"))
+    parser.add_argument("file", help="CSV or XLSX file with a header row")
+    parser.add_argument("--database", default="invoice_database.db", help="Database file")
+    args = parser.parse_args()
+    
+    importer = CatalogImporter(args.database)
+    result = (importer.import_customers if args.table == "customers" else importer.import_products)(args.file)
+    print(f"{result['rows']} rows: {result['inserted']} added, {result['updated']} updated, "
+          f"{len(result['errors'])} rejected ({result['seconds']:.2f} s, "
+          f"{result['rows'] / max(result['seconds'], 1e-9):,.0f} rows/s)")
+    for error in result['errors'][:20]:
+        print(f"Line {error['line']}: {error['error']}")
@@ -0,0 +1,223 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# Invoice line columns for databases that keep items as JSON on the invoice (the web app)
+JSON_ITEM_COLUMNS = ['invoice_id', 'invoice_number', 'invoice_date', 'product_id', 'name',
+                     'quantity', 'price', 'discount_percent', 'gst_percent', 'total']
+
+# Columns holding serialized line items, which are exported as invoice_items instead
+SKIPPED_COLUMNS = ('items_json', 'items')
+
+EXCEL_MAX_ROWS = 1048576
+
+class DataExporter:
+    """
+    Streams database tables to CSV or XLSX
+    
+    Rows are read with fetchmany() and written as they arrive, so memory use
+    stays flat however many rows are exported. XLSX files are written with
+    xlsxwriter's constant_memory mode and continue on a new sheet when one
+    fills up.
+    """
+    
+    DATASETS = ('invoices', 'invoice_items', 'customers', 'products')
+    
+    def __init__(self, db_path: str, batch_size: int = 5000):
+        """
+        Args:
+            db_path: Database to export from
+            batch_size: Rows fetched from the database at a time
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+    
+    def count_rows(self, dataset: str) -> int:
+        """Number of rows an export of `dataset` holds (estimated for JSON line items)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if dataset == 'invoice_items' and not self._has_table(conn, 'invoice_items'):
+                dataset = 'invoices'
+            return conn.execute(f"SELECT COUNT(*) FROM {self._table(dataset)}").fetchone()[0]
+        finally:
+            conn.close()
+    
+    def iter_batches(self, dataset: str) -> Tuple[List[str], Iterator[List[tuple]]]:
+        """
+        Column names and an iterator of row batches for a dataset
+        
+        The iterator holds a read transaction until it is exhausted or closed.
+        """
+        conn = sqlite3.connect(self.db_path)
+        if dataset == 'invoice_items' and not self._has_table(conn, 'invoice_items'):
+            return list(JSON_ITEM_COLUMNS), self._iter_json_items(conn)
+        
+        if dataset == 'invoice_items':
+            # Row id order reads the table sequentially; lines are stored in invoice order
+            query = """
+                SELECT ii.*, i.invoice_number, i.created_at AS invoice_date
+                FROM invoice_items ii
+                JOIN invoices i ON i.id = ii.invoice_id
+                ORDER BY ii.id
+            """
+        else:
+            query = f"SELECT * FROM {self._table(dataset)} ORDER BY id"
+        cursor = conn.execute(query)
+        names = [description[0] for description in cursor.description]
+        keep = [position for position, name in enumerate(names) if name not in SKIPPED_COLUMNS]
+        project = None if len(keep) == len(names) else itemgetter(*keep)
+        return [names[position] for position in keep], self._iter_cursor(conn, cursor, project)
+    
+    def _iter_cursor(self, conn, cursor, project: Optional[Callable]) -> Iterator[List[tuple]]:
+        try:
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield [project(row) for row in rows] if project else rows
+        finally:
+            conn.close()
+    
+    def _iter_json_items(self, conn) -> Iterator[List[tuple]]:
+        """Invoice lines expanded from each invoice's items JSON"""
+        try:
+            cursor = conn.execute("SELECT id, invoice_number, created_at, items FROM invoices ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield [
+                    (invoice_id, invoice_number, created_at) + tuple(
+                        item.get(column) for column in JSON_ITEM_COLUMNS[3:])
+                    for invoice_id, invoice_number, created_at, items in rows
+                    for item in (json.loads(items) if items else [])
+                ]
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _has_table(conn, table: str) -> bool:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                            (table,)).fetchone() is not None
+    
+    def _table(self, dataset: str) -> str:
+        if dataset not in self.DATASETS:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        return dataset
+    
+    def export(self, dataset: str, path: str, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Export a dataset to a .csv or .xlsx file (chosen by extension)
+        
+        Args:
+            progress: Called with a percentage every batch; raising from it
+                aborts the export and removes the partial file
+        
+        Returns:
+            Number of rows written
+        """
+        writer = self.write_xlsx if path.lower().endswith('.xlsx') else self.write_csv
+        part_path = path + ".part"
+        try:
+            rows = writer(dataset, part_path, progress)
+            os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return rows
+    
+    def _batches_with_progress(self, dataset: str, progress):
+        """Column names and row batches, reporting progress after each batch"""
+        columns, batches = self.iter_batches(dataset)
+        if not progress:
+            return columns, batches
+        total = max(self.count_rows(dataset), 1)
+        
+        def counted():
+            written = 0
+            try:
+                for batch in batches:
+                    yield batch
+                    written += len(batch)
+                    progress(min(written * 100 // total, 99))
+            finally:
+                batches.close()
+            progress(100)
+        return columns, counted()
+    
+    def write_csv(self, dataset: str, path: str, progress: Optional[Callable[[int], None]] = None) -> int:
+        """Stream a dataset to a CSV file; returns rows written"""
+        columns, batches = self._batches_with_progress(dataset, progress)
+        written = 0
+        try:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for batch in batches:
+                    writer.writerows(batch)
+                    written += len(batch)
+        finally:
+            batches.close()
+        return written
+    
+    def iter_csv(self, dataset: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """CSV export as a sequence of byte chunks, for streaming responses"""
+        columns, batches = self.iter_batches(dataset)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        try:
+            for batch in batches:
+                writer.writerows(batch)
+                if buffer.tell() >= chunk_size:
+                    yield buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue().encode('utf-8')
+        finally:
+            batches.close()
+    
+    def write_xlsx(self, dataset: str, path: str, progress: Optional[Callable[[int], None]] = None) -> int:
+        """Stream a dataset to an XLSX file in constant-memory mode; returns rows written"""
+        import xlsxwriter
+        
+        columns, batches = self._batches_with_progress(dataset, progress)
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_numbers': False})
+        header = workbook.add_format({'bold': True})
+        written = 0
+        sheet_row = EXCEL_MAX_ROWS
+        sheets = 0
+        try:
+            for row in chain.from_iterable(batches):
+                # constant_memory writes rows in order, so a full sheet is final
+                if sheet_row == EXCEL_MAX_ROWS:
+                    sheets += 1
+                    worksheet = workbook.add_worksheet(dataset if sheets == 1 else f"{dataset} ({sheets})")
+                    worksheet.write_row(0, 0, columns, header)
+                    sheet_row = 1
+                worksheet.write_row(sheet_row, 0, row)
+                sheet_row += 1
+                written += 1
+            if not sheets:
+                workbook.add_worksheet(dataset).write_row(0, 0, columns, header)
+        finally:
+            batches.close()
+            workbook.close()
+        return written
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Export invoice data to CSV or Excel")
+    parser.add_argument("dataset", choices=DataExporter.DATASETS)
+    parser.add_argument("output", help="Output file (.csv or .xlsx)")
+    parser.add_argument("--database", default="invoice_database.db", help="Database file")
+    args = parser.parse_args()
+    
+    print(f"Exported {DataExporter(args.database).export(args.dataset, args.output)} rows to {args.output}")
@@ -0,0 +1,201 @@
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional
+
+class ReorderForecaster:
+    """
+    Reorder suggestions from sales history
+    
+    Sold quantities are folded into sales_daily (one row per product and day)
+    from the invoices added since the last run, so each run only reads new
+    invoice lines however many years of history there are. Velocities are
+    then computed for the whole catalog at once from the last `history_days`
+    of daily sales: an exponentially smoothed rate and a 28-day moving average.
+    
+    Deleting or editing an already processed invoice is not picked up
+    incrementally; run with full=True to rebuild the daily sales.
+    """
+    
+    MOVING_AVERAGE_DAYS = 28
+    
+    def __init__(self, db_path: str, history_days: int = 90, alpha: float = 0.1,
+                 lead_time_days: int = 7, safety_days: int = 3, order_days: int = 14,
+                 batch_invoices: int = 20000):
+        """
+        Args:
+            db_path: Database file
+            history_days: Days of daily sales used for velocities
+            alpha: Exponential smoothing factor (higher reacts faster)
+            lead_time_days: Days between ordering and receiving stock
+            safety_days: Extra days of sales kept as safety stock
+            order_days: Days of sales each suggested order should cover
+            batch_invoices: Invoices folded into sales_daily per statement
+        """
+        self.db_path = db_path
+        self.history_days = history_days
+        self.alpha = alpha
+        self.lead_time_days = lead_time_days
+        self.safety_days = safety_days
+        self.order_days = order_days
+        self.batch_invoices = batch_invoices
+    
+    def update_sales_history(self, conn, full: bool = False,
+                             progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Fold invoices added since the last run into sales_daily
+        
+        Each batch is committed together with forecast_state, so the write lock
+        is only held for one batch at a time and an interrupted run resumes
+        where it stopped. Commits any transaction already open on `conn`.
+        
+        Returns:
+            Number of daily sales rows added or updated
+        """
+        if full:
+            conn.execute("DELETE FROM sales_daily")
+            conn.execute("DELETE FROM forecast_state")
+        conn.execute("INSERT OR IGNORE INTO forecast_state (id, last_invoice_id) VALUES (1, 0)")
+        conn.commit()
+        last_id = conn.execute("SELECT last_invoice_id FROM forecast_state WHERE id = 1").fetchone()[0]
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM invoices").fetchone()[0]
+        
+        processed = 0
+        start = last_id
+        while start < max_id:
+            end = min(start + self.batch_invoices, max_id)
+            cursor = conn.execute("""
+                INSERT INTO sales_daily (product_id, day, quantity)
+                SELECT ii.product_id, DATE(i.created_at), SUM(ii.quantity)
+                FROM invoice_items ii
+                JOIN invoices i ON i.id = ii.invoice_id
+                WHERE ii.invoice_id > ? AND ii.invoice_id <= ?
+                  AND ii.product_id IS NOT NULL AND i.status != 'cancelled'
+                GROUP BY ii.product_id, DATE(i.created_at)
+                ON CONFLICT (product_id, day) DO UPDATE SET quantity = quantity + excluded.quantity
+            """, (start, end))
+            processed += max(cursor.rowcount, 0)
+            conn.execute("UPDATE forecast_state SET last_invoice_id = ?, updated_at = CURRENT_TIMESTAMP WHERE id = 1",
+                         (end,))
+            conn.commit()
+            start = end
+            if progress:
+                progress((start - last_id) * 100 // max(max_id - last_id, 1))
+        return processed
+    
+    def run(self, full: bool = False, as_of: Optional[date] = None,
+            progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Update sales history and rewrite reorder_suggestions
+        
+        Args:
+            full: Rebuild sales_daily from all invoices
+            as_of: Last day of history to use (default today)
+            progress: Called with a percentage; raising from it aborts the run
+        
+        Returns:
+            Dict with sales_rows (daily rows added or updated), products
+            (products with sales), suggestions (products to reorder) and seconds
+        """
+        import numpy as np
+        import pandas as pd
+        
+        started = time.perf_counter()
+        as_of = as_of or date.today()
+        first_day = as_of - timedelta(days=self.history_days - 1)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            sales_rows = self.update_sales_history(
+                conn, full, progress and (lambda percent: progress(percent * 8 // 10)))
+            
+            # Exponential smoothing over a fixed window is a weighted sum of the
+            # daily sales (the oldest day carries the starting level), so SQLite
+            # sums each product against a one-row-per-day weights table and only
+            # one row per product comes back
+            ages = np.arange(self.history_days - 1, -1, -1)
+            weights = self.alpha * (1 - self.alpha) ** ages
+            weights[0] = (1 - self.alpha) ** (self.history_days - 1)
+            conn.execute("DROP TABLE IF EXISTS temp.forecast_weights")
+            conn.execute("""
+                CREATE TEMP TABLE forecast_weights (
+                    day DATE PRIMARY KEY, weight REAL NOT NULL, recent INTEGER NOT NULL
+                )
+            """)
+            conn.executemany("INSERT INTO temp.forecast_weights VALUES (?, ?, ?)", [
+                ((first_day + timedelta(days=offset)).isoformat(), float(weights[offset]),
+                 int(ages[offset] < self.MOVING_AVERAGE_DAYS))
+                for offset in range(self.history_days)
+            ])
+            # Velocities are read outside any write transaction
+            conn.commit()
+            forecast = pd.read_sql_query("""
+                SELECT s.product_id,
+                       SUM(s.quantity * w.weight) AS velocity,
+                       SUM(s.quantity * w.recent) AS recent_quantity,
+                       MAX(COALESCE(p.stock_quantity, 0), 0) AS on_hand
+                FROM temp.forecast_weights w
+                JOIN sales_daily s ON s.day = w.day
+                JOIN products p ON p.id = s.product_id
+                GROUP BY s.product_id
+                HAVING velocity > 0
+            """, conn, index_col='product_id')
+            if progress:
+                progress(90)
+            
+            forecast['moving_average'] = forecast['recent_quantity'] / self.MOVING_AVERAGE_DAYS
+            forecast['days_of_cover'] = forecast['on_hand'] / forecast['velocity']
+            reorder_point = forecast['velocity'] * (self.lead_time_days + self.safety_days)
+            target = forecast['velocity'] * (self.lead_time_days + self.safety_days + self.order_days)
+            forecast['reorder'] = np.ceil((target - forecast['on_hand']).clip(lower=0)
+                                          .where(forecast['on_hand'] <= reorder_point, 0)).astype(int)
+            # Products that won't run out within a century get no date
+            finite = forecast['days_of_cover'] < 36500
+            stockout = pd.Timestamp(as_of) + pd.to_timedelta(
+                forecast['days_of_cover'].where(finite, 0).astype(int), unit='D')
+            forecast['stockout_date'] = stockout.dt.strftime('%Y-%m-%d').where(finite, None)
+            
+            rows = [
+                (int(product_id), float(velocity_), float(average), float(on_hand_), float(cover),
+                 stockout_date, int(quantity))
+                for product_id, velocity_, average, on_hand_, cover, quantity, stockout_date
+                in forecast[['velocity', 'moving_average', 'on_hand', 'days_of_cover', 'reorder',
+                             'stockout_date']].itertuples()
+            ]
+            if progress:
+                progress(95)
+            
+            # Only the rewrite below holds the write lock
+            computed_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+            conn.execute("DELETE FROM reorder_suggestions")
+            conn.executemany("""
+                INSERT INTO reorder_suggestions (product_id, daily_velocity, moving_average, stock_quantity,
+                                                 days_of_cover, stockout_date, reorder_quantity, computed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [row + (computed_at,) for row in rows])
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        if progress:
+            progress(100)
+        return {
+            'sales_rows': sales_rows,
+            'products': len(rows),
+            'suggestions': sum(1 for row in rows if row[-1] > 0),
+            'seconds': time.perf_counter() - started,
+        }
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Compute reorder suggestions from sales history")
+    parser.add_argument("database", nargs="?", default="invoice_database.db", help="Database file")
+    parser.add_argument("--full", action="store_true", help="Rebuild daily sales from all invoices")
+    args = parser.parse_args()
+    
+    result = ReorderForecaster(args.database).run(full=args.full)
+    print(f"Processed {result['sales_rows']} daily sales rows; {result['products']} products selling, "
+          f"{result['suggestions']} to reorder ({result['seconds']:.2f} s)")
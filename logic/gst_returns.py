@@ -0,0 +1,258 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+# A GSTIN is 15 characters; the first two are the state code
+GSTIN_LENGTH = 15
+
+def _money(value: float) -> float:
+    # + 0.0 turns -0.0 into 0.0
+    return round(value, 2) + 0.0
+
+class GSTReturnBuilder:
+    """
+    Monthly GSTR-1 and GSTR-3B data in the GST portal's JSON layout
+    
+    All sections are built in one pass over the month's invoice lines, read
+    in invoice order. Each line's taxable value is quantity x price less
+    discount. The invoice's stored CGST/SGST amounts are shared out over its
+    lines in proportion to their rate, so the return totals match the
+    invoices as issued. Sales are intra-state (the app records CGST/SGST
+    only), so IGST and cess are reported as 0.
+    
+    Invoices whose customer has a GSTIN are B2B and reported invoice by
+    invoice. The rest are summarised as B2C (small) per place of supply and
+    rate.
+    """
+    
+    def __init__(self, db_path: str, batch_size: int = 5000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+    
+    def build(self, year: int, month: int, progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Compute the returns for a month
+        
+        Args:
+            progress: Called with a percentage every batch; raising from it aborts
+        
+        Returns:
+            Dict with gstr1 and gstr3b (portal JSON), rate_summary (rows per
+            GST rate) and stats (invoices, lines, seconds)
+        """
+        started = time.perf_counter()
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        period = f"{month:02d}{year}"
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute("SELECT gstin FROM shop_settings WHERE id = 1").fetchone()
+            shop_gstin = (row[0] or "").strip().upper() if row else ""
+            shop_state = shop_gstin[:2] if len(shop_gstin) == GSTIN_LENGTH else ""
+            
+            # Counted only to scale progress
+            total_lines = conn.execute("""
+                SELECT COUNT(*) FROM invoice_items ii JOIN invoices i ON i.id = ii.invoice_id
+                WHERE i.created_at >= ? AND i.created_at < ? AND COALESCE(i.status, '') != 'cancelled'
+            """, (start.isoformat(), end.isoformat())).fetchone()[0] if progress else 0
+            
+            cursor = conn.execute("""
+                SELECT i.id, i.invoice_number, i.created_at, i.total_amount, i.cgst_amount, i.sgst_amount,
+                       c.gstin, ii.quantity, ii.unit_price, ii.discount_percent, ii.gst_percent, p.hsn_code
+                FROM invoices i
+                JOIN invoice_items ii ON ii.invoice_id = i.id
+                LEFT JOIN customers c ON c.id = i.customer_id
+                LEFT JOIN products p ON p.id = ii.product_id
+                WHERE i.created_at >= ? AND i.created_at < ? AND COALESCE(i.status, '') != 'cancelled'
+                ORDER BY i.created_at, i.id
+            """, (start.isoformat(), end.isoformat()))
+            
+            totals = _ReturnTotals(shop_state)
+            invoice, lines = None, []
+            read = 0
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    if invoice is not None and row[0] != invoice[0]:
+                        totals.add_invoice(invoice, lines)
+                        lines = []
+                    invoice = row[:7]
+                    lines.append(row[7:])
+                read += len(rows)
+                if progress:
+                    progress(min(read * 100 // max(total_lines, 1), 99))
+            if invoice is not None:
+                totals.add_invoice(invoice, lines)
+        finally:
+            conn.close()
+        
+        if progress:
+            progress(100)
+        return {
+            'gstr1': totals.gstr1(shop_gstin, period),
+            'gstr3b': totals.gstr3b(shop_gstin, period),
+            'rate_summary': totals.rate_summary(),
+            'stats': {'invoices': totals.invoices, 'lines': read,
+                      'seconds': time.perf_counter() - started},
+        }
+    
+    def write(self, year: int, month: int, output_dir: str,
+              progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Build a month's returns and save GSTR1_<MMYYYY>.json and GSTR3B_<MMYYYY>.json
+        
+        Returns:
+            The build() result plus the saved paths under 'files'
+        """
+        result = self.build(year, month, progress)
+        os.makedirs(output_dir, exist_ok=True)
+        period = f"{month:02d}{year}"
+        result['files'] = []
+        for name in ('gstr1', 'gstr3b'):
+            path = os.path.join(output_dir, f"{name.upper()}_{period}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(result[name], f, indent=2)
+            result['files'].append(path)
+        return result
+
+class _ReturnTotals:
+    """Running totals for one return period"""
+    
+    def __init__(self, shop_state: str):
+        self.shop_state = shop_state
+        self.invoices = 0
+        self.b2b = {}     # customer GSTIN -> invoice entries
+        self.b2cs = {}    # (place of supply, rate) -> [txval, camt, samt]
+        self.hsn = {}     # (hsn, rate) -> [qty, txval, camt, samt]
+        self.rates = {}   # rate -> [txval, camt, samt, invoice value]
+    
+    def add_invoice(self, invoice, lines):
+        invoice_id, number, created_at, total_amount, cgst, sgst, gstin = invoice
+        cgst, sgst = cgst or 0.0, sgst or 0.0
+        gstin = (gstin or "").strip().upper()
+        b2b = len(gstin) == GSTIN_LENGTH
+        place = gstin[:2] if b2b else self.shop_state
+        self.invoices += 1
+        
+        # Taxable value per line, and its share of the stored tax by rate
+        taxable = [(quantity or 0) * (price or 0) * (1 - (discount or 0) / 100)
+                   for quantity, price, discount, _, _ in lines]
+        computed = [value * (rate or 0) / 100 for value, (_, _, _, rate, _) in zip(taxable, lines)]
+        computed_total = sum(computed)
+        
+        by_rate = {}
+        for value, tax, (quantity, _, _, rate, hsn) in zip(taxable, computed, lines):
+            rate = float(rate or 0)
+            share = tax / computed_total if computed_total else 0.0
+            camt, samt = cgst * share, sgst * share
+            
+            item = by_rate.setdefault(rate, [0.0, 0.0, 0.0])
+            item[0] += value
+            item[1] += camt
+            item[2] += samt
+            
+            hsn_total = self.hsn.setdefault(((hsn or "").strip(), rate), [0.0, 0.0, 0.0, 0.0])
+            hsn_total[0] += quantity or 0
+            hsn_total[1] += value
+            hsn_total[2] += camt
+            hsn_total[3] += samt
+        
+        for rate, (value, camt, samt) in by_rate.items():
+            rate_total = self.rates.setdefault(rate, [0.0, 0.0, 0.0, 0.0])
+            rate_total[0] += value
+            rate_total[1] += camt
+            rate_total[2] += samt
+            rate_total[3] += value + camt + samt
+            if not b2b:
+                b2cs_total = self.b2cs.setdefault((place, rate), [0.0, 0.0, 0.0])
+                b2cs_total[0] += value
+                b2cs_total[1] += camt
+                b2cs_total[2] += samt
+        
+        if b2b:
+            self.b2b.setdefault(gstin, []).append({
+                'inum': number,
+                'idt': f"{created_at[8:10]}-{created_at[5:7]}-{created_at[:4]}",
+                'val': _money(total_amount or 0),
+                'pos': place,
+                'rchrg': 'N',
+                'inv_typ': 'R',
+                'itms': [
+                    {'num': position, 'itm_det': {
+                        'txval': _money(value), 'rt': rate,
+                        'iamt': 0.0, 'camt': _money(camt), 'samt': _money(samt), 'csamt': 0.0,
+                    }}
+                    for position, (rate, (value, camt, samt)) in enumerate(sorted(by_rate.items()), 1)
+                ],
+            })
+    
+    def gstr1(self, gstin: str, period: str) -> Dict:
+        data = {'gstin': gstin, 'fp': period}
+        if self.b2b:
+            data['b2b'] = [{'ctin': ctin, 'inv': invoices} for ctin, invoices in sorted(self.b2b.items())]
+        if self.b2cs:
+            data['b2cs'] = [
+                {'sply_ty': 'INTRA', 'pos': place, 'typ': 'OE', 'rt': rate,
+                 'txval': _money(value), 'iamt': 0.0, 'camt': _money(camt), 'samt': _money(samt), 'csamt': 0.0}
+                for (place, rate), (value, camt, samt) in sorted(self.b2cs.items())
+            ]
+        if self.hsn:
+            data['hsn'] = {'data': [
+                {'num': position, 'hsn_sc': hsn, 'desc': '', 'uqc': 'NOS', 'qty': round(quantity, 3),
+                 'rt': rate, 'txval': _money(value), 'iamt': 0.0, 'camt': _money(camt),
+                 'samt': _money(samt), 'csamt': 0.0}
+                for position, ((hsn, rate), (quantity, value, camt, samt))
+                in enumerate(sorted(self.hsn.items()), 1)
+            ]}
+        return data
+    
+    def gstr3b(self, gstin: str, period: str) -> Dict:
+        taxed = [totals for rate, totals in self.rates.items() if rate > 0]
+        nil_rated = sum(totals[0] for rate, totals in self.rates.items() if rate == 0)
+        zero = {'txval': 0.0, 'iamt': 0.0, 'camt': 0.0, 'samt': 0.0, 'csamt': 0.0}
+        return {
+            'gstin': gstin,
+            'ret_period': period,
+            'sup_details': {
+                'osup_det': {
+                    'txval': _money(sum(totals[0] for totals in taxed)),
+                    'iamt': 0.0,
+                    'camt': _money(sum(totals[1] for totals in taxed)),
+                    'samt': _money(sum(totals[2] for totals in taxed)),
+                    'csamt': 0.0,
+                },
+                'osup_zero': dict(zero),
+                'osup_nil_exmp': {'txval': _money(nil_rated)},
+                'isup_rev': dict(zero),
+                'osup_nongst': {'txval': 0.0},
+            },
+        }
+    
+    def rate_summary(self) -> List[Dict]:
+        return [
+            {'gst_percent': rate, 'taxable_value': _money(value), 'cgst': _money(camt),
+             'sgst': _money(samt), 'total_tax': _money(camt + samt), 'invoice_value': _money(total)}
+            for rate, (value, camt, samt, total) in sorted(self.rates.items())
+        ]
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate GSTR-1 and GSTR-3B JSON for a month")
+    parser.add_argument("month", help="Return period as YYYY-MM")
+    parser.add_argument("--database", default="invoice_database.db", help="Database file")
+    parser.add_argument("--output", default="gst_returns", help="Output directory")
+    args = parser.parse_args()
+    
+    year, month = (int(part) for part in args.month.split("-"))
+    result = GSTReturnBuilder(args.database).write(year, month, args.output)
+    stats = result['stats']
+    print(f"{stats['invoices']} invoices, {stats['lines']} lines in {stats['seconds']:.2f} s")
+    for path in result['files']:
+        print(f"Saved {path}")
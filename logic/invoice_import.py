@@ -0,0 +1,400 @@
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .catalog_import import count_table_rows, iter_table, map_columns, parse_number
+from .forecast import ReorderForecaster
+from .gst_calculator import GSTCalculator
+
+# Accepted header spellings for each field; one row per invoice line
+INVOICE_COLUMNS = {
+    'invoice_number': ('invoice_number', 'invoice number', 'invoice no', 'invoice', 'bill no', 'bill number'),
+    'date': ('date', 'invoice date', 'invoice_date', 'bill date', 'created_at'),
+    'customer': ('customer', 'customer name', 'customer_name', 'party'),
+    'phone': ('phone', 'mobile', 'customer phone'),
+    'gstin': ('gstin', 'customer gstin'),
+    'product': ('product', 'product name', 'product_name', 'item', 'item name', 'name'),
+    'barcode': ('barcode', 'sku'),
+    'quantity': ('quantity', 'qty'),
+    'price': ('price', 'rate', 'unit price', 'unit_price'),
+    'discount_percent': ('discount_percent', 'discount', 'discount %'),
+    'gst_percent': ('gst_percent', 'gst', 'gst %', 'gst rate'),
+    'payment_method': ('payment_method', 'payment method', 'payment mode'),
+    'payment_status': ('payment_status', 'payment status'),
+    'status': ('status',),
+    'notes': ('notes', 'remarks'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%d-%m-%Y %H:%M', '%d-%m-%Y',
+                '%d/%m/%Y %H:%M', '%d/%m/%Y', '%d.%m.%Y')
+
+# Customer names that mean no customer
+WALK_IN_NAMES = ('', 'walk-in', 'walk-in customer', 'walk in', 'cash')
+
+class InvoiceImporter:
+    """
+    Migration of past invoices from another billing tool
+    
+    The file has one row per invoice line, with the invoice number, date and
+    customer repeated on each line of an invoice and an invoice's lines
+    next to each other. Line totals and tax are worked out the way the
+    invoice form does.
+    
+    Invoices are staged in temp tables and written with one statement per
+    table for every `batch_lines` lines, committing after each batch.
+    Unlike create_invoice() nothing touches stock per invoice: by default
+    stock is left as it is (the catalog already holds today's levels); with
+    record_stock the sales go into the stock ledger at their invoice dates
+    and stock levels are rebuilt from the ledger once at the end. Invoice
+    numbers already in the database are skipped, so an interrupted import
+    can simply be run again. The invoice number sequence and the daily
+    sales used by the reorder forecast are brought up to date at the end.
+    """
+    
+    def __init__(self, db_path: str, batch_lines: int = 50000, record_stock: bool = False):
+        """
+        Args:
+            db_path: Database to import into
+            batch_lines: Invoice lines written per transaction
+            record_stock: Record the sales in the stock ledger and rebuild stock levels
+        """
+        self.db_path = db_path
+        self.batch_lines = batch_lines
+        self.record_stock = record_stock
+        self._date_formats = list(DATE_FORMATS)
+    
+    def import_file(self, path: str, progress: Optional[Callable[[int, str], None]] = None) -> Dict:
+        """
+        Import the invoices in a CSV or XLSX file
+        
+        Args:
+            progress: Called with a percentage and a status message after each
+                batch; raising from it stops the import after the last
+                committed batch
+        
+        Returns:
+            Dict with invoices, lines, skipped (already imported), errors
+            ([{'line', 'error'}]), seconds and lines_per_second
+        """
+        started = time.perf_counter()
+        total = count_table_rows(path) if progress else 0
+        result = {'invoices': 0, 'lines': 0, 'skipped': 0, 'errors': []}
+        
+        rows = iter_table(path)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            header = next(rows, None)
+            if header is None:
+                raise ValueError("The file is empty")
+            columns = map_columns(header[1], INVOICE_COLUMNS)
+            missing = {'invoice_number', 'date', 'product', 'quantity', 'price'} - columns.keys()
+            if missing:
+                raise ValueError(f"The file has no {', '.join(sorted(missing))} column")
+            
+            self._create_staging_tables(conn)
+            products = self._load_products(conn)
+            fields = list(columns.items())
+            width = max(columns.values()) + 1
+            
+            batch, batch_lines, invoice, read = [], 0, None, 0
+            for line, cells in rows:
+                if not "".join(cells).strip():
+                    continue
+                if len(cells) < width:
+                    cells = cells + [""] * (width - len(cells))
+                record = {field: cells[position].strip() or None for field, position in fields}
+                record['line'] = line
+                read += 1
+                
+                if invoice is None or record['invoice_number'] != invoice[0]['invoice_number']:
+                    if invoice is not None:
+                        batch.append(invoice)
+                        batch_lines += len(invoice)
+                    invoice = []
+                    if batch_lines >= self.batch_lines:
+                        self._write_batch(conn, batch, products, result)
+                        batch, batch_lines = [], 0
+                        if progress:
+                            elapsed = time.perf_counter() - started
+                            progress(min(read * 100 // max(total, 1), 99),
+                                     f"Imported {result['invoices']:,} invoices, {result['lines']:,} lines "
+                                     f"({result['lines'] / elapsed:,.0f} lines/s)")
+                invoice.append(record)
+            if invoice:
+                batch.append(invoice)
+            self._write_batch(conn, batch, products, result)
+            
+            if progress:
+                progress(99, "Rebuilding invoice numbers and sales history...")
+            self._finish(conn)
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+            rows.close()
+        
+        if self.record_stock:
+            from database.db import DatabaseManager
+            DatabaseManager(self.db_path).rebuild_stock_quantities()
+        
+        result['errors'].sort(key=lambda error: error['line'])
+        result['seconds'] = time.perf_counter() - started
+        result['lines_per_second'] = result['lines'] / max(result['seconds'], 1e-9)
+        if progress:
+            progress(100, f"Imported {result['invoices']:,} invoices, {result['lines']:,} lines "
+                          f"({result['lines_per_second']:,.0f} lines/s)")
+        return result
+    
+    @staticmethod
+    def _create_staging_tables(conn):
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS import_invoices (
+                invoice_number TEXT PRIMARY KEY, created_at TEXT, customer_name TEXT, phone TEXT,
+                gstin TEXT, customer_id INTEGER, subtotal REAL, discount_amount REAL, gst_amount REAL,
+                sgst_amount REAL, cgst_amount REAL, total_amount REAL, items_json TEXT, status TEXT,
+                payment_method TEXT, payment_status TEXT, notes TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS import_invoice_items (
+                invoice_number TEXT, product_id INTEGER, product_name TEXT, quantity REAL,
+                unit_price REAL, discount_percent REAL, gst_percent REAL, total_price REAL
+            )
+        """)
+    
+    @staticmethod
+    def _load_products(conn) -> Dict:
+        """Product ids by barcode and by name, for matching invoice lines"""
+        products = {}
+        for product_id, name, barcode in conn.execute("SELECT id, name, barcode FROM products ORDER BY id DESC"):
+            products[('name', name)] = product_id
+            if barcode:
+                products[('barcode', barcode)] = product_id
+        return products
+    
+    def _parse_date(self, value: Optional[str]) -> str:
+        """Timestamp in the database's format from a date cell"""
+        if value:
+            # A file uses one format throughout, so the last one that matched is tried first
+            for position, date_format in enumerate(self._date_formats):
+                try:
+                    parsed = datetime.strptime(value, date_format)
+                except ValueError:
+                    continue
+                if position:
+                    self._date_formats.insert(0, self._date_formats.pop(position))
+                return parsed.strftime('%Y-%m-%d %H:%M:%S')
+        raise ValueError(f"Invalid date: {value!r}")
+    
+    def _parse_invoice(self, lines: List[Dict], products: Dict, errors: List[Dict]):
+        """Invoice row and line rows for the staging tables, or None (with an error added) if invalid"""
+        first = lines[0]
+        try:
+            created_at = self._parse_date(first['date'])
+        except ValueError as e:
+            errors.append({'line': first['line'], 'error': f"Invoice {first['invoice_number']}: {e}"})
+            return None
+        customer = first.get('customer')
+        if customer and customer.lower() in WALK_IN_NAMES:
+            customer = None
+        phone = first.get('phone')
+        if phone:
+            phone = ''.join(character for character in phone if character.isdigit() or character == '+')
+        
+        items, item_rows = [], []
+        for record in lines:
+            try:
+                if not record['product']:
+                    raise ValueError("Product is empty")
+                quantity = parse_number(record['quantity'], 'quantity')
+                if not quantity:
+                    raise ValueError("Quantity is zero")
+                price = parse_number(record['price'], 'price')
+                if price is None:
+                    raise ValueError("Price is empty")
+                discount_percent = parse_number(record.get('discount_percent'), 'discount') or 0
+                if discount_percent > 100:
+                    raise ValueError(f"Discount over 100%: {record['discount_percent']!r}")
+                gst_percent = parse_number(record.get('gst_percent'), 'GST rate')
+                gst_percent = 18.0 if gst_percent is None else float(gst_percent)
+                if not GSTCalculator.validate_gst_rate(gst_percent):
+                    raise ValueError(f"GST rate must be one of {GSTCalculator.GST_RATES}: {record['gst_percent']!r}")
+            except ValueError as e:
+                errors.append({'line': record['line'], 'error': f"Invoice {first['invoice_number']}: {e}"})
+                return None
+            
+            product_id = (products.get(('barcode', record.get('barcode')))
+                          or products.get(('name', record['product'])))
+            calculation = GSTCalculator.calculate_item_total(quantity, price, discount_percent, gst_percent)
+            items.append({
+                'product_id': product_id,
+                'name': record['product'],
+                'quantity': quantity,
+                'price': price,
+                'gst_percent': gst_percent,
+                'discount_percent': discount_percent,
+                'total': calculation['total_amount'],
+                **calculation
+            })
+            item_rows.append((first['invoice_number'], product_id, record['product'], quantity, price,
+                              discount_percent, gst_percent, calculation['total_amount']))
+        
+        totals = GSTCalculator.calculate_invoice_totals(items)
+        invoice_row = (
+            first['invoice_number'], created_at, customer, phone or None, (first.get('gstin') or "").upper() or None,
+            totals['subtotal'], totals['total_discount'], totals['total_gst'], totals['total_sgst'],
+            totals['total_cgst'], totals['grand_total'], json.dumps(items),
+            (first.get('status') or 'completed').lower(), first.get('payment_method'),
+            (first.get('payment_status') or 'paid').lower(), first.get('notes'),
+        )
+        return invoice_row, item_rows
+    
+    def _write_batch(self, conn, batch: List[List[Dict]], products: Dict, result: Dict):
+        # Invoices from an earlier, interrupted run are already there
+        present = set()
+        batch_numbers = [lines[0]['invoice_number'] for lines in batch if lines[0]['invoice_number']]
+        for start in range(0, len(batch_numbers), 500):
+            part = batch_numbers[start:start + 500]
+            present.update(number for number, in conn.execute(
+                f"SELECT invoice_number FROM invoices WHERE invoice_number IN ({', '.join('?' * len(part))})", part))
+        
+        invoice_rows, item_rows, numbers = [], [], set()
+        for lines in batch:
+            number = lines[0]['invoice_number']
+            if number in present:
+                result['skipped'] += 1
+                continue
+            if not number:
+                result['errors'].append({'line': lines[0]['line'], 'error': "Invoice number is empty"})
+                continue
+            if number in numbers:
+                result['errors'].append({'line': lines[0]['line'], 'error': f"Invoice {number}: appears twice; "
+                                                                            f"keep an invoice's lines together"})
+                continue
+            parsed = self._parse_invoice(lines, products, result['errors'])
+            if parsed is None:
+                continue
+            numbers.add(number)
+            invoice_rows.append(parsed[0])
+            item_rows.extend(parsed[1])
+        if not invoice_rows:
+            return
+        
+        conn.execute("DELETE FROM temp.import_invoices")
+        conn.execute("DELETE FROM temp.import_invoice_items")
+        conn.executemany("""
+            INSERT INTO temp.import_invoices (invoice_number, created_at, customer_name, phone, gstin,
+                                              subtotal, discount_amount, gst_amount, sgst_amount, cgst_amount,
+                                              total_amount, items_json, status, payment_method,
+                                              payment_status, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, invoice_rows)
+        conn.executemany("INSERT INTO temp.import_invoice_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)", item_rows)
+        
+        # Recheck in case another connection added one of them since
+        skipped = conn.execute("""
+            DELETE FROM temp.import_invoices
+            WHERE EXISTS (SELECT 1 FROM invoices i WHERE i.invoice_number = import_invoices.invoice_number)
+        """).rowcount
+        if skipped:
+            conn.execute("""
+                DELETE FROM temp.import_invoice_items
+                WHERE invoice_number NOT IN (SELECT invoice_number FROM temp.import_invoices)
+            """)
+        
+        # Customers are matched on phone, else on name, and added when missing
+        conn.execute("""
+            INSERT INTO customers (name, phone, gstin)
+            SELECT COALESCE(MAX(customer_name), phone), phone, MAX(gstin)
+            FROM temp.import_invoices WHERE phone IS NOT NULL
+            GROUP BY phone
+            ON CONFLICT (phone) DO NOTHING
+        """)
+        conn.execute("""
+            INSERT INTO customers (name, gstin)
+            SELECT customer_name, MAX(gstin) FROM temp.import_invoices s
+            WHERE phone IS NULL AND customer_name IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM customers c WHERE c.name = s.customer_name)
+            GROUP BY customer_name
+        """)
+        conn.execute("""
+            UPDATE temp.import_invoices
+            SET customer_id = CASE
+                WHEN phone IS NOT NULL THEN (SELECT id FROM customers c WHERE c.phone = import_invoices.phone)
+                ELSE (SELECT MIN(id) FROM customers c WHERE c.name = import_invoices.customer_name)
+            END
+            WHERE phone IS NOT NULL OR customer_name IS NOT NULL
+        """)
+        
+        conn.execute("""
+            INSERT INTO invoices (invoice_number, customer_id, subtotal, discount_amount, gst_amount,
+                                  sgst_amount, cgst_amount, total_amount, items_json, status,
+                                  payment_method, payment_status, notes, created_at, updated_at)
+            SELECT invoice_number, customer_id, subtotal, discount_amount, gst_amount,
+                   sgst_amount, cgst_amount, total_amount, items_json, status,
+                   payment_method, payment_status, notes, created_at, created_at
+            FROM temp.import_invoices ORDER BY rowid
+        """)
+        lines = conn.execute("""
+            INSERT INTO invoice_items (invoice_id, product_id, product_name, quantity, unit_price,
+                                       discount_percent, gst_percent, total_price, created_at)
+            SELECT i.id, s.product_id, s.product_name, s.quantity, s.unit_price,
+                   s.discount_percent, s.gst_percent, s.total_price, i.created_at
+            FROM temp.import_invoice_items s
+            JOIN invoices i ON i.invoice_number = s.invoice_number
+            ORDER BY s.rowid
+        """).rowcount
+        if self.record_stock:
+            # Same movement create_invoice() records, dated when the sale happened
+            conn.execute("""
+                INSERT INTO stock_transactions (product_id, transaction_type, quantity, reference_id,
+                                                notes, created_at)
+                SELECT s.product_id, 'sale', -CAST(s.quantity AS INTEGER), i.id,
+                       'Invoice ' || i.invoice_number, i.created_at
+                FROM temp.import_invoice_items s
+                JOIN invoices i ON i.invoice_number = s.invoice_number
+                WHERE s.product_id IS NOT NULL
+                ORDER BY s.rowid
+            """)
+        conn.commit()
+        
+        result['invoices'] += len(invoice_rows) - skipped
+        result['lines'] += lines
+        result['skipped'] += skipped
+    
+    def _finish(self, conn):
+        """Move the invoice number sequence past imported numbers and fold them into sales_daily"""
+        row = conn.execute("SELECT invoice_prefix FROM shop_settings WHERE id = 1").fetchone()
+        prefix = (row[0] if row else None) or 'INV'
+        conn.execute("""
+            INSERT INTO invoice_sequence (prefix, last_number)
+            SELECT :prefix, MAX(CAST(SUBSTR(invoice_number, :start) AS INTEGER))
+            FROM invoices
+            WHERE SUBSTR(invoice_number, 1, :length) = :prefix AND LENGTH(invoice_number) > :length
+              AND SUBSTR(invoice_number, :start) NOT GLOB '*[^0-9]*'
+            HAVING COUNT(*) > 0
+            ON CONFLICT (prefix) DO UPDATE SET last_number = MAX(last_number, excluded.last_number)
+        """, {'prefix': prefix, 'start': len(prefix) + 1, 'length': len(prefix)})
+        ReorderForecaster(self.db_path).update_sales_history(conn)
+        conn.commit()
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Import past invoices from another billing tool (CSV or Excel)")
+    parser.add_argument("file", help="CSV or XLSX file with one row per invoice line")
+    parser.add_argument("--database", default="invoice_database.db", help="Database file")
+    parser.add_argument("--record-stock", action="store_true",
+                        help="Record the sales in the stock ledger and rebuild stock levels")
+    args = parser.parse_args()
+    
+    result = InvoiceImporter(args.database, record_stock=args.record_stock).import_file(
+        args.file, progress=lambda percent, message: print(f"{percent:3d}% {message}"))
+    print(f"{result['invoices']:,} invoices, {result['lines']:,} lines imported; "
+          f"{result['skipped']:,} already present; {len(result['errors']):,} rejected "
+          f"({result['seconds']:.1f} s, {result['lines_per_second']:,.0f} lines/s)")
+    for error in result['errors'][:20]:
+        print(f"Line {error['line']}: {error['error']}")
@@ -7,19 +7,35 @@ from reportlab.platypus import PageBreak, KeepTogether
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.graphics.shapes import Drawing, Group
 import os
+import calendar
+from io import BytesIO
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from .gst_calculator import GSTCalculator
+from .receipt_renderer import ReceiptRenderer
+from .qr_generator import QRCodeGenerator
+from .asset_cache import logo_cache
+from .artifact_store import ArtifactStore
+
+# QR codes can be passed as an image path, PNG bytes or a vector drawing
+QRSource = Union[str, bytes, Drawing]
 
 class PDFGenerator:
     """Generate professional PDF invoices"""
     
-    def __init__(self):
+    def __init__(self, artifact_store: Optional[ArtifactStore] = None):
         self.page_size = A4
         self.margin = 0.5 * inch
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.receipt_renderer = ReceiptRenderer()
+        # Store for PDFs generated without an explicit path (shared default if None)
+        self.artifact_store = artifact_store
+    
+    def _artifact_store(self) -> ArtifactStore:
+        return self.artifact_store or ArtifactStore.default()
     
     def _setup_custom_styles(self):
         """Setup custom paragraph styles"""
@@ -57,9 +73,27 @@ class PDFGenerator:
             textColor=gray
         ))
     
+    def _qr_flowable(self, qr_code: Optional[QRSource], size: float):
+        """Build a QR flowable from an image path, in-memory PNG bytes or a vector drawing"""
+        if qr_code is None:
+            return None
+        if isinstance(qr_code, Drawing):
+            # Rescale the vector QR to the slot instead of re-rendering it
+            scale = size / qr_code.width
+            scaled = Drawing(size, size)
+            scaled.add(Group(*qr_code.contents, transform=(scale, 0, 0, scale, 0, 0)))
+            return scaled
+        if not qr_code:
+            return None
+        if isinstance(qr_code, bytes):
+            return Image(BytesIO(qr_code), width=size, height=size)
+        if os.path.exists(qr_code):
+            return Image(qr_code, width=size, height=size)
+        return None
+    
     def generate_invoice_pdf(self, invoice_data: Dict, shop_data: Dict, 
                            customer_data: Dict, template: str = "template1",
-                           qr_code_path: Optional[str] = None,
+                           qr_code_path: Optional[QRSource] = None,
                            logo_path: Optional[str] = None,
                            save_path: Optional[str] = None) -> str:
         """
@@ -70,16 +104,16 @@ class PDFGenerator:
             shop_data: Shop information
             customer_data: Customer information
             template: Template style to use
-            qr_code_path: Path to QR code image
+            qr_code_path: Path to QR code image, PNG bytes or vector Drawing
             logo_path: Path to shop logo
             save_path: Path to save PDF
             
         Returns:
             Path to generated PDF
         """
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = f"invoice_{invoice_data['invoice_number']}_{timestamp}.pdf"
+        store = self._artifact_store() if save_path is None else None
+        if store is not None:
+            save_path = store.new_path("invoice", ".pdf", invoice_data['invoice_number'])
         
         # Create PDF document
         doc = SimpleDocTemplate(
@@ -92,21 +126,50 @@ class PDFGenerator:
         )
         
         # Build story (content)
-        story = []
-        
-        if template == "template1":
-            story = self._build_template1(invoice_data, shop_data, customer_data, qr_code_path, logo_path)
-        elif template == "template2":
-            story = self._build_template2(invoice_data, shop_data, customer_data, qr_code_path, logo_path)
-        else:
-            story = self._build_template3(invoice_data, shop_data, customer_data, qr_code_path, logo_path)
+        story = self._build_invoice_story(invoice_data, shop_data, customer_data,
+                                          template, qr_code_path, logo_path)
         
         # Build PDF
         doc.build(story)
+        if store is not None:
+            store.register(save_path, "invoice", invoice_data['invoice_number'])
         return save_path
     
+    def generate_invoice_pdf_batch(self, invoices: List[Tuple[Dict, Dict]], shop_data: Dict,
+                                   template: str = "template1",
+                                   logo_path: Optional[str] = None,
+                                   output_dir: Optional[str] = None) -> List[str]:
+        """
+        Generate PDFs for many invoices, with payment QR codes encoded in one batch
+        
+        Args:
+            invoices: List of (invoice_data, customer_data) pairs
+            shop_data: Shop information
+            template: Template style to use
+            logo_path: Path to shop logo
+            output_dir: Directory to write PDFs into (the artifact store if None)
+            
+        Returns:
+            Paths to generated PDFs, in input order
+        """
+        qr_codes = [None] * len(invoices)
+        if shop_data.get('upi_id'):
+            payments = [(invoice_data['total_amount'], f"Payment for {invoice_data['invoice_number']}")
+                        for invoice_data, _ in invoices]
+            qr_codes = QRCodeGenerator.generate_upi_payment_qr_batch(
+                shop_data['upi_id'], shop_data.get('shop_name', 'Shop'), payments)
+        
+        paths = []
+        for (invoice_data, customer_data), qr_code in zip(invoices, qr_codes):
+            save_path = None
+            if output_dir is not None:
+                save_path = os.path.join(output_dir, f"invoice_{invoice_data['invoice_number']}.pdf")
+            paths.append(self.generate_invoice_pdf(invoice_data, shop_data, customer_data,
+                                                   template, qr_code, logo_path, save_path))
+        return paths
+    
     def _build_template1(self, invoice_data: Dict, shop_data: Dict, 
-                         customer_data: Dict, qr_code_path: Optional[str], 
+                         customer_data: Dict, qr_code_path: Optional[QRSource], 
                          logo_path: Optional[str]) -> List:
         """Build Template 1 - Clean and professional"""
         story = []
@@ -118,8 +181,8 @@ class PDFGenerator:
         shop_info = []
         if logo_path and os.path.exists(logo_path):
             try:
-                logo = Image(logo_path, width=2*inch, height=1*inch)
-                shop_info.append(logo)
+                logo_png = logo_cache.get_variant_png(logo_path, 'header')
+                shop_info.append(Image(BytesIO(logo_png), width=2*inch, height=1*inch))
             except:
                 pass
         
@@ -138,12 +201,12 @@ class PDFGenerator:
             Paragraph("", self.styles['Normal'])  # Spacer
         ]
         
-        if qr_code_path and os.path.exists(qr_code_path):
-            try:
-                qr_img = Image(qr_code_path, width=1.5*inch, height=1.5*inch)
+        try:
+            qr_img = self._qr_flowable(qr_code_path, 1.5*inch)
+            if qr_img:
                 invoice_info.append(qr_img)
-            except:
-                pass
+        except:
+            pass
         
         header_table_data.append([shop_info, invoice_info])
         
@@ -241,7 +304,7 @@ class PDFGenerator:
         return story
     
     def _build_template2(self, invoice_data: Dict, shop_data: Dict, 
-                         customer_data: Dict, qr_code_path: Optional[str], 
+                         customer_data: Dict, qr_code_path: Optional[QRSource], 
                          logo_path: Optional[str]) -> List:
         """Build Template 2 - Modern design"""
         story = []
@@ -280,17 +343,17 @@ class PDFGenerator:
         story.append(Spacer(1, 20))
         
         # QR Code on the right if available
-        if qr_code_path and os.path.exists(qr_code_path):
-            try:
-                qr_img = Image(qr_code_path, width=1.2*inch, height=1.2*inch)
+        try:
+            qr_img = self._qr_flowable(qr_code_path, 1.2*inch)
+            if qr_img:
                 qr_table = Table([[qr_img]], colWidths=[1.2*inch])
                 qr_table.setStyle(TableStyle([
                     ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
                 ]))
                 story.append(qr_table)
                 story.append(Spacer(1, 10))
-            except:
-                pass
+        except:
+            pass
         
         # Items table with alternating colors
         items_data = [["ITEM DESCRIPTION", "QTY", "RATE", "GST%", "TOTAL"]]
@@ -369,7 +432,7 @@ class PDFGenerator:
         return story
     
     def _build_template3(self, invoice_data: Dict, shop_data: Dict, 
-                         customer_data: Dict, qr_code_path: Optional[str], 
+                         customer_data: Dict, qr_code_path: Optional[QRSource], 
                          logo_path: Optional[str]) -> List:
         """Build Template 3 - Minimalist design"""
         story = []
@@ -400,69 +463,157 @@ class PDFGenerator:
         story.append(Paragraph(f"GST: ₹{invoice_data.get('gst_amount', 0):.2f}", self.styles['Normal']))
         story.append(Paragraph(f"<b>Total: ₹{invoice_data.get('total_amount', 0):.2f}</b>", self.styles['BoldStyle']))
         
-        if qr_code_path and os.path.exists(qr_code_path):
-            story.append(Spacer(1, 20))
-            try:
-                qr_img = Image(qr_code_path, width=1*inch, height=1*inch)
+        try:
+            qr_img = self._qr_flowable(qr_code_path, 1*inch)
+            if qr_img:
+                story.append(Spacer(1, 20))
                 story.append(qr_img)
-            except:
-                pass
+        except:
+            pass
         
         story.append(Spacer(1, 20))
         story.append(Paragraph("Thank you!", self.styles['FooterStyle']))
         
         return story
     
-    def generate_receipt_pdf(self, receipt_data: Dict, shop_data: Dict, 
-                           save_path: Optional[str] = None) -> str:
-        """Generate thermal printer style receipt"""
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = f"receipt_{timestamp}.pdf"
+    def generate_statement_pdf(self, customer_id: int, period: Union[str, Tuple[str, str]],
+                               db, shop_data: Optional[Dict] = None,
+                               template: str = "template1",
+                               logo_path: Optional[str] = None,
+                               save_path: Optional[str] = None) -> str:
+        """
+        Generate a customer statement bundling all invoices of a period
+        
+        Args:
+            customer_id: Customer to build the statement for
+            period: Month as "YYYY-MM", or a (start_date, end_date) tuple
+            db: DatabaseManager to stream invoices from
+            shop_data: Shop information (loaded from db if not given)
+            template: Template style used for each invoice page
+            logo_path: Path to shop logo
+            save_path: Path to save PDF
+            
+        Returns:
+            Path to generated PDF
+        """
+        if isinstance(period, str):
+            year, month = (int(part) for part in period.split('-')[:2])
+            last_day = calendar.monthrange(year, month)[1]
+            start_date, end_date = f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day:02d}"
+        else:
+            start_date, end_date = period
+        
+        if shop_data is None:
+            shop_data = db.get_shop_settings()
+        # Templates expect strings, while DB rows carry NULLs for unset fields
+        customer = db.get_customer(customer_id) or {}
+        customer_data = {key: ('' if value is None else value) for key, value in customer.items()}
+        
+        store = self._artifact_store() if save_path is None else None
+        if store is not None:
+            save_path = store.new_path(f"statement_{customer_id}", ".pdf")
+        
+        # Single pass over the period: collect invoice pages and summary rows together
+        invoice_story = []
+        summary_rows = []
+        total_amount = 0.0
+        for invoice in db.iter_invoices(customer_id, start_date, end_date):
+            invoice_story.append(PageBreak())
+            invoice_story.extend(self._build_invoice_story(invoice, shop_data, customer_data,
+                                                           template, None, logo_path))
+            summary_rows.append([
+                invoice['invoice_number'],
+                str(invoice.get('created_at', ''))[:10],
+                (invoice.get('payment_status') or '').upper(),
+                f"₹{invoice.get('total_amount', 0):.2f}"
+            ])
+            total_amount += invoice.get('total_amount', 0) or 0
+        
+        story = self._build_statement_cover(shop_data, customer_data, start_date, end_date,
+                                            summary_rows, total_amount)
+        story.extend(invoice_story)
         
         doc = SimpleDocTemplate(
             save_path,
-            pagesize=(4*inch, 8*inch),  # Thermal paper size
-            leftMargin=0.2*inch,
-            rightMargin=0.2*inch,
-            topMargin=0.2*inch,
-            bottomMargin=0.2*inch
+            pagesize=self.page_size,
+            leftMargin=self.margin,
+            rightMargin=self.margin,
+            topMargin=self.margin,
+            bottomMargin=self.margin
         )
-        
+        doc.build(story)
+        if store is not None:
+            store.register(save_path, "statement")
+        return save_path
+    
+    def _build_invoice_story(self, invoice_data: Dict, shop_data: Dict, customer_data: Dict,
+                             template: str, qr_code_path: Optional[QRSource],
+                             logo_path: Optional[str]) -> List:
+        """Build the flowables for a single invoice using the chosen template"""
+        if template == "template1":
+            return self._build_template1(invoice_data, shop_data, customer_data, qr_code_path, logo_path)
+        elif template == "template2":
+            return self._build_template2(invoice_data, shop_data, customer_data, qr_code_path, logo_path)
+        return self._build_template3(invoice_data, shop_data, customer_data, qr_code_path, logo_path)
+    
+    def _build_statement_cover(self, shop_data: Dict, customer_data: Dict, start_date: str,
+                               end_date: str, summary_rows: List[List[str]],
+                               total_amount: float) -> List:
+        """Build statement summary cover page"""
         story = []
         
-        # Centered shop name
         story.append(Paragraph(f"<b>{shop_data.get('shop_name', 'Shop Name')}</b>", self.styles['Heading2']))
         story.append(Paragraph(shop_data.get('address', ''), self.styles['Normal']))
-        story.append(Paragraph(f"Phone: {shop_data.get('phone', '')}", self.styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Receipt info
-        story.append(Paragraph("=" * 30, self.styles['Normal']))
-        story.append(Paragraph(f"Receipt: {receipt_data.get('receipt_number', '')}", self.styles['Normal']))
-        story.append(Paragraph(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}", self.styles['Normal']))
-        story.append(Paragraph("=" * 30, self.styles['Normal']))
-        story.append(Spacer(1, 8))
-        
-        # Items
-        for item in receipt_data.get('items', []):
-            item_line = f"{item.get('name', '')[:20]}"
-            price_line = f"{item.get('quantity', 0)} x {item.get('price', 0):.2f}"
-            total_line = f"{item.get('total', 0):.2f}"
-            
-            story.append(Paragraph(item_line, self.styles['Normal']))
-            story.append(Paragraph(f"{price_line}    {total_line}", self.styles['Normal']))
+        if shop_data.get('gstin'):
+            story.append(Paragraph(f"GSTIN: {shop_data['gstin']}", self.styles['Normal']))
+        story.append(Spacer(1, 20))
         
-        story.append(Spacer(1, 8))
-        story.append(Paragraph("-" * 30, self.styles['Normal']))
+        story.append(Paragraph("<b>STATEMENT OF ACCOUNT</b>", self.styles['InvoiceTitle']))
+        story.append(Paragraph(f"<b>Customer:</b> {customer_data.get('name', '')}", self.styles['Normal']))
+        if customer_data.get('phone'):
+            story.append(Paragraph(f"Phone: {customer_data['phone']}", self.styles['Normal']))
+        if customer_data.get('gstin'):
+            story.append(Paragraph(f"GSTIN: {customer_data['gstin']}", self.styles['Normal']))
+        story.append(Paragraph(f"<b>Period:</b> {start_date} to {end_date}", self.styles['Normal']))
+        story.append(Spacer(1, 20))
         
-        # Totals
-        story.append(Paragraph(f"Subtotal: {receipt_data.get('subtotal', 0):.2f}", self.styles['Normal']))
-        story.append(Paragraph(f"GST: {receipt_data.get('gst_amount', 0):.2f}", self.styles['Normal']))
-        story.append(Paragraph(f"Total: {receipt_data.get('total_amount', 0):.2f}", self.styles['BoldStyle']))
+        if not summary_rows:
+            story.append(Paragraph("No invoices in this period.", self.styles['Normal']))
+            return story
         
-        story.append(Spacer(1, 12))
-        story.append(Paragraph("Thank you!", self.styles['Normal']))
+        table_data = [["INVOICE NO", "DATE", "PAYMENT", "AMOUNT"]]
+        table_data.extend(summary_rows)
+        table_data.append(["", "", f"{len(summary_rows)} invoices", f"₹{total_amount:.2f}"])
         
-        doc.build(story)
-        return save_path
+        summary_table = Table(table_data, colWidths=[2.2*inch, 1.5*inch, 1.5*inch, 1.8*inch],
+                              repeatRows=1)
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), gray),
+            ('TEXTCOLOR', (0, 0), (-1, 0), white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -2), 1, black),
+            ('LINEABOVE', (2, -1), (-1, -1), 1, black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        
+        story.append(summary_table)
+        return story
+    
+    def generate_receipt_pdf(self, receipt_data: Dict, shop_data: Dict, 
+                           save_path: Optional[str] = None,
+                           logo_path: Optional[str] = None) -> str:
+        """Generate thermal printer style receipt"""
+        if save_path is not None:
+            return self.receipt_renderer.render_pdf(receipt_data, shop_data, save_path, logo_path)
+        
+        store = self._artifact_store()
+        receipt_number = receipt_data.get('receipt_number') or None
+        save_path = store.new_path("receipt", ".pdf", receipt_number)
+        self.receipt_renderer.render_pdf(receipt_data, shop_data, save_path, logo_path)
+        return store.register(save_path, "receipt", receipt_number)
+    
+    def generate_receipt_escpos(self, receipt_data: Dict, shop_data: Dict) -> bytes:
+        """Generate raw ESC/POS bytes for sending a receipt straight to a thermal printer"""
+        return self.receipt_renderer.render_escpos(receipt_data, shop_data)
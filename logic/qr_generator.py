@@ -1,11 +1,262 @@
 import qrcode
 import os
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from datetime import datetime
+from .asset_cache import logo_cache
+from .artifact_store import ArtifactStore
+
+ERROR_CORRECTION_LEVELS = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+@lru_cache(maxsize=256)
+def _encode_png(data: str, box_size: int, border: int, error_correction: str) -> bytes:
+    """Encode data as a PNG, cached by payload and style"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECTION_LEVELS[error_correction],
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@lru_cache(maxsize=256)
+def _encode_matrix(data: str, border: int, error_correction: str) -> Tuple[Tuple[bool, ...], ...]:
+    """Encode data as a module matrix (border included), cached by payload and style"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECTION_LEVELS[error_correction],
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+def _new_batch_encoder(version: int, mask_pattern: int, border: int, error_correction: str) -> qrcode.QRCode:
+    """Encoder pre-sized for a batch (see generate_upi_payment_qr_batch)"""
+    return qrcode.QRCode(
+        version=version,
+        error_correction=ERROR_CORRECTION_LEVELS[error_correction],
+        border=border,
+        mask_pattern=mask_pattern,
+    )
+
+def _encode_with(qr: qrcode.QRCode, data: str, error_correction: str) -> Tuple[Tuple[bool, ...], ...]:
+    """Encode one payload with a pre-sized encoder (not thread-safe; one encoder per thread)"""
+    qr.clear()
+    qr.add_data(data)
+    try:
+        qr.make(fit=False)
+    except qrcode.exceptions.DataOverflowError:
+        # Payload outgrew the pre-sized version; fall back to a fresh fit
+        return _encode_matrix(data, qr.border, error_correction)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+# Encoder of a ProcessPoolExecutor worker, set by its initializer
+_batch_encoder = None
+_batch_error_correction = None
+
+def _init_batch_encoder(version: int, mask_pattern: int, border: int, error_correction: str):
+    global _batch_encoder, _batch_error_correction
+    _batch_encoder = _new_batch_encoder(version, mask_pattern, border, error_correction)
+    _batch_error_correction = error_correction
+
+def _encode_batch_matrix(data: str) -> Tuple[Tuple[bool, ...], ...]:
+    """Encode one payload with the worker process's batch encoder"""
+    return _encode_with(_batch_encoder, data, _batch_error_correction)
 
 class QRCodeGenerator:
     """Generate QR codes for invoices and payments"""
     
+    @staticmethod
+    def build_upi_url(upi_id: str, amount: float, shop_name: str, note: str = "") -> str:
+        """Build UPI payment URL"""
+        upi_url = f"upi://pay?pa={upi_id}&pn={shop_name}&am={amount:.2f}&cu=INR"
+        
+        if note:
+            upi_url += f"&tn={note}"
+        return upi_url
+    
+    @staticmethod
+    def generate_qr_bytes(data: str, box_size: int = 10, border: int = 4,
+                          error_correction: str = 'L') -> bytes:
+        """
+        Generate QR code as PNG bytes without touching disk
+        
+        Args:
+            data: Data to encode in QR code
+            box_size: Size of each box in pixels
+            border: Border size in boxes
+            error_correction: Error correction level ('L', 'M', 'Q' or 'H')
+            
+        Returns:
+            PNG image bytes (identical payloads are served from cache)
+        """
+        return _encode_png(data, box_size, border, error_correction)
+    
+    @staticmethod
+    def generate_qr_image(data: str, box_size: int = 10, border: int = 4,
+                          error_correction: str = 'L'):
+        """Generate QR code as a PIL image (a fresh copy that callers may modify)"""
+        from PIL import Image
+        
+        return Image.open(BytesIO(_encode_png(data, box_size, border, error_correction)))
+    
+    @staticmethod
+    def generate_upi_payment_qr_bytes(upi_id: str, amount: float, shop_name: str,
+                                      note: str = "") -> bytes:
+        """Generate UPI payment QR code as PNG bytes, ready to embed in a PDF"""
+        return _encode_png(QRCodeGenerator.build_upi_url(upi_id, amount, shop_name, note), 10, 4, 'L')
+    
+    @staticmethod
+    def generate_qr_drawing(data: str, size: float = 72, border: int = 4,
+                            error_correction: str = 'L'):
+        """
+        Generate QR code as a ReportLab vector drawing
+        
+        Dark modules are merged into horizontal runs and emitted as a single
+        filled path, so the PDF embeds a few hundred path operators instead
+        of a raster image.
+        
+        Args:
+            data: Data to encode in QR code
+            size: Width and height of the drawing in points
+            border: Border size in modules
+            error_correction: Error correction level ('L', 'M', 'Q' or 'H')
+            
+        Returns:
+            reportlab.graphics.shapes.Drawing
+        """
+        return QRCodeGenerator._matrix_to_drawing(_encode_matrix(data, border, error_correction), size)
+    
+    @staticmethod
+    def _matrix_to_drawing(matrix: Tuple[Tuple[bool, ...], ...], size: float):
+        """Build a vector drawing from a module matrix"""
+        from reportlab.graphics.shapes import Drawing, Path, Rect
+        from reportlab.lib.colors import black, white
+        
+        module = size / len(matrix)
+        
+        path = Path(fillColor=black, strokeColor=None, strokeWidth=0)
+        for r, row in enumerate(matrix):
+            y = size - (r + 1) * module
+            c = 0
+            while c < len(row):
+                if not row[c]:
+                    c += 1
+                    continue
+                start = c
+                while c < len(row) and row[c]:
+                    c += 1
+                x0, x1 = start * module, c * module
+                path.moveTo(x0, y)
+                path.lineTo(x1, y)
+                path.lineTo(x1, y + module)
+                path.lineTo(x0, y + module)
+                path.closePath()
+        
+        drawing = Drawing(size, size)
+        drawing.add(Rect(0, 0, size, size, fillColor=white, strokeColor=None))
+        drawing.add(path)
+        return drawing
+    
+    @staticmethod
+    def _matrix_to_png(matrix: Tuple[Tuple[bool, ...], ...], box_size: int = 10) -> bytes:
+        """Build a PNG from a module matrix"""
+        from PIL import Image
+        
+        count = len(matrix)
+        img = Image.new('1', (count, count))
+        img.putdata([0 if dark else 1 for row in matrix for dark in row])
+        img = img.resize((count * box_size, count * box_size), Image.NEAREST)
+        
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+    
+    @staticmethod
+    def generate_upi_payment_drawing(upi_id: str, amount: float, shop_name: str,
+                                     note: str = "", size: float = 72):
+        """Generate UPI payment QR code as a vector drawing for PDF embedding"""
+        return QRCodeGenerator.generate_qr_drawing(
+            QRCodeGenerator.build_upi_url(upi_id, amount, shop_name, note), size)
+    
+    @staticmethod
+    def generate_upi_payment_qr_batch(upi_id: str, shop_name: str,
+                                      payments: List[Tuple[float, str]],
+                                      output: str = "drawing", size: float = 72,
+                                      max_workers: Optional[int] = None,
+                                      parallel_threshold: int = 64) -> List:
+        """
+        Generate UPI payment QR codes for many invoices at once
+        
+        The QR version and mask pattern are chosen once from the longest
+        payload in the batch, so each code is encoded without the per-call
+        version search and eight-way mask scoring, and every worker process
+        reuses a single encoder.
+        
+        Args:
+            upi_id: UPI ID (e.g., shop@upi)
+            shop_name: Shop name for display
+            payments: List of (amount, note) pairs
+            output: "drawing" for vector drawings, "png" for PNG bytes
+            size: Drawing size in points (drawing output only)
+            max_workers: Worker processes (defaults to CPU count)
+            parallel_threshold: Batches smaller than this are encoded in-process
+            
+        Returns:
+            QR codes in the same order as `payments`
+        """
+        if not payments:
+            return []
+        
+        urls = [QRCodeGenerator.build_upi_url(upi_id, amount, shop_name, note)
+                for amount, note in payments]
+        
+        sizing = qrcode.QRCode(error_correction=ERROR_CORRECTION_LEVELS['L'])
+        sizing.add_data(max(urls, key=len))
+        version = sizing.best_fit()
+        mask_pattern = sizing.best_mask_pattern()
+        
+        if len(urls) < parallel_threshold:
+            # A local encoder, so concurrent batches on other threads don't share one
+            encoder = _new_batch_encoder(version, mask_pattern, 4, 'L')
+            matrices = [_encode_with(encoder, url, 'L') for url in urls]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_encoder,
+                                     initargs=(version, mask_pattern, 4, 'L')) as executor:
+                matrices = list(executor.map(_encode_batch_matrix, urls, chunksize=16))
+        
+        if output == "png":
+            return [QRCodeGenerator._matrix_to_png(matrix) for matrix in matrices]
+        return [QRCodeGenerator._matrix_to_drawing(matrix, size) for matrix in matrices]
+    
+    @staticmethod
+    def clear_cache():
+        """Drop all cached QR images"""
+        _encode_png.cache_clear()
+        _encode_matrix.cache_clear()
+    
+    @staticmethod
+    def _write(png: bytes, save_path: Optional[str], kind: str) -> str:
+        """Write PNG to `save_path`, or into the artifact store when no path is given"""
+        if save_path is None:
+            return ArtifactStore.default().save_bytes(png, kind, ".png")
+        with open(save_path, 'wb') as f:
+            f.write(png)
+        return save_path
+    
     @staticmethod
     def generate_upi_payment_qr(upi_id: str, amount: float, shop_name: str, 
                                note: str = "", save_path: Optional[str] = None) -> str:
@@ -22,32 +273,9 @@ class QRCodeGenerator:
         Returns:
             Path to generated QR code image
         """
-        # Create UPI payment URL
-        upi_url = f"upi://pay?pa={upi_id}&pn={shop_name}&am={amount:.2f}&cu=INR"
-        
-        if note:
-            upi_url += f"&tn={note}"
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(upi_url)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save image
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = f"qr_payment_{timestamp}.png"
+        png = QRCodeGenerator.generate_upi_payment_qr_bytes(upi_id, amount, shop_name, note)
         
-        img.save(save_path)
-        return save_path
+        return QRCodeGenerator._write(png, save_path, "qr_payment")
     
     @staticmethod
     def generate_invoice_qr(invoice_number: str, customer_phone: str, 
@@ -83,26 +311,9 @@ class QRCodeGenerator:
         if verification_url:
             data_string += f"|URL:{verification_url}"
         
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data_string)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save image
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = f"qr_invoice_{timestamp}.png"
+        png = _encode_png(data_string, 10, 4, 'L')
         
-        img.save(save_path)
-        return save_path
+        return QRCodeGenerator._write(png, save_path, "qr_invoice")
     
     @staticmethod
     def generate_business_card_qr(shop_name: str, phone: str, email: str, 
@@ -132,26 +343,9 @@ ADR:{address}
 {'NOTE:GSTIN: ' + gstin if gstin else ''}
 END:VCARD"""
         
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(card_data)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save image
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = f"qr_business_{timestamp}.png"
+        png = _encode_png(card_data, 10, 4, 'L')
         
-        img.save(save_path)
-        return save_path
+        return QRCodeGenerator._write(png, save_path, "qr_business")
     
     @staticmethod
     def generate_custom_qr(data: str, save_path: Optional[str] = None, 
@@ -168,26 +362,9 @@ END:VCARD"""
         Returns:
             Path to generated QR code image
         """
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=box_size,
-            border=border,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
+        png = _encode_png(data, box_size, border, 'L')
         
-        # Save image
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = f"qr_custom_{timestamp}.png"
-        
-        img.save(save_path)
-        return save_path
+        return QRCodeGenerator._write(png, save_path, "qr_custom")
     
     @staticmethod
     def generate_qr_with_logo(data: str, logo_path: str, save_path: Optional[str] = None) -> str:
@@ -202,32 +379,18 @@ END:VCARD"""
         Returns:
             Path to generated QR code image
         """
-        from PIL import Image
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,  # High error correction for logo
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-        
-        # Create QR image
-        img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
+        # Create QR image (high error correction leaves room for the logo)
+        img = QRCodeGenerator.generate_qr_image(data, error_correction='H').convert('RGB')
         
         # Add logo if provided
         if os.path.exists(logo_path):
             try:
-                logo = Image.open(logo_path)
-                
                 # Calculate logo size (about 20% of QR code size)
                 qr_width, qr_height = img.size
                 logo_size = min(qr_width, qr_height) // 5
                 
-                # Resize logo
-                logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
+                # Resized logo is decoded once and reused from the cache
+                logo = logo_cache.get_image(logo_path, (logo_size, logo_size))
                 
                 # Calculate position to center logo
                 pos = ((qr_width - logo_size) // 2, (qr_height - logo_size) // 2)
@@ -238,12 +401,9 @@ END:VCARD"""
                 print(f"Error adding logo to QR code: {e}")
         
         # Save image
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = f"qr_logo_{timestamp}.png"
-        
-        img.save(save_path)
-        return save_path
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        return QRCodeGenerator._write(buffer.getvalue(), save_path, "qr_logo")
     
     @staticmethod
     def create_qr_directory(base_path: str = "assets/qr_codes") -> str:
@@ -265,6 +425,9 @@ END:VCARD"""
         """
         Clean up old QR code files
         
+        QR codes written without an explicit path live in the artifact store;
+        use ArtifactStore.cleanup() for those. This handles loose directories.
+        
         Args:
             directory: Directory containing QR codes
             days_old: Remove files older than this many days
@@ -277,13 +440,12 @@ END:VCARD"""
         current_time = time.time()
         cutoff_time = current_time - (days_old * 24 * 60 * 60)
         
-        for filename in os.listdir(directory):
-            file_path = os.path.join(directory, filename)
-            if os.path.isfile(file_path):
-                file_mtime = os.path.getmtime(file_path)
-                if file_mtime < cutoff_time:
+        # scandir returns type and (on Windows) stat data with the listing
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mtime < cutoff_time:
                     try:
-                        os.remove(file_path)
-                        print(f"Removed old QR file: {filename}")
+                        os.remove(entry.path)
+                        print(f"Removed old QR file: {entry.name}")
                     except Exception as e:
-                        print(f"Error removing {filename}: {e}")
+                        print(f"Error removing {entry.name}: {e}")
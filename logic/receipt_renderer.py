@@ -0,0 +1,154 @@
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+import textwrap
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from .asset_cache import logo_cache
+from .artifact_store import ArtifactStore
+
+class ReceiptRenderer:
+    """Render thermal printer receipts directly on a canvas or as ESC/POS bytes"""
+    
+    # ESC/POS control sequences
+    ESC_INIT = b"\x1b@"
+    ESC_BOLD_ON = b"\x1bE\x01"
+    ESC_BOLD_OFF = b"\x1bE\x00"
+    ESC_FEED = b"\x1bd\x04"
+    GS_CUT = b"\x1dV\x01"
+    
+    def __init__(self, columns: int = 42, page_width: float = 4 * inch,
+                 margin: float = 0.2 * inch):
+        self.columns = columns
+        self.page_width = page_width
+        self.margin = margin
+        # Courier glyphs are 0.6 em wide, so size the font to fit the columns exactly
+        self.font_size = (page_width - 2 * margin) / (columns * 0.6)
+        self.leading = self.font_size * 1.2
+    
+    def build_lines(self, receipt_data: Dict, shop_data: Dict) -> List[Tuple[str, bool]]:
+        """
+        Lay out receipt as fixed-width text lines
+        
+        Args:
+            receipt_data: Receipt information
+            shop_data: Shop information
+        
+        Returns:
+            List of (text, bold) tuples, each at most `columns` characters wide
+        """
+        cols = self.columns
+        lines = []
+        
+        # Shop header
+        lines.append((shop_data.get('shop_name', 'Shop Name')[:cols].center(cols), True))
+        for part in textwrap.wrap(shop_data.get('address', '') or '', cols):
+            lines.append((part.center(cols), False))
+        lines.append((f"Phone: {shop_data.get('phone', '')}"[:cols].center(cols), False))
+        lines.append(("", False))
+        
+        # Receipt info
+        lines.append(("=" * cols, False))
+        lines.append((f"Receipt: {receipt_data.get('receipt_number', '')}"[:cols], False))
+        lines.append((f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}", False))
+        lines.append(("=" * cols, False))
+        
+        # Items
+        for item in receipt_data.get('items', []):
+            lines.append((str(item.get('name', ''))[:cols], False))
+            price_line = f"  {item.get('quantity', 0)} x {item.get('price', 0):.2f}"
+            lines.append((self._two_columns(price_line, f"{item.get('total', 0):.2f}"), False))
+        
+        lines.append(("-" * cols, False))
+        
+        # Totals
+        lines.append((self._two_columns("Subtotal:", f"{receipt_data.get('subtotal', 0):.2f}"), False))
+        lines.append((self._two_columns("GST:", f"{receipt_data.get('gst_amount', 0):.2f}"), False))
+        lines.append((self._two_columns("Total:", f"{receipt_data.get('total_amount', 0):.2f}"), True))
+        
+        lines.append(("", False))
+        lines.append(("Thank you!".center(cols), False))
+        
+        return lines
+    
+    def _two_columns(self, left: str, right: str) -> str:
+        """Left-align `left` and right-align `right` on one line"""
+        left = left[:self.columns - len(right) - 1]
+        return left + " " * (self.columns - len(left) - len(right)) + right
+    
+    def render_pdf(self, receipt_data: Dict, shop_data: Dict,
+                   save_path: Optional[str] = None,
+                   logo_path: Optional[str] = None) -> str:
+        """
+        Render receipt to a single PDF page sized to its content
+        
+        Args:
+            receipt_data: Receipt information
+            shop_data: Shop information
+            save_path: Path to save PDF (a new artifact in the default store if None)
+            logo_path: Path to shop logo printed above the header
+        
+        Returns:
+            Path to generated PDF
+        """
+        store = ArtifactStore.default() if save_path is None else None
+        receipt_number = receipt_data.get('receipt_number') or None
+        if store is not None:
+            save_path = store.new_path("receipt", ".pdf", receipt_number)
+        
+        lines = self.build_lines(receipt_data, shop_data)
+        page_height = len(lines) * self.leading + 2 * self.margin
+        
+        logo = logo_cache.get_image(logo_path, *logo_cache.VARIANTS['receipt']) if logo_path else None
+        logo_width = logo_height = 0
+        if logo is not None:
+            logo_width = min(self.page_width - 2 * self.margin, 1.5 * inch)
+            logo_height = logo_width * logo.height / logo.width
+            page_height += logo_height + self.leading
+        
+        c = canvas.Canvas(save_path, pagesize=(self.page_width, page_height))
+        if logo is not None:
+            c.drawImage(ImageReader(logo), (self.page_width - logo_width) / 2,
+                        page_height - self.margin - logo_height,
+                        logo_width, logo_height, mask='auto')
+        
+        top = page_height - self.margin - (logo_height + self.leading if logo is not None else 0)
+        text = c.beginText(self.margin, top - self.font_size)
+        text.setLeading(self.leading)
+        
+        current_bold = None
+        for line, bold in lines:
+            if bold != current_bold:
+                text.setFont('Courier-Bold' if bold else 'Courier', self.font_size, self.leading)
+                current_bold = bold
+            text.textLine(line)
+        
+        c.drawText(text)
+        c.showPage()
+        c.save()
+        if store is not None:
+            store.register(save_path, "receipt", receipt_number)
+        return save_path
+    
+    def render_escpos(self, receipt_data: Dict, shop_data: Dict,
+                      encoding: str = 'cp437') -> bytes:
+        """
+        Render receipt as raw ESC/POS bytes for thermal printers
+        
+        Args:
+            receipt_data: Receipt information
+            shop_data: Shop information
+            encoding: Printer code page
+        
+        Returns:
+            Byte stream ready to send to the printer
+        """
+        out = [self.ESC_INIT]
+        for line, bold in self.build_lines(receipt_data, shop_data):
+            encoded = line.encode(encoding, errors='replace') + b"\n"
+            if bold:
+                out.extend([self.ESC_BOLD_ON, encoded, self.ESC_BOLD_OFF])
+            else:
+                out.append(encoded)
+        out.extend([self.ESC_FEED, self.GS_CUT])
+        return b"".join(out)
@@ -0,0 +1,258 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict
+
+from .backup import BackupManager
+
+# Tables whose changes are recorded in change_log (see schema.sql)
+REPLICATED_TABLES = ('customers', 'products', 'invoices', 'invoice_items', 'stock_transactions',
+                     'shop_settings', 'invoice_sequence')
+# Small tables without an id column, copied whole when any of their rows change
+WHOLE_TABLES = ('invoice_sequence',)
+
+class Replicator:
+    """
+    Keeps a standby copy of the database up to date from the change log
+    
+    Once a standby is set up, triggers on the primary append (table, row id,
+    operation) to change_log; until then nothing is logged.
+    Each batch reads the current state of the changed rows from the primary
+    and upserts or deletes them in the standby, recording the last applied
+    sequence number in the same standby transaction. Re-applying a batch is
+    harmless, so an interrupted run simply resumes.
+    """
+    
+    def __init__(self, primary_path: str, standby_path: str, batch_size: int = 500,
+                 prune: bool = True):
+        """
+        Args:
+            primary_path: Live database
+            standby_path: Standby database file (created from a snapshot if missing)
+            batch_size: Change log entries applied per standby transaction
+            prune: Delete change log entries from the primary once applied
+        """
+        self.primary_path = primary_path
+        self.standby_path = standby_path
+        self.batch_size = batch_size
+        self.prune = prune
+        self.applied_rows = 0
+        self.apply_seconds = 0.0
+        self._stop_event = threading.Event()
+    
+    def init_standby(self, progress=None):
+        """Turn on change logging and seed the standby with a snapshot of the primary, if it doesn't exist yet"""
+        primary = sqlite3.connect(self.primary_path, timeout=30)
+        # Logging starts before the snapshot, so no change falls between the two
+        if not primary.execute("SELECT enabled FROM change_log_state WHERE id = 1").fetchone()[0]:
+            primary.execute("UPDATE change_log_state SET enabled = 1 WHERE id = 1")
+            primary.commit()
+        last_seq = primary.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+        primary.close()
+        if os.path.exists(self.standby_path):
+            return
+        
+        # Changes logged after last_seq was read are replayed; replays are idempotent
+        BackupManager(self.primary_path).create_backup(self.standby_path, compress=False, progress=progress)
+        
+        standby = sqlite3.connect(self.standby_path)
+        standby.execute("DELETE FROM change_log")
+        # The standby isn't replicated further; a promoted standby re-enables this
+        standby.execute("UPDATE change_log_state SET enabled = 0 WHERE id = 1")
+        self._ensure_state(standby)
+        standby.execute("UPDATE replication_state SET last_seq = ?, applied_at = ? WHERE id = 1",
+                        (last_seq, time.time()))
+        standby.commit()
+        standby.close()
+    
+    @staticmethod
+    def _ensure_state(standby):
+        standby.execute("""
+            CREATE TABLE IF NOT EXISTS replication_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_seq INTEGER NOT NULL DEFAULT 0,
+                applied_at REAL
+            )
+        """)
+        standby.execute("INSERT OR IGNORE INTO replication_state (id, last_seq) VALUES (1, 0)")
+    
+    def _open(self):
+        self.init_standby()
+        primary = sqlite3.connect(self.primary_path, isolation_level=None, timeout=30)
+        standby = sqlite3.connect(self.standby_path, timeout=30)
+        self._ensure_state(standby)
+        standby.commit()
+        return primary, standby
+    
+    def sync_once(self) -> int:
+        """
+        Apply the next batch of changes to the standby
+        
+        Returns:
+            Number of change log entries applied (0 when caught up)
+        """
+        started = time.perf_counter()
+        primary, standby = self._open()
+        try:
+            last_seq = standby.execute("SELECT last_seq FROM replication_state WHERE id = 1").fetchone()[0]
+            
+            # One read transaction, so the batch sees a single primary snapshot
+            primary.execute("BEGIN")
+            entries = primary.execute("""
+                SELECT seq, table_name, row_id FROM change_log
+                WHERE seq > ? ORDER BY seq LIMIT ?
+            """, (last_seq, self.batch_size)).fetchall()
+            if not entries:
+                primary.execute("COMMIT")
+                return 0
+            
+            # Several changes to one row collapse into its current state
+            changed = {}
+            for _, table, row_id in entries:
+                changed.setdefault(table, set()).add(row_id)
+            
+            for table, row_ids in changed.items():
+                if table in WHOLE_TABLES:
+                    self._copy_table(primary, standby, table)
+                elif table in REPLICATED_TABLES:
+                    self._copy_rows(primary, standby, table, sorted(row_ids))
+            primary.execute("COMMIT")
+            
+            if 'products' in changed:
+                # INSERT OR REPLACE doesn't fire delete triggers, so recount
+                standby.execute("""
+                    UPDATE stock_alert_state SET low_stock_count =
+                        (SELECT COUNT(*) FROM products WHERE stock_quantity <= min_stock_alert)
+                    WHERE id = 1
+                """)
+            
+            new_seq = entries[-1][0]
+            standby.execute("DELETE FROM change_log")
+            standby.execute("UPDATE replication_state SET last_seq = ?, applied_at = ? WHERE id = 1",
+                            (new_seq, time.time()))
+            standby.commit()
+            
+            if self.prune:
+                primary.execute("DELETE FROM change_log WHERE seq <= ?", (new_seq,))
+            
+            self.applied_rows += len(entries)
+            self.apply_seconds += time.perf_counter() - started
+            return len(entries)
+        except BaseException:
+            standby.rollback()
+            raise
+        finally:
+            primary.close()
+            standby.close()
+    
+    @staticmethod
+    def _copy_rows(primary, standby, table: str, row_ids):
+        """Upsert rows that exist in the primary and delete the rest from the standby"""
+        for start in range(0, len(row_ids), 500):
+            chunk = row_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = primary.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders})", chunk)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+            
+            present = {row[columns.index('id')] for row in rows}
+            deleted = [(row_id,) for row_id in chunk if row_id not in present]
+            if deleted:
+                standby.executemany(f"DELETE FROM {table} WHERE id = ?", deleted)
+            if rows:
+                standby.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})", rows)
+    
+    @staticmethod
+    def _copy_table(primary, standby, table: str):
+        """Replace the standby's copy of a table with the primary's"""
+        cursor = primary.execute(f"SELECT * FROM {table}")
+        columns = [description[0] for description in cursor.description]
+        standby.execute(f"DELETE FROM {table}")
+        standby.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            cursor.fetchall())
+    
+    def catch_up(self) -> int:
+        """Apply batches until the standby is current; returns entries applied"""
+        total = 0
+        while not self._stop_event.is_set():
+            applied = self.sync_once()
+            if not applied:
+                break
+            total += applied
+        return total
+    
+    def lag(self) -> Dict:
+        """
+        Replication lag metrics
+        
+        Returns:
+            pending: Change log entries not yet applied
+            lag_seconds: Age of the oldest unapplied change (0 when caught up)
+            last_applied_at: Time of the last applied batch (epoch seconds)
+            rows_per_second: Average apply rate of this replicator
+        """
+        primary, standby = self._open()
+        try:
+            last_seq, applied_at = standby.execute(
+                "SELECT last_seq, applied_at FROM replication_state WHERE id = 1").fetchone()
+            # changed_at is CURRENT_TIMESTAMP (UTC, second resolution)
+            pending, oldest = primary.execute("""
+                SELECT COUNT(*), CAST(strftime('%s', MIN(changed_at)) AS INTEGER)
+                FROM change_log WHERE seq > ?
+            """, (last_seq,)).fetchone()
+            lag_seconds = max(time.time() - oldest, 0.0) if oldest else 0.0
+        finally:
+            primary.close()
+            standby.close()
+        
+        return {
+            'pending': pending,
+            'lag_seconds': lag_seconds,
+            'last_applied_at': applied_at,
+            'rows_per_second': self.applied_rows / self.apply_seconds if self.apply_seconds else 0.0,
+        }
+    
+    def run(self, interval: float = 2.0):
+        """Replicate until stop() is called, polling every `interval` seconds once caught up"""
+        self._stop_event.clear()
+        while not self._stop_event.is_set():
+            try:
+                self.catch_up()
+            except sqlite3.Error as e:
+                print(f"Replication error: {e}")
+            self._stop_event.wait(interval)
+    
+    def start(self, interval: float = 2.0) -> threading.Thread:
+        """Run the replicator on a daemon thread"""
+        thread = threading.Thread(target=self.run, args=(interval,), daemon=True)
+        thread.start()
+        return thread
+    
+    def stop(self):
+        self._stop_event.set()
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Replicate the invoice database to a standby file")
+    parser.add_argument("primary", help="Primary database file")
+    parser.add_argument("standby", help="Standby database file")
+    parser.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds")
+    parser.add_argument("--once", action="store_true", help="Catch up once and exit")
+    args = parser.parse_args()
+    
+    replicator = Replicator(args.primary, args.standby)
+    if args.once:
+        print(f"Applied {replicator.catch_up()} changes; lag: {replicator.lag()}")
+    else:
+        replicator.start(args.interval)
+        try:
+            while True:
+                time.sleep(10)
+                print(f"Replication lag: {replicator.lag()}")
+        except KeyboardInterrupt:
+            replicator.stop()
@@ -0,0 +1,65 @@
+import csv
+from typing import Dict, List
+
+# Accepted header spellings for each movement field
+COLUMN_ALIASES = {
+    'product_id': ('product_id', 'product id', 'id'),
+    'barcode': ('barcode', 'sku'),
+    'name': ('name', 'product', 'product_name', 'product name'),
+    'quantity': ('quantity', 'qty', 'received'),
+    'transaction_type': ('type', 'transaction_type'),
+    'reference_id': ('reference', 'reference_id'),
+    'notes': ('notes', 'note', 'remarks'),
+}
+
+def read_stock_movements_csv(csv_path: str, default_notes: str = "") -> List[Dict]:
+    """
+    Read purchase receipt lines from a CSV file
+    
+    The file needs a header row with a quantity column and one of product_id,
+    barcode or name. Rows without a type are purchases. Each movement carries
+    its file line number for error messages.
+    
+    Args:
+        csv_path: CSV file
+        default_notes: Notes for rows that have none (e.g. the file name)
+    
+    Returns:
+        Movements for DatabaseManager.apply_stock_movements()
+    """
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return []
+        
+        normalized = [column.strip().lower() for column in header]
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    columns[field] = normalized.index(alias)
+                    break
+        
+        if 'quantity' not in columns:
+            raise ValueError("CSV file has no quantity column")
+        if not {'product_id', 'barcode', 'name'} & columns.keys():
+            raise ValueError("CSV file needs a product_id, barcode or name column")
+        
+        movements = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            movement = {'line': reader.line_num}
+            for field, position in columns.items():
+                value = row[position].strip() if position < len(row) else ""
+                if value:
+                    movement[field] = value
+            if 'product_id' in movement:
+                try:
+                    movement['product_id'] = int(movement['product_id'])
+                except ValueError:
+                    pass
+            movement.setdefault('notes', default_notes)
+            movements.append(movement)
+        return movements
@@ -1,12 +1,32 @@
 import sys
 import os
+import time
+import multiprocessing
+
+# Startup milestones for the --startup-timing report
+_startup_marks = [("start", time.perf_counter())]
+
+def mark_startup(phase: str):
+    """Record a startup milestone"""
+    _startup_marks.append((phase, time.perf_counter()))
+
+def startup_report() -> str:
+    """Time spent in each startup phase"""
+    lines = ["Startup timing:"]
+    for (_, previous), (phase, marked) in zip(_startup_marks, _startup_marks[1:]):
+        lines.append(f"  {phase:<12} {(marked - previous) * 1000:8.1f} ms")
+    total = _startup_marks[-1][1] - _startup_marks[0][1]
+    lines.append(f"  {'total':<12} {total * 1000:8.1f} ms")
+    return "\n".join(lines)
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QGridLayout, QSplitter, QStackedWidget,
                             QLabel, QPushButton, QLineEdit, QTextEdit, QTableWidget,
                             QTableWidgetItem, QComboBox, QSpinBox, QDoubleSpinBox,
                             QCheckBox, QGroupBox, QTabWidget, QScrollArea,
                             QFrame, QSizePolicy, QMessageBox, QFileDialog,
-                            QProgressBar, QStatusBar, QMenuBar, QToolBar, QAction, QDialog)
+                            QProgressBar, QStatusBar, QMenuBar, QToolBar, QAction, QDialog,
+                            QTableView, QAbstractItemView, QCompleter)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread, pyqtSlot
 from PyQt5.QtGui import QIcon, QFont, QPixmap, QPalette, QColor
 
@@ -15,22 +35,59 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database.db import DatabaseManager
 from logic.gst_calculator import GSTCalculator
-from logic.pdf_generator import PDFGenerator
-from logic.qr_generator import QRCodeGenerator
+from logic.backup import BackupManager
+from logic.artifact_store import expire_artifacts
+from logic.exporter import DataExporter
+from logic.stock_import import read_stock_movements_csv
+from logic.catalog_import import CatalogImporter
+from logic.invoice_import import InvoiceImporter
+from ui.table_models import (CustomerTableModel, ProductTableModel, InvoiceTableModel,
+                             ProductPickerModel, ActionButtonDelegate)
+from ui.workers import JobRunner
+
+mark_startup("imports")
 
 class InvoiceMakerApp(QMainWindow):
     """Main Application Window"""
     
+    # Low-stock count changed; emitted from whichever thread changed the stock
+    low_stock_changed = pyqtSignal(int)
+    
     def __init__(self):
         super().__init__()
         self.db = DatabaseManager()
-        self.pdf_generator = PDFGenerator()
-        self.qr_generator = QRCodeGenerator()
+        # ReportLab and qrcode are imported on first use (see properties below)
+        self._pdf_generator = None
+        self._qr_generator = None
         self.current_invoice_items = []
         self.current_customer_id = None
+        # PDF, report and backup work runs here instead of on the GUI thread
+        self.jobs = JobRunner()
+        # Table searches run one at a time, separately from long jobs
+        self.search_jobs = JobRunner(max_threads=1)
+        # One product list shared by all invoice line combos
+        self.product_picker_model = ProductPickerModel(self.db, self)
         
         self.init_ui()
+        mark_startup("ui")
+        self.low_stock_changed.connect(self.update_low_stock_label)
+        self.db.add_low_stock_listener(self.low_stock_changed.emit)
         self.load_initial_data()
+        mark_startup("data")
+        
+    @property
+    def pdf_generator(self):
+        if self._pdf_generator is None:
+            from logic.pdf_generator import PDFGenerator
+            self._pdf_generator = PDFGenerator()
+        return self._pdf_generator
+    
+    @property
+    def qr_generator(self):
+        if self._qr_generator is None:
+            from logic.qr_generator import QRCodeGenerator
+            self._qr_generator = QRCodeGenerator()
+        return self._qr_generator
         
     def init_ui(self):
         """Initialize the user interface"""
@@ -243,13 +300,18 @@ class InvoiceMakerApp(QMainWindow):
         self.content_stack = QStackedWidget()
         main_layout.addWidget(self.content_stack, 4)
         
-        # Create pages
-        self.create_dashboard_page()
-        self.create_invoice_page()
-        self.create_customers_page()
-        self.create_products_page()
-        self.create_reports_page()
-        self.create_settings_page()
+        # Pages are built on first visit; the stack holds placeholders until then
+        self.page_builders = [
+            (self.create_dashboard_page, self.load_dashboard_stats),
+            (self.create_invoice_page, self.load_invoice_page),
+            (self.create_customers_page, self.load_customers),
+            (self.create_products_page, self.load_products),
+            (self.create_reports_page, None),
+            (self.create_settings_page, self.load_shop_settings),
+        ]
+        self.built_pages = set()
+        for _ in self.page_builders:
+            self.content_stack.addWidget(QWidget())
         
         # Create menu bar
         self.create_menu_bar()
@@ -259,6 +321,58 @@ class InvoiceMakerApp(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready")
         
+        # Background job progress
+        self.job_progress = QProgressBar()
+        self.job_progress.setMaximumWidth(200)
+        self.job_progress.setVisible(False)
+        self.cancel_jobs_btn = QPushButton("Cancel")
+        self.cancel_jobs_btn.setVisible(False)
+        self.cancel_jobs_btn.clicked.connect(self.jobs.cancel_all)
+        self.status_bar.addPermanentWidget(self.job_progress)
+        self.status_bar.addPermanentWidget(self.cancel_jobs_btn)
+        self.jobs.active_changed.connect(self.on_jobs_changed)
+        
+    def run_job(self, description: str, fn, *args, on_finished=None, **kwargs):
+        """
+        Run fn(job, *args, **kwargs) in the background with status bar progress
+        
+        Errors are reported in a message box; `on_finished` receives the result.
+        """
+        def on_progress(percent, message):
+            self.job_progress.setValue(percent)
+            if message:
+                self.status_bar.showMessage(message)
+        
+        def on_failed(error):
+            self.status_bar.showMessage("Ready")
+            QMessageBox.critical(self, "Error", f"Error {description}: {error}")
+        
+        def on_cancelled():
+            self.status_bar.showMessage(f"Cancelled {description}", 5000)
+        
+        def on_done(result):
+            self.status_bar.showMessage("Ready")
+            if on_finished:
+                on_finished(result)
+        
+        self.status_bar.showMessage(f"{description[0].upper()}{description[1:]}...")
+        self.job_progress.setValue(0)
+        return self.jobs.submit(fn, *args, on_finished=on_done, on_failed=on_failed,
+                                on_progress=on_progress, on_cancelled=on_cancelled, **kwargs)
+    
+    def on_jobs_changed(self, active):
+        """Show job progress widgets while background jobs are running"""
+        self.job_progress.setVisible(active > 0)
+        self.cancel_jobs_btn.setVisible(active > 0)
+    
+    def closeEvent(self, event):
+        """Stop background jobs before closing"""
+        self.jobs.cancel_all()
+        self.search_jobs.cancel_all()
+        self.jobs.wait(5000)
+        self.search_jobs.wait(1000)
+        super().closeEvent(event)
+    
     def create_sidebar(self):
         """Create navigation sidebar"""
         sidebar = QFrame()
@@ -317,7 +431,7 @@ class InvoiceMakerApp(QMainWindow):
         
         for text, index in nav_buttons:
             btn = QPushButton(text)
-            btn.clicked.connect(lambda checked, idx=index: self.content_stack.setCurrentIndex(idx))
+            btn.clicked.connect(lambda checked, idx=index: self.show_page(idx))
             layout.addWidget(btn)
         
         layout.addStretch()
@@ -364,9 +478,19 @@ class InvoiceMakerApp(QMainWindow):
         
         new_invoice_action = QAction('New Invoice', self)
         new_invoice_action.setShortcut('Ctrl+N')
-        new_invoice_action.triggered.connect(lambda: self.content_stack.setCurrentIndex(1))
+        new_invoice_action.triggered.connect(lambda: self.show_page(1))
         file_menu.addAction(new_invoice_action)
         
+        export_menu = file_menu.addMenu('Export')
+        for dataset in DataExporter.DATASETS:
+            export_action = QAction(dataset.replace('_', ' ').title() + '...', self)
+            export_action.triggered.connect(lambda checked, dataset=dataset: self.export_data(dataset))
+            export_menu.addAction(export_action)
+        
+        import_invoices_action = QAction('Import Past Invoices...', self)
+        import_invoices_action.triggered.connect(self.import_invoices)
+        file_menu.addAction(import_invoices_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction('Exit', self)
@@ -381,6 +505,26 @@ class InvoiceMakerApp(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
     
+    def show_page(self, index):
+        """Switch to a page, building it on first visit"""
+        self.ensure_page(index)
+        self.content_stack.setCurrentIndex(index)
+    
+    def ensure_page(self, index):
+        """Build a page in place of its placeholder and load its data"""
+        if index in self.built_pages:
+            return
+        self.built_pages.add(index)
+        
+        create_page, load_page = self.page_builders[index]
+        placeholder = self.content_stack.widget(index)
+        self.content_stack.insertWidget(index, create_page())
+        self.content_stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+        
+        if load_page:
+            load_page()
+    
     def create_dashboard_page(self):
         """Create dashboard page"""
         dashboard = QWidget()
@@ -460,9 +604,8 @@ class InvoiceMakerApp(QMainWindow):
         # Recent invoices
         recent_group = QGroupBox("Recent Invoices")
         recent_layout = QVBoxLayout()
-        self.recent_invoices_table = QTableWidget()
-        self.recent_invoices_table.setColumnCount(4)
-        self.recent_invoices_table.setHorizontalHeaderLabels(["Invoice No", "Customer", "Amount", "Date"])
+        self.recent_invoices_model = InvoiceTableModel(self.db, page_size=20)
+        self.recent_invoices_table = self.create_table_view(self.recent_invoices_model)
         self.recent_invoices_table.setMaximumHeight(200)
         recent_layout.addWidget(self.recent_invoices_table)
         recent_group.setLayout(recent_layout)
@@ -470,7 +613,7 @@ class InvoiceMakerApp(QMainWindow):
         
         layout.addLayout(stats_layout)
         
-        self.content_stack.addWidget(dashboard)
+        return dashboard
     
     def create_invoice_page(self):
         """Create invoice creation page"""
@@ -624,7 +767,7 @@ class InvoiceMakerApp(QMainWindow):
         
         layout.addLayout(form_layout)
         
-        self.content_stack.addWidget(invoice_page)
+        return invoice_page
     
     def create_customers_page(self):
         """Create customers management page"""
@@ -636,26 +779,35 @@ class InvoiceMakerApp(QMainWindow):
         
         search_label = QLabel("Search:")
         self.customer_search = QLineEdit()
-        self.customer_search.setPlaceholderText("Search by name, phone, or email...")
-        self.customer_search.textChanged.connect(self.load_customers)
+        self.customer_search.setPlaceholderText("Search by name, phone, or email (starts with)...")
+        # Debounce typing: query once the user pauses
+        self.customer_search_timer = QTimer(self)
+        self.customer_search_timer.setSingleShot(True)
+        self.customer_search_timer.setInterval(250)
+        self.customer_search_timer.timeout.connect(self.load_customers)
+        self.customer_search.textChanged.connect(lambda text: self.customer_search_timer.start())
         
         self.add_new_customer_btn = QPushButton("➕ Add New Customer")
         self.add_new_customer_btn.clicked.connect(self.add_customer_dialog)
         
+        self.import_customers_btn = QPushButton("📥 Import Customers")
+        self.import_customers_btn.setToolTip("Add or update customers from a CSV/Excel file (matched on phone)")
+        self.import_customers_btn.clicked.connect(lambda: self.import_catalog('customers'))
+        
         header_layout.addWidget(search_label)
         header_layout.addWidget(self.customer_search)
         header_layout.addWidget(self.add_new_customer_btn)
+        header_layout.addWidget(self.import_customers_btn)
         header_layout.addStretch()
         
         layout.addLayout(header_layout)
         
         # Customers table
-        self.customers_table = QTableWidget()
-        self.customers_table.setColumnCount(6)
-        self.customers_table.setHorizontalHeaderLabels(["Name", "Phone", "Email", "GSTIN", "Address", "Actions"])
+        self.customers_model = CustomerTableModel(self.db)
+        self.customers_table = self.create_table_view(self.customers_model, self.edit_customer)
         layout.addWidget(self.customers_table)
         
-        self.content_stack.addWidget(customers_page)
+        return customers_page
     
     def create_products_page(self):
         """Create products management page"""
@@ -667,31 +819,58 @@ class InvoiceMakerApp(QMainWindow):
         
         search_label = QLabel("Search:")
         self.product_search = QLineEdit()
-        self.product_search.setPlaceholderText("Search by name, barcode, or category...")
-        self.product_search.textChanged.connect(self.load_products)
+        self.product_search.setPlaceholderText("Search by name or barcode (starts with)...")
+        self.product_search_timer = QTimer(self)
+        self.product_search_timer.setSingleShot(True)
+        self.product_search_timer.setInterval(250)
+        self.product_search_timer.timeout.connect(self.load_products)
+        self.product_search.textChanged.connect(lambda text: self.product_search_timer.start())
         
-        category_filter = QComboBox()
-        category_filter.addItems(["All Categories", "Electronics", "Groceries", "Clothing", "Other"])
-        category_filter.currentTextChanged.connect(self.load_products)
+        self.product_category_filter = QComboBox()
+        self.product_category_filter.addItems(["All Categories", "Electronics", "Groceries", "Clothing", "Other"])
+        self.product_category_filter.currentTextChanged.connect(self.load_products)
         
         self.add_new_product_btn = QPushButton("➕ Add New Product")
         self.add_new_product_btn.clicked.connect(self.add_product_dialog)
         
+        self.import_purchase_btn = QPushButton("📥 Import Purchase")
+        self.import_purchase_btn.setToolTip("Add received stock from a CSV file (barcode/name, quantity)")
+        self.import_purchase_btn.clicked.connect(self.import_purchase_receipt)
+        
+        self.import_products_btn = QPushButton("📥 Import Products")
+        self.import_products_btn.setToolTip("Add or update products from a CSV/Excel file (matched on barcode or name)")
+        self.import_products_btn.clicked.connect(lambda: self.import_catalog('products'))
+        
         header_layout.addWidget(search_label)
         header_layout.addWidget(self.product_search)
-        header_layout.addWidget(category_filter)
+        header_layout.addWidget(self.product_category_filter)
         header_layout.addWidget(self.add_new_product_btn)
+        header_layout.addWidget(self.import_products_btn)
+        header_layout.addWidget(self.import_purchase_btn)
         header_layout.addStretch()
         
         layout.addLayout(header_layout)
         
         # Products table
-        self.products_table = QTableWidget()
-        self.products_table.setColumnCount(8)
-        self.products_table.setHorizontalHeaderLabels(["Name", "Price", "GST%", "Stock", "Category", "Barcode", "Description", "Actions"])
+        self.products_model = ProductTableModel(self.db)
+        self.products_table = self.create_table_view(self.products_model, self.edit_product)
         layout.addWidget(self.products_table)
         
-        self.content_stack.addWidget(products_page)
+        return products_page
+    
+    def create_table_view(self, model, edit_callback=None) -> QTableView:
+        """Create a table view over a paged model, with an Edit button column if given a callback"""
+        view = QTableView()
+        view.setModel(model)
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.verticalHeader().setDefaultSectionSize(28)
+        
+        if edit_callback is not None:
+            delegate = ActionButtonDelegate(view)
+            delegate.clicked.connect(lambda row: edit_callback(model.record_id(row)))
+            view.setItemDelegateForColumn(model.action_column(), delegate)
+        
+        return view
     
     def create_reports_page(self):
         """Create reports and analytics page"""
@@ -753,9 +932,96 @@ class InvoiceMakerApp(QMainWindow):
         
         reports_tabs.addTab(top_customers_tab, "Top Customers")
         
+        # Stock valuation tab
+        stock_tab = QWidget()
+        stock_layout = QVBoxLayout(stock_tab)
+        
+        stock_controls = QHBoxLayout()
+        stock_controls.addWidget(QLabel("As of:"))
+        self.stock_as_of_date = QLineEdit()
+        self.stock_as_of_date.setPlaceholderText("YYYY-MM-DD (blank for now)")
+        stock_controls.addWidget(self.stock_as_of_date)
+        
+        stock_valuation_btn = QPushButton("Show Valuation")
+        stock_valuation_btn.clicked.connect(self.generate_stock_valuation)
+        stock_controls.addWidget(stock_valuation_btn)
+        
+        stock_check_btn = QPushButton("Check Stock Ledger")
+        stock_check_btn.clicked.connect(self.check_stock_ledger)
+        stock_controls.addWidget(stock_check_btn)
+        
+        stock_controls.addStretch()
+        stock_layout.addLayout(stock_controls)
+        
+        self.stock_valuation_table = QTableWidget()
+        self.stock_valuation_table.setColumnCount(4)
+        self.stock_valuation_table.setHorizontalHeaderLabels(["Product", "Quantity", "Price", "Value"])
+        stock_layout.addWidget(self.stock_valuation_table)
+        
+        self.stock_valuation_total = QLabel("")
+        stock_layout.addWidget(self.stock_valuation_total)
+        
+        reports_tabs.addTab(stock_tab, "Stock Valuation")
+        
+        # Reorder suggestions tab
+        reorder_tab = QWidget()
+        reorder_layout = QVBoxLayout(reorder_tab)
+        
+        reorder_controls = QHBoxLayout()
+        reorder_forecast_btn = QPushButton("Update Forecast")
+        reorder_forecast_btn.setToolTip("Fold in new invoices and recompute sales velocities")
+        reorder_forecast_btn.clicked.connect(self.update_reorder_forecast)
+        reorder_controls.addWidget(reorder_forecast_btn)
+        reorder_controls.addStretch()
+        reorder_layout.addLayout(reorder_controls)
+        
+        self.reorder_table = QTableWidget()
+        self.reorder_table.setColumnCount(6)
+        self.reorder_table.setHorizontalHeaderLabels(
+            ["Product", "Stock", "Sold/Day", "Days Left", "Runs Out", "Reorder Qty"])
+        reorder_layout.addWidget(self.reorder_table)
+        
+        self.reorder_status = QLabel("")
+        reorder_layout.addWidget(self.reorder_status)
+        
+        reports_tabs.addTab(reorder_tab, "Reorder")
+        
+        # GST returns tab
+        gst_tab = QWidget()
+        gst_layout = QVBoxLayout(gst_tab)
+        
+        gst_controls = QHBoxLayout()
+        gst_controls.addWidget(QLabel("Month:"))
+        self.gst_return_month = QLineEdit()
+        self.gst_return_month.setPlaceholderText("YYYY-MM")
+        gst_controls.addWidget(self.gst_return_month)
+        
+        gst_return_btn = QPushButton("Generate GSTR-1 / GSTR-3B")
+        gst_return_btn.clicked.connect(self.generate_gst_returns)
+        gst_controls.addWidget(gst_return_btn)
+        
+        invoice_pdfs_btn = QPushButton("Save Invoice PDFs")
+        invoice_pdfs_btn.setToolTip("Save a PDF of every invoice in the month")
+        invoice_pdfs_btn.clicked.connect(self.save_month_invoice_pdfs)
+        gst_controls.addWidget(invoice_pdfs_btn)
+        
+        gst_controls.addStretch()
+        gst_layout.addLayout(gst_controls)
+        
+        self.gst_rate_table = QTableWidget()
+        self.gst_rate_table.setColumnCount(6)
+        self.gst_rate_table.setHorizontalHeaderLabels(
+            ["GST %", "Taxable Value", "CGST", "SGST", "Total Tax", "Invoice Value"])
+        gst_layout.addWidget(self.gst_rate_table)
+        
+        self.gst_return_status = QLabel("")
+        gst_layout.addWidget(self.gst_return_status)
+        
+        reports_tabs.addTab(gst_tab, "GST Returns")
+        
         layout.addWidget(reports_tabs)
         
-        self.content_stack.addWidget(reports_page)
+        return reports_page
     
     def create_settings_page(self):
         """Create settings page"""
@@ -832,6 +1098,25 @@ class InvoiceMakerApp(QMainWindow):
         logo_group.setLayout(logo_layout)
         layout.addWidget(logo_group)
         
+        # Generated PDFs and QR codes (assets/artifacts), expired at startup
+        artifacts_group = QGroupBox("Generated Files")
+        artifacts_layout = QGridLayout()
+        
+        artifacts_layout.addWidget(QLabel("Keep for (days):"), 0, 0)
+        self.artifact_retention_spin = QSpinBox()
+        self.artifact_retention_spin.setRange(1, 3650)
+        self.artifact_retention_spin.setValue(30)
+        artifacts_layout.addWidget(self.artifact_retention_spin, 0, 1)
+        
+        artifacts_layout.addWidget(QLabel("Size limit (MB):"), 1, 0)
+        self.artifact_quota_spin = QSpinBox()
+        self.artifact_quota_spin.setRange(10, 100000)
+        self.artifact_quota_spin.setValue(500)
+        artifacts_layout.addWidget(self.artifact_quota_spin, 1, 1)
+        
+        artifacts_group.setLayout(artifacts_layout)
+        layout.addWidget(artifacts_group)
+        
         # Save button
         self.save_settings_btn = QPushButton("💾 Save Settings")
         self.save_settings_btn.clicked.connect(self.save_settings)
@@ -839,14 +1124,21 @@ class InvoiceMakerApp(QMainWindow):
         
         layout.addStretch()
         
-        self.content_stack.addWidget(settings_page)
+        return settings_page
     
     def load_initial_data(self):
-        """Load initial data into the application"""
-        self.load_customers()
-        self.load_products()
-        self.load_dashboard_stats()
-        self.load_shop_settings()
+        """Show the dashboard; other pages load their data on first visit"""
+        self.show_page(0)
+        
+        # Daily stock snapshots keep as-of-date stock queries short
+        self.jobs.submit(lambda job: self.db.take_stock_snapshots_if_due())
+        # Old generated PDFs and QR codes are removed per the retention settings
+        self.jobs.submit(lambda job: expire_artifacts(self.db.get_shop_settings()))
+    
+    def load_invoice_page(self):
+        """Load data for the invoice page"""
+        self.load_customer_combo()
+        self.product_picker_model.refresh()
         self.update_invoice_number()
         
         # Set current date
@@ -864,73 +1156,47 @@ class InvoiceMakerApp(QMainWindow):
         self.today_invoices_label.setText(f"{today_summary['total_invoices']} Invoices")
         
         # Total customers
-        customers = self.db.get_customers()
-        self.total_customers_label.setText(str(len(customers)))
+        self.total_customers_label.setText(str(self.db.count_customers()))
         
         # Total products
-        products = self.db.get_products()
-        self.total_products_label.setText(str(len(products)))
+        self.total_products_label.setText(str(self.db.count_products()))
         
         # Low stock items
-        low_stock = self.db.get_low_stock_products()
-        self.low_stock_label.setText(f"{len(low_stock)} Items")
+        self.update_low_stock_label(self.db.count_low_stock_products())
         
         # Recent invoices
-        recent_invoices = self.db.get_invoices(limit=10)
-        self.recent_invoices_table.setRowCount(len(recent_invoices))
-        
-        for i, invoice in enumerate(recent_invoices):
-            self.recent_invoices_table.setItem(i, 0, QTableWidgetItem(invoice['invoice_number']))
-            self.recent_invoices_table.setItem(i, 1, QTableWidgetItem(invoice.get('customer_name', 'Walk-in')))
-            self.recent_invoices_table.setItem(i, 2, QTableWidgetItem(f"₹{invoice['total_amount']:.2f}"))
-            self.recent_invoices_table.setItem(i, 3, QTableWidgetItem(invoice['created_at'][:10]))
+        self.recent_invoices_model.reload()
+    
+    def update_low_stock_label(self, count):
+        """Show the current low-stock count on the dashboard"""
+        if hasattr(self, 'low_stock_label'):
+            self.low_stock_label.setText(f"{count} Items")
     
     def load_customers(self):
         """Load customers into table"""
+        if not hasattr(self, 'customers_model'):
+            return
         search_text = self.customer_search.text() if hasattr(self, 'customer_search') else ""
-        customers = self.db.get_customers(search_text)
-        
-        self.customers_table.setRowCount(len(customers))
-        
-        for i, customer in enumerate(customers):
-            self.customers_table.setItem(i, 0, QTableWidgetItem(customer['name']))
-            self.customers_table.setItem(i, 1, QTableWidgetItem(customer.get('phone', '')))
-            self.customers_table.setItem(i, 2, QTableWidgetItem(customer.get('email', '')))
-            self.customers_table.setItem(i, 3, QTableWidgetItem(customer.get('gstin', '')))
-            self.customers_table.setItem(i, 4, QTableWidgetItem(customer.get('address', '')))
-            
-            # Actions button
-            actions_btn = QPushButton("Edit")
-            actions_btn.clicked.connect(lambda checked, cid=customer['id']: self.edit_customer(cid))
-            self.customers_table.setCellWidget(i, 5, actions_btn)
-        
-        # Update customer combo in invoice page
-        if hasattr(self, 'customer_combo'):
-            self.customer_combo.clear()
-            self.customer_combo.addItem("Walk-in Customer")
-            for customer in customers:
-                self.customer_combo.addItem(customer['name'], customer['id'])
+        self.customers_model.apply_filters(self.search_jobs, search=search_text)
+    
+    def load_customer_combo(self):
+        """Load customers into the invoice page customer combo"""
+        if not hasattr(self, 'customer_combo'):
+            return
+        self.customer_combo.clear()
+        self.customer_combo.addItem("Walk-in Customer")
+        for customer in self.db.get_customers():
+            self.customer_combo.addItem(customer['name'], customer['id'])
     
     def load_products(self):
         """Load products into table"""
+        if not hasattr(self, 'products_model'):
+            return
         search_text = self.product_search.text() if hasattr(self, 'product_search') else ""
-        products = self.db.get_products(search_text)
-        
-        self.products_table.setRowCount(len(products))
-        
-        for i, product in enumerate(products):
-            self.products_table.setItem(i, 0, QTableWidgetItem(product['name']))
-            self.products_table.setItem(i, 1, QTableWidgetItem(f"₹{product['price']:.2f}"))
-            self.products_table.setItem(i, 2, QTableWidgetItem(f"{product['gst_percent']:.0f}%"))
-            self.products_table.setItem(i, 3, QTableWidgetItem(str(product['stock_quantity'])))
-            self.products_table.setItem(i, 4, QTableWidgetItem(product.get('category', '')))
-            self.products_table.setItem(i, 5, QTableWidgetItem(product.get('barcode', '')))
-            self.products_table.setItem(i, 6, QTableWidgetItem(product.get('description', '')))
-            
-            # Actions button
-            actions_btn = QPushButton("Edit")
-            actions_btn.clicked.connect(lambda checked, pid=product['id']: self.edit_product(pid))
-            self.products_table.setCellWidget(i, 7, actions_btn)
+        category = self.product_category_filter.currentText() if hasattr(self, 'product_category_filter') else ""
+        if category == "All Categories":
+            category = ""
+        self.products_model.apply_filters(self.search_jobs, search=search_text, category=category)
     
     def load_shop_settings(self):
         """Load shop settings"""
@@ -945,6 +1211,8 @@ class InvoiceMakerApp(QMainWindow):
             self.shop_upi_edit.setText(settings.get('upi_id', ''))
             self.invoice_prefix_edit.setText(settings.get('invoice_prefix', 'INV'))
             self.default_gst_spin.setValue(int(settings.get('default_gst', 18)))
+            self.artifact_retention_spin.setValue(int(settings.get('artifact_retention_days') or 30))
+            self.artifact_quota_spin.setValue(int(settings.get('artifact_quota_mb') or 500))
             
             template_name = settings.get('default_template', 'template1')
             template_index = 0
@@ -981,13 +1249,19 @@ class InvoiceMakerApp(QMainWindow):
         row = self.items_table.rowCount()
         self.items_table.insertRow(row)
         
-        # Product combo
+        # Product combo over the shared picker model, with type-ahead on product name
         product_combo = QComboBox()
-        products = self.db.get_products()
-        product_combo.addItem("Select Product", None)
-        for product in products:
-            display_text = f"{product['name']} - ₹{product['price']:.2f}"
-            product_combo.addItem(display_text, product['id'])
+        # Don't measure every product's text to size the combo or its popup
+        product_combo.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        product_combo.setMinimumContentsLength(20)
+        product_combo.view().setUniformItemSizes(True)
+        product_combo.setEditable(True)
+        product_combo.setInsertPolicy(QComboBox.NoInsert)
+        product_combo.setModel(self.product_picker_model)
+        completer = product_combo.completer()
+        completer.setFilterMode(Qt.MatchContains)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setCompletionMode(QCompleter.PopupCompletion)
         
         self.items_table.setCellWidget(row, 0, product_combo)
         
@@ -1056,7 +1330,7 @@ class InvoiceMakerApp(QMainWindow):
             print(f"Row {row}: Product ID = {product_id}")  # Debug line
             
             if product_id:
-                product = self.db.get_product(product_id)
+                product = self.product_picker_model.product(product_id)
                 if product:
                     print(f"Product found: {product['name']}, Price: {product['price']}")  # Debug line
                     
@@ -1116,7 +1390,7 @@ class InvoiceMakerApp(QMainWindow):
                 product_id = product_combo.currentData()
                 
                 if product_id:
-                    product = self.db.get_product(product_id)
+                    product = self.product_picker_model.product(product_id)
                     if product:
                         qty_spin = self.items_table.cellWidget(row, 1)
                         rate_edit = self.items_table.cellWidget(row, 2)
@@ -1229,14 +1503,6 @@ class InvoiceMakerApp(QMainWindow):
                 QMessageBox.warning(self, "Warning", "Please add items to invoice")
                 return
             
-            # Get shop settings
-            shop_settings = self.db.get_shop_settings()
-            
-            # Get customer data
-            customer_data = {}
-            if self.current_customer_id:
-                customer_data = self.db.get_customer(self.current_customer_id)
-            
             # Get values with error checking
             invoice_number_label = getattr(self, 'invoice_number_label', None)
             invoice_date_label = getattr(self, 'invoice_date_label', None)
@@ -1256,7 +1522,8 @@ class InvoiceMakerApp(QMainWindow):
             invoice_data = {
                 'invoice_number': invoice_number_label.text(),
                 'created_at': invoice_date_label.text(),
-                'items': self.current_invoice_items,
+                # Copied: the worker thread must not see later edits to the form
+                'items': [dict(item) for item in self.current_invoice_items],
                 'subtotal': float(subtotal_label.text().replace('₹', '')),
                 'gst_amount': float(gst_amount_label.text().replace('₹', '')),
                 'sgst_amount': float(sgst_amount_label.text().replace('₹', '')),
@@ -1265,35 +1532,55 @@ class InvoiceMakerApp(QMainWindow):
                 'notes': notes_text.toPlainText()
             }
             
-            # Generate QR code
-            qr_path = None
-            if shop_settings.get('upi_id'):
-                qr_path = self.qr_generator.generate_upi_payment_qr(
-                    shop_settings['upi_id'],
-                    invoice_data['total_amount'],
-                    shop_settings.get('shop_name', 'Shop'),
-                    f"Payment for {invoice_data['invoice_number']}"
-                )
-            
-            # Generate PDF
-            template = shop_settings.get('default_template', 'template1')
-            logo_path = shop_settings.get('logo_path')
-            
-            pdf_path = self.pdf_generator.generate_invoice_pdf(
-                invoice_data, shop_settings, customer_data, 
-                template, qr_path, logo_path
-            )
-            
-            QMessageBox.information(self, "Success", f"PDF generated successfully!\nSaved to: {pdf_path}")
-            
-            # Open PDF file
-            import os
-            if os.path.exists(pdf_path):
-                os.startfile(pdf_path)
+            self.run_job("generating PDF", self._build_invoice_pdf, invoice_data,
+                         self.current_customer_id, on_finished=self.on_invoice_pdf_ready)
                 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error generating PDF: {str(e)}")
     
+    def _build_invoice_pdf(self, job, invoice_data, customer_id):
+        """Build invoice PDF (runs on a worker thread)"""
+        # Get shop settings
+        shop_settings = self.db.get_shop_settings()
+        
+        # Get customer data
+        customer_data = {}
+        if customer_id:
+            customer_data = self.db.get_customer(customer_id)
+        
+        # Generate QR code
+        job.report_progress(20, "Generating QR code...")
+        qr_code = None
+        if shop_settings.get('upi_id'):
+            qr_code = self.qr_generator.generate_upi_payment_drawing(
+                shop_settings['upi_id'],
+                invoice_data['total_amount'],
+                shop_settings.get('shop_name', 'Shop'),
+                f"Payment for {invoice_data['invoice_number']}"
+            )
+        
+        # Generate PDF
+        job.check_cancelled()
+        job.report_progress(40, "Building PDF...")
+        template = shop_settings.get('default_template', 'template1')
+        logo_path = shop_settings.get('logo_path')
+        
+        pdf_path = self.pdf_generator.generate_invoice_pdf(
+            invoice_data, shop_settings, customer_data, 
+            template, qr_code, logo_path
+        )
+        job.report_progress(100)
+        return pdf_path
+    
+    def on_invoice_pdf_ready(self, pdf_path):
+        """Show generated invoice PDF"""
+        QMessageBox.information(self, "Success", f"PDF generated successfully!\nSaved to: {pdf_path}")
+        
+        # Open PDF file
+        import os
+        if os.path.exists(pdf_path):
+            os.startfile(pdf_path)
+    
     def print_invoice(self):
         """Print invoice"""
         # First generate PDF, then print
@@ -1329,30 +1616,186 @@ class InvoiceMakerApp(QMainWindow):
     
     def quick_invoice(self):
         """Quick invoice shortcut"""
-        self.content_stack.setCurrentIndex(1)
+        self.show_page(1)
         self.clear_invoice_form()
     
     def backup_data(self):
         """Backup database"""
         try:
             from datetime import datetime
-            backup_path, _ = QFileDialog.getSaveFileName(
+            backup_path, selected_filter = QFileDialog.getSaveFileName(
                 self, "Save Backup", f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db",
-                "Database Files (*.db)"
+                "Database Files (*.db);;Compressed Backup (*.db.gz)"
             )
             
             if backup_path:
-                import shutil
-                shutil.copy2(self.db.db_path, backup_path)
-                QMessageBox.information(self, "Success", f"Backup saved to: {backup_path}")
+                if selected_filter.startswith("Compressed") and not backup_path.endswith(".gz"):
+                    backup_path += ".gz"
+                self.run_job("creating backup", self._create_backup, self.db.db_path, backup_path,
+                             on_finished=lambda path: QMessageBox.information(
+                                 self, "Success", f"Backup saved to: {path}"))
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error creating backup: {str(e)}")
     
+    @staticmethod
+    def _create_backup(job, db_path, backup_path):
+        """Online backup of the live database with progress (runs on a worker thread)"""
+        def on_progress(percent):
+            job.check_cancelled()
+            job.report_progress(percent)
+        
+        return BackupManager(db_path).create_backup(backup_path, progress=on_progress)
+    
+    def import_purchase_receipt(self):
+        """Import received stock from a CSV purchase receipt"""
+        csv_path, _ = QFileDialog.getOpenFileName(
+            self, "Import Purchase Receipt", "", "CSV Files (*.csv)"
+        )
+        if csv_path:
+            self.run_job("importing purchase receipt", self._import_stock_movements, csv_path,
+                         on_finished=self.show_stock_import_result)
+    
+    def _import_stock_movements(self, job, csv_path):
+        """Read and apply a purchase receipt in one transaction (runs on a worker thread)"""
+        job.report_progress(10, "Reading purchase receipt...")
+        movements = read_stock_movements_csv(csv_path, f"Purchase receipt {os.path.basename(csv_path)}")
+        job.check_cancelled()
+        job.report_progress(50, f"Applying {len(movements)} stock movements...")
+        result = self.db.apply_stock_movements(movements)
+        job.report_progress(100)
+        return result
+    
+    def show_stock_import_result(self, result):
+        """Report an applied purchase receipt, or why it was rejected"""
+        if result['errors']:
+            lines = [f"Line {error['line']}: {error['error']}" if error['line'] else error['error']
+                     for error in result['errors'][:10]]
+            if len(result['errors']) > 10:
+                lines.append(f"... and {len(result['errors']) - 10} more")
+            QMessageBox.warning(self, "Import Failed",
+                                "No stock was changed. Fix these rows and import again:\n\n" + "\n".join(lines))
+            return
+        
+        QMessageBox.information(self, "Success", f"Imported {result['applied']} stock movements.")
+        self.load_products()
+    
+    def import_catalog(self, table):
+        """Add or update customers or products from a CSV/Excel file"""
+        import_path, _ = QFileDialog.getOpenFileName(
+            self, f"Import {table.capitalize()}", "", "CSV or Excel Files (*.csv *.xlsx)"
+        )
+        if import_path:
+            self.run_job(f"importing {table}", self._import_catalog, self.db.db_path, table, import_path,
+                         on_finished=lambda result: self.show_catalog_import_result(table, result))
+    
+    @staticmethod
+    def _import_catalog(job, db_path, table, import_path):
+        """Import a customer or product file with progress (runs on a worker thread)"""
+        def on_progress(percent):
+            job.check_cancelled()
+            job.report_progress(percent)
+        
+        importer = CatalogImporter(db_path)
+        if table == 'customers':
+            return importer.import_customers(import_path, progress=on_progress)
+        return importer.import_products(import_path, progress=on_progress)
+    
+    def show_catalog_import_result(self, table, result):
+        """Report imported rows and any rejected lines"""
+        message = (f"{result['inserted']:,} {table} added and {result['updated']:,} updated "
+                   f"in {result['seconds']:.1f} s.")
+        if result['errors']:
+            lines = [f"Line {error['line']}: {error['error']}" for error in result['errors'][:10]]
+            if len(result['errors']) > 10:
+                lines.append(f"... and {len(result['errors']) - 10} more")
+            QMessageBox.warning(self, "Import Finished With Errors",
+                                f"{message}\n\nThese rows were skipped:\n\n" + "\n".join(lines))
+        else:
+            QMessageBox.information(self, "Success", message)
+        
+        if table == 'customers':
+            self.load_customers()
+            self.load_customer_combo()
+        else:
+            self.load_products()
+            self.product_picker_model.refresh()
+            self.update_low_stock_label(self.db.count_low_stock_products())
+    
+    def import_invoices(self):
+        """Migrate past invoices from another billing tool's CSV/Excel export"""
+        import_path, _ = QFileDialog.getOpenFileName(
+            self, "Import Past Invoices", "", "CSV or Excel Files (*.csv *.xlsx)"
+        )
+        if not import_path:
+            return
+        reply = QMessageBox.question(
+            self, "Stock",
+            "Deduct the imported sales from stock?\n\n"
+            "Choose No if your current stock levels are already entered.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        self.run_job("importing invoices", self._import_invoices, self.db.db_path, import_path,
+                     reply == QMessageBox.Yes, on_finished=self.show_invoice_import_result)
+    
+    @staticmethod
+    def _import_invoices(job, db_path, import_path, record_stock):
+        """Import past invoices with progress (runs on a worker thread)"""
+        def on_progress(percent, message):
+            job.check_cancelled()
+            job.report_progress(percent, message)
+        
+        return InvoiceImporter(db_path, record_stock=record_stock).import_file(import_path, progress=on_progress)
+    
+    def show_invoice_import_result(self, result):
+        """Report imported invoices and any rejected ones"""
+        message = (f"Imported {result['invoices']:,} invoices ({result['lines']:,} lines) in "
+                   f"{result['seconds']:.1f} s, {result['lines_per_second']:,.0f} lines/s.")
+        if result['skipped']:
+            message += f"\n{result['skipped']:,} invoices were already imported and were skipped."
+        if result['errors']:
+            lines = [f"Line {error['line']}: {error['error']}" for error in result['errors'][:10]]
+            if len(result['errors']) > 10:
+                lines.append(f"... and {len(result['errors']) - 10} more")
+            QMessageBox.warning(self, "Import Finished With Errors",
+                                f"{message}\n\nThese invoices were skipped:\n\n" + "\n".join(lines))
+        else:
+            QMessageBox.information(self, "Success", message)
+        
+        self.load_dashboard_stats()
+        self.load_customers()
+        self.load_customer_combo()
+        self.load_products()
+    
+    def export_data(self, dataset):
+        """Export a table to CSV or Excel"""
+        from datetime import datetime
+        export_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Data", f"{dataset}_{datetime.now().strftime('%Y%m%d')}.csv",
+            "CSV Files (*.csv);;Excel Files (*.xlsx)"
+        )
+        if export_path:
+            if selected_filter.startswith("Excel") and not export_path.lower().endswith(".xlsx"):
+                export_path = os.path.splitext(export_path)[0] + ".xlsx"
+            self.run_job(f"exporting {dataset.replace('_', ' ')}", self._export_data,
+                         self.db.db_path, dataset, export_path,
+                         on_finished=lambda rows: QMessageBox.information(
+                             self, "Success", f"Exported {rows:,} rows to: {export_path}"))
+    
+    @staticmethod
+    def _export_data(job, db_path, dataset, export_path):
+        """Stream a table to a file with progress (runs on a worker thread)"""
+        def on_progress(percent):
+            job.check_cancelled()
+            job.report_progress(percent)
+        
+        return DataExporter(db_path).export(dataset, export_path, progress=on_progress)
+    
     def add_customer_dialog(self):
         """Show add customer dialog"""
         dialog = CustomerDialog(self.db, self)
         if dialog.exec_():
             self.load_customers()
+            self.load_customer_combo()
     
     def edit_customer(self, customer_id):
         """Edit customer dialog"""
@@ -1361,12 +1804,14 @@ class InvoiceMakerApp(QMainWindow):
             dialog = CustomerDialog(self.db, self, customer)
             if dialog.exec_():
                 self.load_customers()
+                self.load_customer_combo()
     
     def add_product_dialog(self):
         """Show add product dialog"""
         dialog = ProductDialog(self.db, self)
         if dialog.exec_():
             self.load_products()
+            self.product_picker_model.refresh()
     
     def edit_product(self, product_id):
         """Edit product dialog"""
@@ -1375,6 +1820,7 @@ class InvoiceMakerApp(QMainWindow):
             dialog = ProductDialog(self.db, self, product)
             if dialog.exec_():
                 self.load_products()
+                self.product_picker_model.refresh()
     
     def generate_sales_report(self):
         """Generate sales report"""
@@ -1382,9 +1828,209 @@ class InvoiceMakerApp(QMainWindow):
             from_date = self.report_from_date.text()
             to_date = self.report_to_date.text()
             
-            summary = self.db.get_sales_summary(from_date, to_date)
-            top_products = self.db.get_top_products(10, from_date, to_date)
-            top_customers = self.db.get_top_customers(10, from_date, to_date)
+            self.run_job("generating report", self._load_sales_report, from_date, to_date,
+                         on_finished=self.show_sales_report)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error generating report: {str(e)}")
+    
+    def _load_sales_report(self, job, from_date, to_date):
+        """Query report data (runs on a worker thread)"""
+        summary = self.db.get_sales_summary(from_date, to_date)
+        job.check_cancelled()
+        job.report_progress(33)
+        top_products = self.db.get_top_products(10, from_date, to_date)
+        job.check_cancelled()
+        job.report_progress(66)
+        top_customers = self.db.get_top_customers(10, from_date, to_date)
+        job.report_progress(100)
+        return from_date, to_date, summary, top_products, top_customers
+    
+    def generate_stock_valuation(self):
+        """Generate stock valuation as of the entered date"""
+        as_of = self.stock_as_of_date.text().strip() or None
+        self.run_job("valuing stock", lambda job: self.db.get_stock_valuation(as_of),
+                     on_finished=self.show_stock_valuation)
+    
+    def show_stock_valuation(self, valuation):
+        """Show stock valuation data"""
+        products = valuation['products']
+        self.stock_valuation_table.setRowCount(len(products))
+        for row, product in enumerate(products):
+            self.stock_valuation_table.setItem(row, 0, QTableWidgetItem(product['name']))
+            self.stock_valuation_table.setItem(row, 1, QTableWidgetItem(f"{product['quantity']:g}"))
+            self.stock_valuation_table.setItem(row, 2, QTableWidgetItem(f"₹{product['price']:.2f}"))
+            self.stock_valuation_table.setItem(row, 3, QTableWidgetItem(f"₹{product['value']:.2f}"))
+        
+        self.stock_valuation_total.setText(
+            f"As of {valuation['as_of']}: {valuation['total_quantity']:,.2f} units, "
+            f"₹{valuation['total_value']:.2f} at current prices")
+    
+    def check_stock_ledger(self):
+        """Compare product stock with the stock ledger and offer to fix it"""
+        self.run_job("checking stock ledger", lambda job: self.db.check_stock_consistency(),
+                     on_finished=self.show_stock_check)
+    
+    def show_stock_check(self, mismatches):
+        """Report stock ledger mismatches"""
+        if not mismatches:
+            QMessageBox.information(self, "Stock Ledger", "Product stock matches the stock ledger.")
+            return
+        
+        details = "\n".join(f"{item['name']}: stock {item['stock_quantity']}, ledger {item['ledger_quantity']:g}"
+                            for item in mismatches[:20])
+        reply = QMessageBox.question(
+            self, "Stock Ledger",
+            f"{len(mismatches)} products disagree with the stock ledger:\n\n{details}\n\n"
+            "Reset their stock to the ledger totals?",
+            QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.run_job("correcting stock", lambda job: self.db.rebuild_stock_quantities(),
+                         on_finished=self.show_stock_corrected)
+    
+    def show_stock_corrected(self, corrected):
+        """Report a stock rebuild and refresh the product list"""
+        QMessageBox.information(self, "Stock Ledger", f"Corrected stock of {corrected} products.")
+        self.load_products()
+    
+    def update_reorder_forecast(self):
+        """Recompute reorder suggestions from sales history"""
+        self.run_job("forecasting reorders", self._run_reorder_forecast, self.db.db_path,
+                     on_finished=self.show_reorder_suggestions)
+    
+    def _run_reorder_forecast(self, job, db_path):
+        """Incremental forecast run (runs on a worker thread)"""
+        def on_progress(percent):
+            job.check_cancelled()
+            job.report_progress(percent)
+        
+        from logic.forecast import ReorderForecaster
+        result = ReorderForecaster(db_path).run(progress=on_progress)
+        result['items'] = self.db.get_reorder_suggestions()
+        return result
+    
+    def show_reorder_suggestions(self, result):
+        """Show products that need reordering, soonest to run out first"""
+        items = result['items']
+        self.reorder_table.setRowCount(len(items))
+        for row, item in enumerate(items):
+            self.reorder_table.setItem(row, 0, QTableWidgetItem(item['name']))
+            self.reorder_table.setItem(row, 1, QTableWidgetItem(f"{item['stock_quantity']:g}"))
+            self.reorder_table.setItem(row, 2, QTableWidgetItem(f"{item['daily_velocity']:.2f}"))
+            self.reorder_table.setItem(row, 3, QTableWidgetItem(f"{item['days_of_cover']:.1f}"))
+            self.reorder_table.setItem(row, 4, QTableWidgetItem(item['stockout_date'] or ""))
+            self.reorder_table.setItem(row, 5, QTableWidgetItem(str(item['reorder_quantity'])))
+        
+        self.reorder_status.setText(
+            f"{result['suggestions']} of {result['products']} selling products need reordering "
+            f"(updated in {result['seconds']:.1f} s)")
+    
+    def _entered_month(self):
+        """(year, month) from the GST returns month field, or None after a warning"""
+        try:
+            year, month = (int(part) for part in self.gst_return_month.text().strip().split("-"))
+            if not 1 <= month <= 12:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Warning", "Enter the month as YYYY-MM")
+            return None
+        return year, month
+    
+    def generate_gst_returns(self):
+        """Generate GSTR-1 and GSTR-3B JSON for the entered month"""
+        entered = self._entered_month()
+        if entered is None:
+            return
+        year, month = entered
+        
+        output_dir = QFileDialog.getExistingDirectory(self, "Save GST Returns To")
+        if output_dir:
+            self.run_job("generating GST returns", self._build_gst_returns,
+                         self.db.db_path, year, month, output_dir,
+                         on_finished=self.show_gst_returns)
+    
+    @staticmethod
+    def _build_gst_returns(job, db_path, year, month, output_dir):
+        """Build and save a month's GST returns (runs on a worker thread)"""
+        def on_progress(percent):
+            job.check_cancelled()
+            job.report_progress(percent)
+        
+        from logic.gst_returns import GSTReturnBuilder
+        return GSTReturnBuilder(db_path).write(year, month, output_dir, progress=on_progress)
+    
+    def save_month_invoice_pdfs(self):
+        """Save PDFs of the entered month's invoices into a folder"""
+        entered = self._entered_month()
+        if entered is None:
+            return
+        
+        output_dir = QFileDialog.getExistingDirectory(self, "Save Invoice PDFs To")
+        if output_dir:
+            self.run_job("saving invoice PDFs", self._build_month_invoice_pdfs, *entered, output_dir,
+                         on_finished=self.show_month_invoice_pdfs)
+    
+    def _build_month_invoice_pdfs(self, job, year, month, output_dir, chunk_size=500):
+        """
+        Save a month's invoice PDFs (runs on a worker thread)
+        
+        Invoices go to generate_invoice_pdf_batch a chunk at a time, so the
+        payment QR codes of each chunk are encoded together and progress and
+        cancellation are checked between chunks.
+        """
+        import json
+        from datetime import date, timedelta
+        
+        last_day = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        invoices = list(self.db.iter_invoices(start_date=date(year, month, 1).isoformat(),
+                                              end_date=last_day.isoformat()))
+        shop_settings = self.db.get_shop_settings()
+        template = shop_settings.get('default_template', 'template1')
+        logo_path = shop_settings.get('logo_path')
+        
+        customers = {}
+        paths = []
+        for start in range(0, len(invoices), chunk_size):
+            job.check_cancelled()
+            job.report_progress(start * 100 // len(invoices), f"{start} of {len(invoices)} invoices...")
+            batch = []
+            for invoice in invoices[start:start + chunk_size]:
+                invoice['items'] = json.loads(invoice.get('items_json') or '[]')
+                customer_id = invoice.get('customer_id')
+                if customer_id and customer_id not in customers:
+                    # Templates fall back to '' only for missing keys, not NULL columns
+                    customer = self.db.get_customer(customer_id) or {}
+                    customers[customer_id] = {key: value for key, value in customer.items() if value is not None}
+                batch.append((invoice, customers.get(customer_id, {})))
+            paths.extend(self.pdf_generator.generate_invoice_pdf_batch(
+                batch, shop_settings, template, logo_path, output_dir))
+        job.report_progress(100)
+        return output_dir, paths
+    
+    def show_month_invoice_pdfs(self, result):
+        """Show where the month's invoice PDFs were saved"""
+        output_dir, paths = result
+        self.gst_return_status.setText(f"Saved {len(paths)} invoice PDFs to {output_dir}")
+    
+    def show_gst_returns(self, result):
+        """Show rate-wise GST totals and where the return files were saved"""
+        rates = result['rate_summary']
+        self.gst_rate_table.setRowCount(len(rates))
+        for row, rate in enumerate(rates):
+            self.gst_rate_table.setItem(row, 0, QTableWidgetItem(f"{rate['gst_percent']:g}%"))
+            self.gst_rate_table.setItem(row, 1, QTableWidgetItem(f"₹{rate['taxable_value']:.2f}"))
+            self.gst_rate_table.setItem(row, 2, QTableWidgetItem(f"₹{rate['cgst']:.2f}"))
+            self.gst_rate_table.setItem(row, 3, QTableWidgetItem(f"₹{rate['sgst']:.2f}"))
+            self.gst_rate_table.setItem(row, 4, QTableWidgetItem(f"₹{rate['total_tax']:.2f}"))
+            self.gst_rate_table.setItem(row, 5, QTableWidgetItem(f"₹{rate['invoice_value']:.2f}"))
+        
+        stats = result['stats']
+        self.gst_return_status.setText(
+            f"{stats['invoices']} invoices, {stats['lines']} lines. Saved: " + ", ".join(result['files']))
+    
+    def show_sales_report(self, report):
+        """Show sales report data"""
+        try:
+            from_date, to_date, summary, top_products, top_customers = report
             
             report_text = f"""
 SALES SUMMARY REPORT
@@ -1453,6 +2099,8 @@ TOP PRODUCTS
                 'invoice_prefix': self.invoice_prefix_edit.text(),
                 'default_gst': self.default_gst_spin.value(),
                 'default_template': self.template_combo.currentText().split(' - ')[0],
+                'artifact_retention_days': self.artifact_retention_spin.value(),
+                'artifact_quota_mb': self.artifact_quota_spin.value(),
                 'logo_path': self.logo_path_label.text() if self.logo_path_label.text() != "No logo selected" else ""
             }
             
@@ -1587,7 +2235,7 @@ class ProductDialog(QDialog):
     def init_ui(self):
         self.setWindowTitle("Add/Edit Product")
         self.setModal(True)
-        self.setFixedSize(450, 400)
+        self.setFixedSize(450, 430)
         
         layout = QVBoxLayout()
         
@@ -1631,6 +2279,11 @@ class ProductDialog(QDialog):
         self.min_stock_spin.setValue(5)
         form_layout.addWidget(self.min_stock_spin, 7, 1)
         
+        form_layout.addWidget(QLabel("HSN Code:"), 8, 0)
+        self.hsn_edit = QLineEdit()
+        self.hsn_edit.setPlaceholderText("For the GST return HSN summary")
+        form_layout.addWidget(self.hsn_edit, 8, 1)
+        
         layout.addLayout(form_layout)
         
         # Buttons
@@ -1658,6 +2311,7 @@ class ProductDialog(QDialog):
             self.barcode_edit.setText(self.product.get('barcode', ''))
             self.description_edit.setText(self.product.get('description', ''))
             self.min_stock_spin.setValue(self.product['min_stock_alert'])
+            self.hsn_edit.setText(self.product.get('hsn_code') or '')
     
     def save_product(self):
         """Save product"""
@@ -1682,7 +2336,8 @@ class ProductDialog(QDialog):
             'category': self.category_edit.text().strip(),
             'barcode': self.barcode_edit.text().strip(),
             'description': self.description_edit.text().strip(),
-            'min_stock_alert': self.min_stock_spin.value()
+            'min_stock_alert': self.min_stock_spin.value(),
+            'hsn_code': self.hsn_edit.text().strip()
         }
         
         try:
@@ -1703,8 +2358,12 @@ class ProductDialog(QDialog):
             QMessageBox.critical(self, "Error", f"Error saving product: {str(e)}")
 
 def main():
+    # Batch QR generation uses worker processes; required for frozen (EXE) builds
+    multiprocessing.freeze_support()
+    
     app = QApplication(sys.argv)
     app.setApplicationName("Invoice Maker")
+    mark_startup("qt app")
     
     # Set application icon (if available)
     # app.setWindowIcon(QIcon("assets/icon.png"))
@@ -1712,6 +2371,12 @@ def main():
     window = InvoiceMakerApp()
     window.show()
     
+    if '--startup-timing' in sys.argv:
+        def report_startup():
+            mark_startup("first paint")
+            print(startup_report())
+        QTimer.singleShot(0, report_startup)
+    
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -4,34 +4,27 @@
 Quick start script for mobile-responsive web version
 """
 
+import importlib.util
 import subprocess
 import sys
 import os
 from pathlib import Path
 
 def check_requirements():
-    """Check if required packages are installed"""
-    required_packages = [
-        'streamlit',
-        'pandas',
-        'plotly',
-        'reportlab',
-        'Pillow',
-        'qrcode'
-    ]
-    
-    missing_packages = []
+    """Check if required packages are installed (without importing them)"""
+    # pip package name -> module name
+    required_packages = {
+        'streamlit': 'streamlit',
+        'pandas': 'pandas',
+        'reportlab': 'reportlab',
+        'Pillow': 'PIL',
+        'qrcode': 'qrcode',
+    }
     
-    for package in required_packages:
-        try:
-            if package == 'Pillow':
-                import PIL
-            elif package == 'qrcode':
-                import qrcode
-            else:
-                __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    missing_packages = [
+        package for package, module in required_packages.items()
+        if importlib.util.find_spec(module) is None
+    ]
     
     if missing_packages:
         print(f"❌ Missing packages: {', '.join(missing_packages)}")
@@ -49,7 +42,7 @@ def check_requirements():
     
     return True
 
-def start_web_app():
+def start_web_app(startup_timing=False):
     """Start the Streamlit web application"""
     print("🚀 Starting Invoice Maker Web App...")
     print("📱 Mobile Responsive | Works on all devices")
@@ -86,10 +79,13 @@ def start_web_app():
         print("🛑 Press Ctrl+C to stop the server")
         print("=" * 50)
         
+        # Arguments after "--" are passed to the app itself
+        app_args = ["--", "--startup-timing"] if startup_timing else []
+        
         subprocess.run([
             sys.executable, "-m", "streamlit", "run", 
             "web_app.py"
-        ] + config_options)
+        ] + config_options + app_args)
         
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
@@ -154,6 +150,8 @@ if __name__ == "__main__":
     parser.add_argument("--info", action="store_true", help="Show application information")
     parser.add_argument("--port", type=int, default=8501, help="Port number (default: 8501)")
     parser.add_argument("--host", default="0.0.0.0", help="Host address (default: 0.0.0.0)")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="Print cold start and page render times")
     
     args = parser.parse_args()
     
@@ -164,4 +162,4 @@ if __name__ == "__main__":
         if args.port != 8501 or args.host != "0.0.0.0":
             print(f"🔧 Custom settings: Port={args.port}, Host={args.host}")
         
-        start_web_app()
+        start_web_app(startup_timing=args.startup_timing)
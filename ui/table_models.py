@@ -0,0 +1,345 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+import bisect
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Column spec: (header, record key, formatter). A key of None marks the actions column.
+Column = Tuple[str, Optional[str], Optional[Callable]]
+
+def _money(value) -> str:
+    return f"₹{value:.2f}"
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    Read-only table model that loads database rows a page at a time
+    
+    Views call canFetchMore()/fetchMore() as they scroll near the end,
+    so only the visible part of a large table is ever queried. Changing
+    filters merges the new first page into the loaded rows, so rows present
+    in both results are kept and the view's scroll position and selection
+    survive a refinement.
+    """
+    
+    COLUMNS: List[Column] = []
+    ACTION_TEXT = "Edit"
+    # True when fetch_page() returns rows in descending page_key() order
+    DESCENDING = False
+    
+    def __init__(self, db, page_size: int = 200, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.page_size = page_size
+        self._rows = []
+        self._exhausted = False
+        self.filters = {}
+        # Bumped per filter change; results of older background queries are dropped
+        self._generation = 0
+        self._pending_job = None
+    
+    def fetch_page(self, filters: Dict, after: Optional[Tuple], limit: int) -> List[Dict]:
+        """Load the page following the row keyed `after` (None for the first page)"""
+        raise NotImplementedError
+    
+    def page_key(self, record: Dict) -> Tuple:
+        """Keyset paging key of a record"""
+        return (record['name'], record['id'])
+    
+    def reload(self):
+        """Fetch the first page again with the current filters"""
+        self.set_filters(**self.filters)
+    
+    def set_filters(self, **filters):
+        """Apply new filters, querying on the calling thread"""
+        self._generation += 1
+        self._apply_first_page(self._generation, filters,
+                               self.fetch_page(filters, None, self.page_size))
+    
+    def apply_filters(self, runner, **filters):
+        """
+        Apply new filters, querying on a background job runner
+        
+        A still-queued query for older filters is cancelled, and results that
+        arrive after newer filters were requested are ignored.
+        """
+        if self._pending_job is not None:
+            self._pending_job.cancel()
+        
+        self._generation += 1
+        generation = self._generation
+        self._pending_job = runner.submit(
+            lambda job: self.fetch_page(filters, None, self.page_size),
+            on_finished=lambda page: self._apply_first_page(generation, filters, page))
+    
+    def _apply_first_page(self, generation: int, filters: Dict, page: List[Dict]):
+        if generation != self._generation:
+            return
+        self._pending_job = None
+        self.filters = filters
+        self._merge_rows(page)
+        self._exhausted = len(page) < self.page_size
+    
+    def _merge_rows(self, new_rows: List[Dict]):
+        """
+        Turn the loaded rows into `new_rows` with row insert/remove/change
+        notifications instead of a model reset
+        
+        Both lists are sorted by page_key() (see DESCENDING), so one merge
+        pass finds the runs to remove and insert.
+        """
+        rows = self._rows
+        key = self.page_key
+        if self.DESCENDING:
+            before = lambda a, b: key(a) > key(b)
+        else:
+            before = lambda a, b: key(a) < key(b)
+        i = j = 0
+        while i < len(rows) or j < len(new_rows):
+            if i < len(rows) and j < len(new_rows) and rows[i]['id'] == new_rows[j]['id']:
+                if rows[i] != new_rows[j]:
+                    rows[i] = new_rows[j]
+                    self.dataChanged.emit(self.index(i, 0), self.index(i, len(self.COLUMNS) - 1))
+                i += 1
+                j += 1
+            elif j >= len(new_rows) or (i < len(rows) and before(rows[i], new_rows[j])):
+                # Run of loaded rows missing from the new result
+                end = i + 1
+                while end < len(rows) and (j >= len(new_rows) or before(rows[end], new_rows[j])):
+                    end += 1
+                self.beginRemoveRows(QModelIndex(), i, end - 1)
+                del rows[i:end]
+                self.endRemoveRows()
+            else:
+                # Run of new rows sorting before the next loaded row
+                end = j + 1
+                while end < len(new_rows) and (i >= len(rows) or before(new_rows[end], rows[i])):
+                    end += 1
+                self.beginInsertRows(QModelIndex(), i, i + end - j - 1)
+                rows[i:i] = new_rows[j:end]
+                self.endInsertRows()
+                i += end - j
+                j = end
+    
+    def record(self, row: int) -> Dict:
+        return self._rows[row]
+    
+    def record_id(self, row: int) -> int:
+        return self._rows[row]['id']
+    
+    def action_column(self) -> int:
+        """Index of the actions column, or -1 if the model has none"""
+        for column, (_, key, _) in enumerate(self.COLUMNS):
+            if key is None:
+                return column
+        return -1
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        
+        _, key, formatter = self.COLUMNS[index.column()]
+        if key is None:
+            return self.ACTION_TEXT
+        
+        value = self._rows[index.row()].get(key)
+        if value is None:
+            return ""
+        return formatter(value) if formatter else str(value)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        
+        after = self.page_key(self._rows[-1]) if self._rows else None
+        page = self.fetch_page(self.filters, after, self.page_size)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        
+        if page:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+class CustomerTableModel(PagedTableModel):
+    """Customers ordered by name"""
+    
+    COLUMNS = [
+        ("Name", 'name', None),
+        ("Phone", 'phone', None),
+        ("Email", 'email', None),
+        ("GSTIN", 'gstin', None),
+        ("Address", 'address', None),
+        ("Actions", None, None),
+    ]
+    
+    def fetch_page(self, filters, after, limit):
+        return self.db.get_customers_page(filters.get('search', ""), after, limit, prefix=True)
+
+class ProductTableModel(PagedTableModel):
+    """Products ordered by name"""
+    
+    COLUMNS = [
+        ("Name", 'name', None),
+        ("Price", 'price', _money),
+        ("GST%", 'gst_percent', lambda value: f"{value:.0f}%"),
+        ("Stock", 'stock_quantity', None),
+        ("Category", 'category', None),
+        ("Barcode", 'barcode', None),
+        ("Description", 'description', None),
+        ("Actions", None, None),
+    ]
+    
+    def fetch_page(self, filters, after, limit):
+        return self.db.get_products_page(filters.get('search', ""), filters.get('category', ""),
+                                         after, limit, prefix=True)
+
+class InvoiceTableModel(PagedTableModel):
+    """Invoices, newest first"""
+    
+    DESCENDING = True
+    COLUMNS = [
+        ("Invoice No", 'invoice_number', None),
+        ("Customer", 'customer_name', None),
+        ("Amount", 'total_amount', _money),
+        ("Date", 'created_at', lambda value: str(value)[:10]),
+    ]
+    
+    def __init__(self, db, page_size: int = 50, parent=None, customer_id: Optional[int] = None):
+        super().__init__(db, page_size, parent)
+        self.customer_id = customer_id
+    
+    def page_key(self, record):
+        return (record['created_at'], record['id'])
+    
+    def fetch_page(self, filters, after, limit):
+        invoices = self.db.get_invoices_page(after, limit, self.customer_id)
+        for invoice in invoices:
+            invoice['customer_name'] = invoice.get('customer_name') or 'Walk-in'
+        return invoices
+
+class ProductPickerModel(QAbstractListModel):
+    """
+    Product list shared by every invoice line combo box
+    
+    Loaded once; refresh() only fetches products added or changed since the
+    last load and patches them in place, so open combos keep their selection.
+    Row 0 is the "Select Product" placeholder (id None).
+    """
+    
+    PLACEHOLDER = "Select Product"
+    
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._products = []   # sorted by (name, id)
+        self._keys = []       # (name, id) per product, for bisect
+        self._by_id = {}
+        self._synced_at = None
+    
+    def refresh(self):
+        """Load new and changed products"""
+        changed = self.db.get_products_changed_since(self._synced_at)
+        if not changed:
+            return
+        
+        if self._synced_at is None:
+            self.beginResetModel()
+            self._products = changed
+            self._keys = [(product['name'], product['id']) for product in changed]
+            self._by_id = {product['id']: product for product in changed}
+            self.endResetModel()
+        else:
+            for product in changed:
+                self.upsert(product)
+        
+        stamps = [str(product['updated_at']) for product in changed if product.get('updated_at')]
+        if stamps:
+            self._synced_at = max(stamps)
+    
+    def upsert(self, product: Dict):
+        """Insert a product or update it in place"""
+        existing = self._by_id.get(product['id'])
+        if existing is not None:
+            position = bisect.bisect_left(self._keys, (existing['name'], existing['id']))
+            if existing['name'] == product['name']:
+                self._products[position] = product
+                self._by_id[product['id']] = product
+                index = self.index(position + 1)
+                self.dataChanged.emit(index, index)
+                return
+            
+            # Renamed: move to its new sorted position
+            self.beginRemoveRows(QModelIndex(), position + 1, position + 1)
+            del self._products[position]
+            del self._keys[position]
+            self.endRemoveRows()
+        
+        key = (product['name'], product['id'])
+        position = bisect.bisect_left(self._keys, key)
+        self.beginInsertRows(QModelIndex(), position + 1, position + 1)
+        self._products.insert(position, product)
+        self._keys.insert(position, key)
+        self._by_id[product['id']] = product
+        self.endInsertRows()
+    
+    def product(self, product_id: int) -> Optional[Dict]:
+        """Cached product fields by id"""
+        return self._by_id.get(product_id)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._products) + 1
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        if index.row() == 0:
+            return self.PLACEHOLDER if role in (Qt.DisplayRole, Qt.EditRole) else None
+        
+        product = self._products[index.row() - 1]
+        if role == Qt.DisplayRole:
+            return f"{product['name']} - ₹{product['price']:.2f}"
+        if role == Qt.EditRole:
+            return product['name']
+        if role == Qt.UserRole:
+            return product['id']
+        return None
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """Paints a push button in each cell and emits the row when it is clicked"""
+    
+    clicked = pyqtSignal(int)
+    
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 2, -4, -2)
+        button.text = str(index.data(Qt.DisplayRole) or "")
+        button.state = QStyle.State_Enabled | QStyle.State_Raised
+        
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+    
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease
+                and event.button() == Qt.LeftButton
+                and option.rect.contains(event.pos())):
+            self.clicked.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
+
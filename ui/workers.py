@@ -0,0 +1,128 @@
+import threading
+import traceback
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from typing import Callable, Optional
+
+class JobCancelled(Exception):
+    """Raised inside a job function when the job has been cancelled"""
+
+class JobSignals(QObject):
+    """Signals emitted by a job; delivered on the GUI thread"""
+    
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    done = pyqtSignal()
+
+class Job(QRunnable):
+    """
+    Background job run on a QThreadPool
+    
+    The job function is called as fn(job, *args, **kwargs) on a pool thread.
+    Long running functions should call job.report_progress() and
+    job.check_cancelled() between steps.
+    """
+    
+    def __init__(self, fn: Callable, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self._cancel_event = threading.Event()
+        self.setAutoDelete(False)
+    
+    def cancel(self):
+        """Request cancellation; takes effect at the job's next check_cancelled()"""
+        self._cancel_event.set()
+    
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+    
+    def report_progress(self, percent: int, message: str = ""):
+        self.signals.progress.emit(int(percent), message)
+    
+    def run(self):
+        try:
+            self.check_cancelled()
+            result = self.fn(self, *self.args, **self.kwargs)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+        finally:
+            self.signals.done.emit()
+
+class JobRunner(QObject):
+    """Submits jobs to a thread pool and tracks the ones still running"""
+    
+    # Number of jobs queued or running
+    active_changed = pyqtSignal(int)
+    
+    def __init__(self, max_threads: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool()
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._jobs = set()
+    
+    def submit(self, fn: Callable, *args,
+               on_finished: Optional[Callable] = None,
+               on_failed: Optional[Callable] = None,
+               on_progress: Optional[Callable] = None,
+               on_cancelled: Optional[Callable] = None,
+               **kwargs) -> Job:
+        """
+        Run fn(job, *args, **kwargs) in the background
+        
+        Args:
+            fn: Job function
+            on_finished: Called with the function's return value
+            on_failed: Called with the error message
+            on_progress: Called with (percent, message)
+            on_cancelled: Called if the job was cancelled
+        
+        Returns:
+            The submitted job (call job.cancel() to stop it)
+        """
+        job = Job(fn, *args, **kwargs)
+        if on_finished:
+            job.signals.finished.connect(on_finished)
+        if on_failed:
+            job.signals.failed.connect(on_failed)
+        if on_progress:
+            job.signals.progress.connect(on_progress)
+        if on_cancelled:
+            job.signals.cancelled.connect(on_cancelled)
+        job.signals.done.connect(lambda: self._release(job))
+        
+        # Keep a reference until the job is done; the pool does not own it
+        self._jobs.add(job)
+        self.active_changed.emit(len(self._jobs))
+        self.pool.start(job)
+        return job
+    
+    def _release(self, job: Job):
+        self._jobs.discard(job)
+        self.active_changed.emit(len(self._jobs))
+    
+    def active_count(self) -> int:
+        return len(self._jobs)
+    
+    def cancel_all(self):
+        for job in list(self._jobs):
+            job.cancel()
+    
+    def wait(self, msecs: int = -1) -> bool:
+        """Block until all jobs have finished (used on shutdown)"""
+        return self.pool.waitForDone(msecs)
+
@@ -4,24 +4,25 @@
 Built with Streamlit for cross-platform compatibility
 """
 
+import time
+import threading
+_script_started = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
 from datetime import datetime, date
 import sqlite3
 import json
 import os
+import sys
+import tempfile
 from pathlib import Path
 import base64
 from io import BytesIO
-import plotly.express as px
-import plotly.graph_objects as go
 
-# Database imports
+# Database imports (PDF/QR generators and pandas are imported by the pages that use them)
 try:
     from database.db import DatabaseManager
     from logic.gst_calculator import GSTCalculator
-    from logic.pdf_generator import PDFGenerator
-    from logic.qr_generator import QRCodeGenerator
 except ImportError:
     # Fallback to simple implementations for Streamlit Cloud
     try:
@@ -324,47 +325,49 @@ except ImportError:
                     return []
         
         from gst_calculator_simple import GSTCalculator
-    
-    # Simple PDF and QR generators (placeholders)
-    class PDFGenerator:
-        def generate_invoice_pdf(self, invoice_data, shop_settings, customer_data, template, qr_path, logo_path):
-            # Generate a simple text-based invoice for now
-            invoice_text = f"""
-            INVOICE - {invoice_data['invoice_number']}
-            Date: {invoice_data['created_at']}
-            
-            Shop: {shop_settings.get('shop_name', 'Your Shop')}
-            Address: {shop_settings.get('address', 'Your Address')}
-            Phone: {shop_settings.get('phone', 'Your Phone')}
-            
-            Customer: {customer_data.get('name', 'Walk-in')}
-            
-            Items:
-            """
-            
-            for item in invoice_data['items']:
-                invoice_text += f"- {item['name']} x {item['quantity']} = ₹{item['total']:.2f}\n"
-            
-            invoice_text += f"""
-            
-            Subtotal: ₹{invoice_data['subtotal']:.2f}
-            GST: ₹{invoice_data['gst_amount']:.2f}
-            Total: ₹{invoice_data['total_amount']:.2f}
-            
-            Thank you for your business!
-            """
-            
-            # Save as text file (temporary solution)
-            filename = f"invoice_{invoice_data['invoice_number']}.txt"
-            with open(filename, 'w') as f:
-                f.write(invoice_text)
-            
-            return filename
-    
-    class QRCodeGenerator:
-        def generate_upi_payment_qr(self, upi_id, amount, shop_name, note):
-            # Return None for now (QR generation requires additional setup)
-            return None
+
+# Simple PDF and QR generators, used when ReportLab / qrcode are not installed
+class TextPDFGenerator:
+    def generate_invoice_pdf(self, invoice_data, shop_settings, customer_data, template, qr_path, logo_path):
+        # Generate a simple text-based invoice for now
+        invoice_text = f"""
+        INVOICE - {invoice_data['invoice_number']}
+        Date: {invoice_data['created_at']}
+        
+        Shop: {shop_settings.get('shop_name', 'Your Shop')}
+        Address: {shop_settings.get('address', 'Your Address')}
+        Phone: {shop_settings.get('phone', 'Your Phone')}
+        
+        Customer: {customer_data.get('name', 'Walk-in')}
+        
+        Items:
+        """
+        
+        for item in invoice_data['items']:
+            invoice_text += f"- {item['name']} x {item['quantity']} = ₹{item['total']:.2f}\n"
+        
+        invoice_text += f"""
+        
+        Subtotal: ₹{invoice_data['subtotal']:.2f}
+        GST: ₹{invoice_data['gst_amount']:.2f}
+        Total: ₹{invoice_data['total_amount']:.2f}
+        
+        Thank you for your business!
+        """
+        
+        # Save as text file (temporary solution)
+        filename = f"invoice_{invoice_data['invoice_number']}.txt"
+        with open(filename, 'w') as f:
+            f.write(invoice_text)
+        
+        return filename
+
+class NoQRCodeGenerator:
+    def generate_upi_payment_drawing(self, upi_id, amount, shop_name, note):
+        # Return None for now (QR generation requires additional setup)
+        return None
+
+_imports_done = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -754,11 +757,44 @@ def get_db():
         print("Available methods:", [method for method in dir(db_instance) if not method.startswith('_')])
     return db_instance
 
+@st.cache_resource
+def get_pdf_generator():
+    """PDF generator, created on first use so ReportLab stays off the cold start"""
+    try:
+        from logic.pdf_generator import PDFGenerator
+    except ImportError:
+        return TextPDFGenerator()
+    return PDFGenerator()
+
+@st.cache_resource
+def get_qr_generator():
+    """QR code generator, created on first use"""
+    try:
+        from logic.qr_generator import QRCodeGenerator
+    except ImportError:
+        return NoQRCodeGenerator()
+    return QRCodeGenerator()
+
+@st.cache_resource
+def get_process_stats():
+    """Per-process run counter, used to tell the cold start from later reruns"""
+    return {'runs': 0}
+
+@st.cache_resource
+def start_artifact_expiry():
+    """Remove old generated PDFs and QR codes once per process, off the page run"""
+    try:
+        from logic.artifact_store import expire_artifacts
+    except ImportError:
+        return None
+    thread = threading.Thread(target=lambda: expire_artifacts(get_db().get_shop_settings()), daemon=True)
+    thread.start()
+    return thread
+
 # Initialize classes
 db = get_db()  # Use fresh database instance
+start_artifact_expiry()
 gst_calc = GSTCalculator()
-pdf_gen = PDFGenerator()
-qr_gen = QRCodeGenerator()
 
 # Session state initialization
 if 'current_customer_id' not in st.session_state:
@@ -768,11 +804,169 @@ if 'invoice_items' not in st.session_state:
 if 'page' not in st.session_state:
     st.session_state.page = 'dashboard'
 
+# Rows offered by the customer/product pickers; typing narrows the search
+PICKER_LIMIT = 25
+
+# Rows per page on the customer and product lists
+LIST_PAGE_SIZE = 50
+
+# Latency targets for a page run, reported with --startup-timing
+COLD_START_BUDGET_MS = 1500
+RENDER_BUDGET_MS = 300
+
 # Helper functions
 def format_currency(amount):
     """Format amount as Indian Rupee"""
     return f"₹{amount:,.2f}"
 
+def count_records(count_method, list_method):
+    """Count rows with the database's COUNT query, or by listing them if it has none"""
+    if hasattr(db, count_method):
+        return getattr(db, count_method)()
+    return len(getattr(db, list_method)())
+
+def _after(records, after):
+    """Records sorting after the (name, id) key `after`"""
+    if not after:
+        return records
+    return [record for record in records if (record['name'], record['id']) > tuple(after)]
+
+def search_customers(search, limit=PICKER_LIMIT, after=None, prefix=True):
+    """
+    First `limit` customers (after the (name, id) key `after`) matching `search`
+    
+    Pickers match the start of the name, email or phone (indexed); the list
+    page passes prefix=False to match anywhere in them, e.g. a surname.
+    """
+    if hasattr(db, 'get_customers_page'):
+        return db.get_customers_page(search, after, limit, prefix=prefix)
+    return _after(db.get_customers(search), after)[:limit]
+
+def search_products(search, limit=PICKER_LIMIT, after=None, prefix=True):
+    """First `limit` products (after the (name, id) key `after`) matching `search` (see search_customers)"""
+    if hasattr(db, 'get_products_page'):
+        return db.get_products_page(search, "", after, limit, prefix=prefix)
+    return _after(db.get_products(search), after)[:limit]
+
+def count_matches(count_method, search, prefix=True):
+    """Number of records matching a search, or None if the database can't count them"""
+    counter = getattr(db, count_method, None)
+    return counter(search, prefix=prefix) if counter else None
+
+def paged_list(list_key, search, fetch_page):
+    """
+    Current page of a name-ordered list, with Previous/Next controls
+    
+    Pages are fetched by keyset (the (name, id) of the previous page's last
+    row), so each page is one indexed query of LIST_PAGE_SIZE rows however
+    large the table is. The list goes back to its first page when the
+    search changes.
+    
+    Args:
+        list_key: Session state key for the page position
+        search: Current search text
+        fetch_page: fetch_page(after, limit) -> records
+    
+    Returns:
+        Records on the current page
+    """
+    state = st.session_state.setdefault(list_key, {'search': search, 'starts': [None]})
+    if state['search'] != search:
+        state['search'] = search
+        state['starts'] = [None]
+    
+    # One extra row tells whether there is a next page
+    records = fetch_page(state['starts'][-1], LIST_PAGE_SIZE + 1)
+    has_next = len(records) > LIST_PAGE_SIZE
+    records = records[:LIST_PAGE_SIZE]
+    
+    def previous_page():
+        state['starts'].pop()
+    
+    def next_page(start):
+        state['starts'].append(start)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("⬅️ Previous", key=f"{list_key}_previous", on_click=previous_page,
+                  disabled=len(state['starts']) == 1, use_container_width=True)
+    with col2:
+        st.markdown(f"<p style='text-align: center;'>Page {len(state['starts'])}</p>", unsafe_allow_html=True)
+    with col3:
+        st.button("Next ➡️", key=f"{list_key}_next", on_click=next_page,
+                  args=((records[-1]['name'], records[-1]['id']) if records else None,),
+                  disabled=not has_next, use_container_width=True)
+    
+    return records
+
+def record_details_picker(label, records, placeholder):
+    """Selectbox choosing one record of the current page for its detail panel"""
+    options = {record['id']: record for record in records}
+    choice = st.selectbox(
+        label, [None] + list(options),
+        format_func=lambda record_id: placeholder if record_id is None else options[record_id]['name']
+    )
+    return options.get(choice)
+
+def record_picker(label, records, placeholder, format_record, selected=None):
+    """
+    Selectbox over a limited list of search results
+    
+    Args:
+        label: Widget label
+        records: Matching records (dicts with an 'id')
+        placeholder: Text of the "nothing selected" option
+        format_record: Option label of a record
+        selected: Currently selected record, kept as an option even when the
+            search no longer matches it
+    
+    Returns:
+        Selected record, or None for the placeholder
+    """
+    options = {record['id']: record for record in records}
+    if selected and selected['id'] not in options:
+        options = {selected['id']: selected, **options}
+    
+    ids = [None] + list(options)
+    choice = st.selectbox(
+        label, ids,
+        index=ids.index(selected['id']) if selected else 0,
+        format_func=lambda record_id: placeholder if record_id is None else format_record(options[record_id])
+    )
+    if len(records) >= PICKER_LIMIT:
+        st.caption(f"Showing the first {PICKER_LIMIT} matches - type to narrow the search")
+    return options.get(choice)
+
+def report_render_time(page):
+    """
+    Print how long this script run took (run with --startup-timing)
+    
+    The first run in a process includes importing the app and its
+    dependencies; later runs only re-execute the script.
+    """
+    stats = get_process_stats()
+    stats['runs'] += 1
+    if '--startup-timing' not in sys.argv:
+        return
+    
+    now = time.perf_counter()
+    total_ms = (now - _script_started) * 1000
+    imports_ms = (_imports_done - _script_started) * 1000
+    cold = stats['runs'] == 1
+    budget_ms = COLD_START_BUDGET_MS if cold else RENDER_BUDGET_MS
+    
+    label = "cold start" if cold else "rerun"
+    status = "OK" if total_ms <= budget_ms else "OVER BUDGET"
+    print(f"[timing] {page} {label}: {total_ms:.0f} ms "
+          f"(imports {imports_ms:.0f} ms, render {total_ms - imports_ms:.0f} ms; "
+          f"budget {budget_ms} ms, {status})")
+
+def stock_status(product):
+    """Stock badge for a product"""
+    if product['stock_quantity'] > product.get('min_stock_alert', 10):
+        return "🟢 In Stock"
+    return "🟡 Low Stock" if product['stock_quantity'] > 0 else "🔴 Out of Stock"
+
 def get_base64_image(image_path):
     """Convert image to base64 for embedding"""
     if os.path.exists(image_path):
@@ -834,30 +1028,30 @@ def dashboard_page():
     ''', unsafe_allow_html=True)
     
     # Total Customers
-    customers = db.get_customers()
+    customer_count = count_records('count_customers', 'get_customers')
     st.markdown(f'''
     <div class="metric-card">
-        <h3 style="color: #007bff; margin: 0;">{len(customers)}</h3>
+        <h3 style="color: #007bff; margin: 0;">{customer_count}</h3>
         <p style="margin: 0; color: #6c757d;">Total Customers</p>
         <small>Active customers</small>
     </div>
     ''', unsafe_allow_html=True)
     
     # Total Products
-    products = db.get_products()
+    product_count = count_records('count_products', 'get_products')
     st.markdown(f'''
     <div class="metric-card">
-        <h3 style="color: #dc3545; margin: 0;">{len(products)}</h3>
+        <h3 style="color: #dc3545; margin: 0;">{product_count}</h3>
         <p style="margin: 0; color: #6c757d;">Total Products</p>
         <small>In inventory</small>
     </div>
     ''', unsafe_allow_html=True)
     
     # Low Stock
-    low_stock = db.get_low_stock_products()
+    low_stock_count = count_records('count_low_stock_products', 'get_low_stock_products')
     st.markdown(f'''
     <div class="metric-card">
-        <h3 style="color: #ffc107; margin: 0;">{len(low_stock)}</h3>
+        <h3 style="color: #ffc107; margin: 0;">{low_stock_count}</h3>
         <p style="margin: 0; color: #6c757d;">Low Stock Alert</p>
         <small>Need restocking</small>
     </div>
@@ -880,6 +1074,7 @@ def dashboard_page():
                 'Date': invoice['created_at'][:10]
             })
         
+        import pandas as pd
         df = pd.DataFrame(df_data)
         st.markdown('<div class="mobile-table">', unsafe_allow_html=True)
         st.dataframe(df, use_container_width=True, hide_index=True)
@@ -907,26 +1102,27 @@ def invoice_page():
     
     # Customer Selection
     st.subheader("👥 Customer Information")
-    customers = db.get_customers()
-    customer_options = {"Walk-in Customer": None}
-    
-    for customer in customers:
-        customer_options[f"{customer['name']} - {customer.get('phone', '')}"] = customer['id']
-    
-    selected_customer = st.selectbox("Select Customer", list(customer_options.keys()))
-    
-    if selected_customer != "Walk-in Customer":
-        st.session_state.current_customer_id = customer_options[selected_customer]
-        customer = db.get_customer(st.session_state.current_customer_id)
+    customer_search = st.text_input("Search Customer", placeholder="Name, phone or email")
+    current_customer = None
+    if st.session_state.current_customer_id:
+        current_customer = db.get_customer(st.session_state.current_customer_id)
+    
+    customer = record_picker(
+        "Select Customer", search_customers(customer_search), "Walk-in Customer",
+        lambda record: f"{record['name']} - {record.get('phone') or ''}",
+        selected=current_customer
+    )
+    
+    if customer:
+        st.session_state.current_customer_id = customer['id']
         
-        if customer:
-            col1, col2 = st.columns(2)
-            with col1:
-                st.text_input("Phone", customer.get('phone', ''), disabled=True)
-            with col2:
-                st.text_input("Email", customer.get('email', ''), disabled=True)
-            
-            st.text_area("Address", customer.get('address', ''), disabled=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.text_input("Phone", customer.get('phone', ''), disabled=True)
+        with col2:
+            st.text_input("Email", customer.get('email', ''), disabled=True)
+        
+        st.text_area("Address", customer.get('address', ''), disabled=True)
     else:
         st.session_state.current_customer_id = None
     
@@ -946,47 +1142,44 @@ def invoice_page():
     
     # Add new item
     with st.expander("➕ Add Item", expanded=True):
-        products = db.get_products()
-        product_options = {"Select Product": None}
-        
-        for product in products:
-            product_options[f"{product['name']} - ₹{product['price']:.2f}"] = product['id']
+        product_search = st.text_input("Search Product", placeholder="Name or barcode")
         
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            selected_product = st.selectbox("Product", list(product_options.keys()))
+            product = record_picker(
+                "Product", search_products(product_search), "Select Product",
+                lambda record: f"{record['name']} - ₹{record['price']:.2f}"
+            )
         
         with col2:
             quantity = st.number_input("Quantity", min_value=1, value=1)
         
-        if selected_product != "Select Product" and st.button("Add to Invoice"):
-            product_id = product_options[selected_product]
-            product = db.get_product(product_id)
+        if product and st.button("Add to Invoice"):
+            product_id = product['id']
             
-            if product:
-                # Calculate item total
-                calc_result = gst_calc.calculate_item_total(
-                    quantity, 
-                    product['price'], 
-                    0,  # discount
-                    product['gst_percent']
-                )
-                
-                item_data = {
-                    'product_id': product_id,
-                    'name': product['name'],
-                    'quantity': quantity,
-                    'price': product['price'],
-                    'gst_percent': product['gst_percent'],
-                    'discount_percent': 0,
-                    'total': calc_result['total_amount'],
-                    **calc_result
-                }
-                
-                st.session_state.invoice_items.append(item_data)
-                st.success(f"Added {quantity} x {product['name']}")
-                st.rerun()
+            # Calculate item total
+            calc_result = gst_calc.calculate_item_total(
+                quantity, 
+                product['price'], 
+                0,  # discount
+                product['gst_percent']
+            )
+            
+            item_data = {
+                'product_id': product_id,
+                'name': product['name'],
+                'quantity': quantity,
+                'price': product['price'],
+                'gst_percent': product['gst_percent'],
+                'discount_percent': 0,
+                'total': calc_result['total_amount'],
+                **calc_result
+            }
+            
+            st.session_state.invoice_items.append(item_data)
+            st.success(f"Added {quantity} x {product['name']}")
+            st.rerun()
     
     # Display Items
     if st.session_state.invoice_items:
@@ -1098,14 +1291,29 @@ def customers_page():
     # Search Customers
     search_term = st.text_input("🔍 Search Customers", placeholder="Search by name, phone, or email...")
     
-    # Display Customers
-    customers = db.get_customers(search_term)
+    # Display Customers (one page at a time; details only for the chosen customer).
+    # Substring search, so surnames and phone digits match; LIMIT bounds each page.
+    total = count_matches('count_customers', search_term, prefix=False)
+    customers = paged_list("customer_list", search_term,
+                           lambda after, limit: search_customers(search_term, limit, after, prefix=False))
     
     if customers:
-        st.subheader(f"📋 Customers ({len(customers)} found)")
+        found = f"{total} found" if total is not None else f"page of {len(customers)}"
+        st.subheader(f"📋 Customers ({found})")
+        
+        st.markdown('<div class="mobile-table">', unsafe_allow_html=True)
+        st.dataframe([{
+            'Name': customer['name'],
+            'Phone': customer.get('phone') or '',
+            'Email': customer.get('email') or '',
+            'GSTIN': customer.get('gstin') or '',
+        } for customer in customers], use_container_width=True, hide_index=True)
+        st.markdown('</div>', unsafe_allow_html=True)
         
-        for customer in customers:
-            with st.expander(f"👤 {customer['name']}"):
+        customer = record_details_picker("Customer Details", customers, "Select a customer to view details")
+        if customer:
+            with st.container(border=True):
+                st.markdown(f"**👤 {customer['name']}**")
                 col1, col2 = st.columns(2)
                 
                 with col1:
@@ -1176,16 +1384,30 @@ def products_page():
     # Search Products
     search_term = st.text_input("🔍 Search Products", placeholder="Search by name, category, or barcode...")
     
-    # Display Products
-    products = db.get_products(search_term)
+    # Display Products (one page at a time; details only for the chosen product)
+    total = count_matches('count_products', search_term, prefix=False)
+    products = paged_list("product_list", search_term,
+                          lambda after, limit: search_products(search_term, limit, after, prefix=False))
     
     if products:
-        st.subheader(f"📦 Products ({len(products)} found)")
+        found = f"{total} found" if total is not None else f"page of {len(products)}"
+        st.subheader(f"📦 Products ({found})")
         
-        for product in products:
-            stock_status = "🟢 In Stock" if product['stock_quantity'] > 10 else "🟡 Low Stock" if product['stock_quantity'] > 0 else "🔴 Out of Stock"
-            
-            with st.expander(f"📦 {product['name']} - {format_currency(product['price'])} {stock_status}"):
+        st.markdown('<div class="mobile-table">', unsafe_allow_html=True)
+        st.dataframe([{
+            'Name': product['name'],
+            'Price': format_currency(product['price']),
+            'GST %': product['gst_percent'],
+            'Stock': product['stock_quantity'],
+            'Status': stock_status(product),
+            'Category': product.get('category') or '',
+        } for product in products], use_container_width=True, hide_index=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        product = record_details_picker("Product Details", products, "Select a product to view details")
+        if product:
+            with st.container(border=True):
+                st.markdown(f"**📦 {product['name']} - {format_currency(product['price'])} {stock_status(product)}**")
                 col1, col2 = st.columns(2)
                 
                 with col1:
@@ -1250,6 +1472,19 @@ def settings_page():
                                index=0 if shop_settings.get('default_template') == 'template1' else 
                                       1 if shop_settings.get('default_template') == 'template2' else 2)
     
+    # Generated PDFs and QR codes, expired when the app starts
+    st.subheader("🗂️ Generated Files")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        retention_days = st.number_input("Keep for (days)", min_value=1, max_value=3650,
+                                         value=int(float(shop_settings.get('artifact_retention_days') or 30)))
+    
+    with col2:
+        quota_mb = st.number_input("Size limit (MB)", min_value=10, max_value=100000,
+                                   value=int(float(shop_settings.get('artifact_quota_mb') or 500)))
+    
     if st.button("💾 Save Settings", use_container_width=True):
         settings_data = {
             'shop_name': shop_name,
@@ -1260,7 +1495,9 @@ def settings_page():
             'upi_id': shop_upi,
             'invoice_prefix': invoice_prefix,
             'default_gst': default_gst,
-            'default_template': template.split(' - ')[0]
+            'default_template': template.split(' - ')[0],
+            'artifact_retention_days': retention_days,
+            'artifact_quota_mb': quota_mb
         }
         
         try:
@@ -1279,8 +1516,11 @@ def settings_page():
             backup_data()
     
     with col2:
-        if st.button("📊 Export Reports", use_container_width=True):
-            st.info("Export functionality coming soon!")
+        export_dataset = st.selectbox("Export", ["invoices", "invoice_items", "customers", "products"],
+                                      format_func=lambda name: name.replace('_', ' ').title())
+        export_format = st.radio("Format", ["CSV", "Excel"], horizontal=True)
+        if st.button("📊 Export Data", use_container_width=True):
+            export_data(export_dataset, 'xlsx' if export_format == "Excel" else 'csv')
     
     # About
     st.subheader("ℹ️ About")
@@ -1357,9 +1597,9 @@ def generate_pdf_invoice(totals, payment_method, notes):
         }
         
         # Generate QR code
-        qr_path = None
+        qr_code = None
         if shop_settings.get('upi_id'):
-            qr_path = qr_gen.generate_upi_payment_qr(
+            qr_code = get_qr_generator().generate_upi_payment_drawing(
                 shop_settings['upi_id'],
                 invoice_data['total_amount'],
                 shop_settings.get('shop_name', 'Shop'),
@@ -1370,9 +1610,9 @@ def generate_pdf_invoice(totals, payment_method, notes):
         template = shop_settings.get('default_template', 'template1')
         logo_path = shop_settings.get('logo_path')
         
-        pdf_path = pdf_gen.generate_invoice_pdf(
+        pdf_path = get_pdf_generator().generate_invoice_pdf(
             invoice_data, shop_settings, customer_data, 
-            template, qr_path, logo_path
+            template, qr_code, logo_path
         )
         
         # Provide download link
@@ -1392,19 +1632,21 @@ def generate_pdf_invoice(totals, payment_method, notes):
 def backup_data():
     """Backup database"""
     try:
-        from datetime import datetime
-        import shutil
+        from logic.backup import BackupManager
         
-        backup_path = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        shutil.copy2(db.db_path, backup_path)
+        # Online, compressed snapshot; older backups beyond the retention limit are removed
+        manager = BackupManager(db.db_path)
+        with st.spinner("Creating backup..."):
+            backup_path = manager.create_backup(compress=True)
+        manager.apply_retention()
         
-        # Provide download link
+        # Provide download link (Streamlit reads the whole file into memory to serve it)
         with open(backup_path, "rb") as file:
             st.download_button(
                 label="💾 Download Backup",
-                data=file.read(),
-                file_name=backup_path,
-                mime="application/octet-stream"
+                data=file,
+                file_name=os.path.basename(backup_path),
+                mime="application/gzip"
             )
         
         st.success("Backup created successfully!")
@@ -1412,6 +1654,39 @@ def backup_data():
     except Exception as e:
         st.error(f"Error creating backup: {str(e)}")
 
+def export_data(dataset, extension):
+    """Export a table to CSV or Excel and offer it for download"""
+    try:
+        from logic.exporter import DataExporter
+        
+        # Rows are streamed from the database to the file, never held in memory together.
+        # Each export gets its own file, so sessions exporting the same table don't collide.
+        os.makedirs("exports", exist_ok=True)
+        fd, export_path = tempfile.mkstemp(dir="exports", prefix=f"{dataset}_", suffix=f".{extension}")
+        os.close(fd)
+        try:
+            progress_bar = st.progress(0, text=f"Exporting {dataset.replace('_', ' ')}...")
+            rows = DataExporter(db.db_path).export(dataset, export_path,
+                                                   progress=lambda percent: progress_bar.progress(percent))
+            progress_bar.empty()
+            
+            # Streamlit reads the whole file into memory for the download, so it can be removed after
+            download_name = f"{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+            with open(export_path, "rb") as file:
+                st.download_button(
+                    label=f"📥 Download {download_name}",
+                    data=file,
+                    file_name=download_name,
+                    mime="text/csv" if extension == 'csv' else
+                         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+        finally:
+            os.remove(export_path)
+        st.success(f"Exported {rows:,} rows")
+        
+    except Exception as e:
+        st.error(f"Error exporting data: {str(e)}")
+
 # Main App
 def main():
     """Main application logic"""
@@ -1432,6 +1707,8 @@ def main():
     else:
         dashboard_page()
     
+    report_render_time(st.session_state.page)
+    
     # Footer removed for cleaner interface
 
 if __name__ == "__main__":